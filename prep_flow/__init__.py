@@ -1,27 +1,95 @@
-from prep_flow.base import BaseFlow
-from prep_flow.decorators import creator, data_filter, modifier
-from prep_flow.errors import (
-    ColumnCastError,
-    DecoratorError,
-    DecoratorReturnTypeError,
-    InvalidCategoryFoundError,
-    InvalidDateFoundError,
-    InvalidDateLiteralFoundError,
-    InvalidRegexpFoundError,
-    NecessaryColumnsNotFoundError,
-    NullValueFoundError,
-    ReferenceDataNotFoundError,
-    ReferenceDataNotInitializationError,
-    SheetNotFoundError,
-    ValueCastError,
-)
-from prep_flow.expressions import (
-    Boolean,
-    Column,
-    DateTime,
-    Float,
-    Integer,
-    ReferenceColumn,
-    String,
-)
-from prep_flow.validator import Validator
+from typing import TYPE_CHECKING, Any
+
+# Modules are imported when their names are first accessed, so that `import prep_flow` doesn't import pandas.
+_LAZY_IMPORTS = {
+    "BaseFlow": "prep_flow.base",
+    "creator": "prep_flow.decorators",
+    "data_filter": "prep_flow.decorators",
+    "modifier": "prep_flow.decorators",
+    "CircularReferenceError": "prep_flow.errors",
+    "ColumnCastError": "prep_flow.errors",
+    "DecoratorError": "prep_flow.errors",
+    "DecoratorReturnTypeError": "prep_flow.errors",
+    "InvalidCategoryFoundError": "prep_flow.errors",
+    "InvalidDateFoundError": "prep_flow.errors",
+    "InvalidDateLiteralFoundError": "prep_flow.errors",
+    "InvalidRegexpFoundError": "prep_flow.errors",
+    "NecessaryColumnsNotFoundError": "prep_flow.errors",
+    "NullValueFoundError": "prep_flow.errors",
+    "ReferenceDataNotFoundError": "prep_flow.errors",
+    "ReferenceDataNotInitializationError": "prep_flow.errors",
+    "SheetNotFoundError": "prep_flow.errors",
+    "ValueCastError": "prep_flow.errors",
+    "Boolean": "prep_flow.expressions",
+    "Column": "prep_flow.expressions",
+    "DateTime": "prep_flow.expressions",
+    "Float": "prep_flow.expressions",
+    "Integer": "prep_flow.expressions",
+    "ReferenceColumn": "prep_flow.expressions",
+    "String": "prep_flow.expressions",
+    "Col": "prep_flow.functions",
+    "Expr": "prep_flow.functions",
+    "Lit": "prep_flow.functions",
+    "date_diff": "prep_flow.functions",
+    "when": "prep_flow.functions",
+    "Pipeline": "prep_flow.pipeline",
+    "FlowSession": "prep_flow.session",
+    "SharedFlow": "prep_flow.shared",
+    "ValidationPolicy": "prep_flow.policy",
+    "Validator": "prep_flow.validator",
+    "WorkbookLoader": "prep_flow.workbook",
+}
+
+__all__ = list(_LAZY_IMPORTS.keys())
+
+if TYPE_CHECKING:
+    from prep_flow.base import BaseFlow
+    from prep_flow.decorators import creator, data_filter, modifier
+    from prep_flow.errors import (
+        CircularReferenceError,
+        ColumnCastError,
+        DecoratorError,
+        DecoratorReturnTypeError,
+        InvalidCategoryFoundError,
+        InvalidDateFoundError,
+        InvalidDateLiteralFoundError,
+        InvalidRegexpFoundError,
+        NecessaryColumnsNotFoundError,
+        NullValueFoundError,
+        ReferenceDataNotFoundError,
+        ReferenceDataNotInitializationError,
+        SheetNotFoundError,
+        ValueCastError,
+    )
+    from prep_flow.expressions import (
+        Boolean,
+        Column,
+        DateTime,
+        Float,
+        Integer,
+        ReferenceColumn,
+        String,
+    )
+    from prep_flow.functions import Col, Expr, Lit, date_diff, when
+    from prep_flow.pipeline import Pipeline
+    from prep_flow.policy import ValidationPolicy
+    from prep_flow.session import FlowSession
+    from prep_flow.shared import SharedFlow
+    from prep_flow.validator import Validator
+    from prep_flow.workbook import WorkbookLoader
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    # Cache the value, so that __getattr__ is called once per name.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals().keys()) + __all__)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+import weakref
+from concurrent.futures import Executor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Optional,
+    Union,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from prep_flow.base import BaseFlow, FlowData
+
+AsyncSource = Union[
+    "FlowData",
+    Awaitable[Any],
+    Callable[[], Awaitable[Any]],
+    AsyncIterable["pd.DataFrame"],
+    Callable[[], AsyncIterable["pd.DataFrame"]],
+]
+AsyncReference = Union["BaseFlow", Awaitable["BaseFlow"]]
+
+DEFAULT_CONCURRENCY = os.cpu_count() or 1
+
+# Semaphores are created per event loop, since they can't be shared between loops.
+_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+
+
+def default_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(DEFAULT_CONCURRENCY)
+    return _semaphores[loop]
+
+
+def is_async_source(data: Any) -> bool:
+    return (
+        inspect.isawaitable(data)
+        or inspect.iscoroutinefunction(data)
+        or inspect.isasyncgenfunction(data)
+        or isinstance(data, AsyncIterable)
+    )
+
+
+async def resolve_source(data: AsyncSource) -> FlowData:
+    """
+    Read an async source, until it is FlowData which the flow parses.
+
+    Parameters
+    ----------
+    data: AsyncSource
+        FlowData, an awaitable or a coroutine function returning an async source,
+        or an async iterable (or an async generator function) of pd.DataFrame chunks.
+
+    Returns
+    -------
+    FlowData
+    """
+    # Awaitables may return another async source, e.g. a coroutine opening a stream of chunks.
+    while is_async_source(data):
+        if inspect.iscoroutinefunction(data) or inspect.isasyncgenfunction(data):
+            data = data()
+        elif inspect.isawaitable(data):
+            data = await data
+        else:
+            import pandas as pd
+
+            chunks = [chunk async for chunk in data]
+            data = pd.concat(chunks, ignore_index=True)
+    return data
+
+
+async def resolve_reference(reference: AsyncReference) -> BaseFlow:
+    if inspect.isawaitable(reference):
+        return await reference
+    return reference
+
+
+async def run_flow(
+    flow_class: type[BaseFlow],
+    data: AsyncSource,
+    reference: Optional[list[AsyncReference]] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> BaseFlow:
+    """
+    Run a flow without blocking the event loop.
+
+    The source and the references are awaited concurrently, then the flow runs in the executor
+    while the semaphore bounds the number of flows running at once.
+
+    Parameters
+    ----------
+    flow_class: type[BaseFlow]
+    data: AsyncSource
+    reference: Optional[list[AsyncReference]]
+        Flows, or awaitables returning them, e.g. tasks of other flows.
+    semaphore: Optional[asyncio.Semaphore]
+        Defaults to a semaphore of the running loop, allowing os.cpu_count() flows.
+    executor: Optional[Executor]
+        Defaults to the executor of the running loop.
+    kwargs: Any
+        Passed to flow_class.
+
+    Returns
+    -------
+    BaseFlow
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = default_semaphore() if semaphore is None else semaphore
+    source, *references = await asyncio.gather(
+        resolve_source(data), *[resolve_reference(_reference) for _reference in reference or []]
+    )
+
+    async with semaphore:
+        return await loop.run_in_executor(executor, lambda: flow_class(source, reference=references, **kwargs))
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Optional
+
+import pandas as pd
+
+from prep_flow.expressions import Dtype
+
+
+def import_pyarrow() -> tuple[Any, Any]:
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        raise ImportError("pyarrow is required to use Arrow data. Install it with `pip install pyarrow`.")
+
+    return pa, pc
+
+
+def is_arrow_table(data: Any) -> bool:
+    # pyarrow is already imported, if data is an Arrow table.
+    pa = sys.modules.get("pyarrow")
+    return pa is not None and isinstance(data, pa.Table)
+
+
+def is_arrow_dataset(data: Any) -> bool:
+    ds = sys.modules.get("pyarrow.dataset")
+    return ds is not None and isinstance(data, ds.Dataset)
+
+
+def is_arrow_series(series: pd.Series) -> bool:
+    return isinstance(series.dtype, pd.ArrowDtype)
+
+
+def arrow_types_mapper(pyarrow_dtype: Any) -> Optional[pd.ArrowDtype]:
+    pa, _ = import_pyarrow()
+    # Dictionary-encoded columns are read as pd.Categorical.
+    if pa.types.is_dictionary(pyarrow_dtype):
+        return None
+    return pd.ArrowDtype(pyarrow_dtype)
+
+
+def from_arrow(table: Any) -> pd.DataFrame:
+    """
+    Convert an Arrow table to pd.DataFrame backed by the same Arrow arrays, without copying them.
+
+    Parameters
+    ----------
+    table: pyarrow.Table
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    return table.to_pandas(types_mapper=arrow_types_mapper)
+
+
+def to_arrow(
+    data: pd.DataFrame,
+    dictionary_columns: Optional[list[str]] = None,
+    metadata: Optional[dict[bytes, bytes]] = None,
+) -> Any:
+    """
+    Convert pd.DataFrame to an Arrow table. Arrow-backed columns are not copied.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+    dictionary_columns: Optional[list[str]]
+        Columns to be dictionary-encoded.
+    metadata: Optional[dict[bytes, bytes]]
+        Added to the metadata of the schema.
+
+    Returns
+    -------
+    pyarrow.Table
+    """
+    pa, pc = import_pyarrow()
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    for column in dictionary_columns or []:
+        i = table.schema.get_field_index(column)
+        if i < 0 or pa.types.is_dictionary(table.schema.field(i).type):
+            continue
+        table = table.set_column(i, column, pc.dictionary_encode(table.column(i)))
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    return table
+
+
+def write_parquet(
+    data: pd.DataFrame,
+    path: str,
+    dictionary_columns: Optional[list[str]] = None,
+    partition_cols: Optional[list[str]] = None,
+    metadata: Optional[dict[bytes, bytes]] = None,
+) -> None:
+    """
+    Write pd.DataFrame as a Parquet file, or as a partitioned Parquet dataset if partition_cols is specified.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+    path: str
+        File path, or root directory of the dataset.
+    dictionary_columns: Optional[list[str]]
+        Columns to be dictionary-encoded.
+    partition_cols: Optional[list[str]]
+    metadata: Optional[dict[bytes, bytes]]
+        Added to the metadata of the schema.
+    """
+    import_pyarrow()
+    import pyarrow.parquet as pq
+
+    table = to_arrow(data, dictionary_columns, metadata)
+    if partition_cols:
+        pq.write_to_dataset(table, path, partition_cols=partition_cols)
+    else:
+        pq.write_table(table, path)
+
+
+def write_ipc(
+    data: pd.DataFrame,
+    path: str,
+    dictionary_columns: Optional[list[str]] = None,
+    metadata: Optional[dict[bytes, bytes]] = None,
+) -> None:
+    """
+    Write pd.DataFrame as an uncompressed Arrow IPC (Feather V2) file, which can be memory-mapped.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+    path: str
+    dictionary_columns: Optional[list[str]]
+        Columns to be dictionary-encoded.
+    metadata: Optional[dict[bytes, bytes]]
+        Added to the metadata of the schema.
+    """
+    pa, _ = import_pyarrow()
+    table = to_arrow(data, dictionary_columns, metadata)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_ipc(path: str, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Read an Arrow IPC file by memory-mapping it. Columns are backed by the mapped file without copying.
+
+    Parameters
+    ----------
+    path: str
+    columns: Optional[list[str]]
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    pa, _ = import_pyarrow()
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return from_arrow(table)
+
+
+def read_parquet(path: str, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Read a Parquet file or a partitioned Parquet dataset.
+    The file is memory-mapped while it is read, but the columns are decoded into memory, unlike read_ipc.
+
+    Parameters
+    ----------
+    path: str
+    columns: Optional[list[str]]
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    import_pyarrow()
+    import pyarrow.parquet as pq
+
+    return from_arrow(pq.read_table(path, columns=columns, memory_map=True))
+
+
+def read_ipc_metadata(path: str) -> Optional[dict[bytes, bytes]]:
+    # Only the schema at the footer of the file is read.
+    pa, _ = import_pyarrow()
+    return pa.ipc.open_file(pa.memory_map(path, "r")).schema.metadata
+
+
+def read_parquet_metadata(path: str) -> Optional[dict[bytes, bytes]]:
+    return parquet_dataset(path).schema.metadata
+
+
+def parquet_dataset(path: str) -> Any:
+    """
+    Open a Parquet file or a dataset partitioned by directories such as `year=2024`, without reading it.
+
+    Parameters
+    ----------
+    path: str
+
+    Returns
+    -------
+    pyarrow.dataset.Dataset
+    """
+    import_pyarrow()
+    import pyarrow.dataset as ds
+
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+
+def read_dataset(dataset: Any, columns: Optional[list[str]] = None, filter: Any = None) -> pd.DataFrame:
+    """
+    Read an Arrow dataset. The filter prunes partitions and row groups by their statistics,
+    so rows which don't satisfy it are not read.
+
+    Parameters
+    ----------
+    dataset: pyarrow.dataset.Dataset
+    columns: Optional[list[str]]
+    filter: Optional[pyarrow.compute.Expression]
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    return from_arrow(dataset.to_table(columns=columns, filter=filter))
+
+
+def arrow_dtype(dtype: Dtype) -> pd.ArrowDtype:
+    pa, _ = import_pyarrow()
+    types = {
+        "str": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "datetime64[ns]": pa.timestamp("ns"),
+    }
+    return pd.ArrowDtype(types[dtype.name])
+
+
+def first_true(mask: Any) -> Optional[int]:
+    _, pc = import_pyarrow()
+    position = pc.index(pc.fill_null(mask, False), True).as_py()
+    return None if position < 0 else position
+
+
+def find_null(series: pd.Series) -> Optional[int]:
+    """
+    Find the first null with pyarrow.compute.
+
+    Parameters
+    ----------
+    series: pd.Series
+        Arrow-backed series.
+
+    Returns
+    -------
+    Optional[int]
+        Position of the first null, or None if there is no null.
+    """
+    _, pc = import_pyarrow()
+    return first_true(pc.is_null(series.array.__arrow_array__(), nan_is_null=True))
+
+
+def find_regexp_mismatch(series: pd.Series, regexp: str, nullable: bool) -> Optional[int]:
+    """
+    Find the first value which doesn't match the regular expression from its beginning, like re.match.
+
+    Parameters
+    ----------
+    series: pd.Series
+        Arrow-backed series.
+    regexp: str
+    nullable: bool
+
+    Returns
+    -------
+    Optional[int]
+        Position of the first value, or None if all values match.
+
+    Raises
+    ------
+    NotImplementedError
+        If the series is not a string series, or the regular expression is not supported by pyarrow (RE2).
+    """
+    pa, pc = import_pyarrow()
+    array = series.array.__arrow_array__()
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        raise NotImplementedError()
+
+    try:
+        matched = pc.match_substring_regex(array, f"^(?:{regexp})")
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        raise NotImplementedError()
+
+    # Nulls are invalid unless nullable.
+    return first_true(pc.invert(pc.fill_null(matched, nullable)))
+
+
+def find_category_mismatch(series: pd.Series, category: list[Any], nullable: bool) -> Optional[int]:
+    """
+    Find the first value which is not included in the category with pyarrow.compute.
+
+    Parameters
+    ----------
+    series: pd.Series
+        Arrow-backed series.
+    category: list[Any]
+    nullable: bool
+
+    Returns
+    -------
+    Optional[int]
+        Position of the first value, or None if all values are included.
+
+    Raises
+    ------
+    NotImplementedError
+        If the category can't be compared with the series by pyarrow.
+    """
+    pa, pc = import_pyarrow()
+    array = series.array.__arrow_array__()
+    try:
+        included = pc.is_in(array, value_set=pa.array(category, type=array.type))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        raise NotImplementedError()
+
+    if nullable:
+        included = pc.or_(included, pc.is_null(array, nan_is_null=True))
+    return first_true(pc.invert(included))
+
+
+def is_datetime_series(series: pd.Series) -> bool:
+    pa, _ = import_pyarrow()
+    pyarrow_dtype = series.dtype.pyarrow_dtype
+    return pa.types.is_timestamp(pyarrow_dtype) or pa.types.is_date(pyarrow_dtype)
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
 import abc
-from typing import Callable, Optional, Union
+import asyncio
+import warnings
+import weakref
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
 
 import numpy as np
 import pandas as pd
 
-from prep_flow.decorators import CREATOR_KEY, DECORATOR_KEY, FILTER_KEY, MODIFIER_KEY
+from prep_flow import aio, arrow, parallel, plan
+from prep_flow.cache import ResultCache, data_key, function_key
+from prep_flow.decorators import (
+    CACHE_KEY,
+    CREATOR_KEY,
+    DECORATOR_KEY,
+    FILTER_KEY,
+    MODIFIER_KEY,
+    ROW_LOCAL_KEY,
+)
+from prep_flow.engine import DuckDBEngine, DuckDBValidator
 from prep_flow.errors import (
     ColumnCastError,
     DecoratorError,
@@ -16,39 +30,157 @@ from prep_flow.errors import (
     SheetNotFoundError,
     ValueCastError,
 )
-from prep_flow.expressions import Column, DateTime, Dtype, ReferenceColumn
-from prep_flow.validator import CategoryCondition, RegexpCondition, Validator
+from prep_flow.expressions import (
+    PYPREP_PARENT_CLASS_NAME,
+    Column,
+    DateTime,
+    Dtype,
+    ReferenceColumn,
+)
+from prep_flow.functions import Expr, ExpressionCache
+from prep_flow.join import in_memory_merge, with_range_index
+from prep_flow.memory import (
+    SpillStore,
+    num_of_partitions,
+    parse_size,
+    partitioned_merge,
+)
+from prep_flow.statistics import (
+    ColumnStatistics,
+    StatisticsCollector,
+    column_statistics,
+    from_metadata,
+    narrowed_dtype,
+    to_metadata,
+)
+from prep_flow.validator import (
+    CategoryCondition,
+    RegexpCondition,
+    Validator,
+    category_codes,
+    category_index,
+)
+from prep_flow.workbook import WorkbookLoader
+
+if TYPE_CHECKING:
+    import pyarrow
+
+    from prep_flow.policy import ValidationPolicy
+
+FlowData = Union[pd.DataFrame, pd.ExcelFile, WorkbookLoader, "pyarrow.Table", "pyarrow.dataset.Dataset"]
 
 DEFAULT_SHEET_NAME = "Sheet1"
-PYPREP_PARENT_CLASS_NAME = "__pyprep_parent_class_name__"
+
+# Dtypes holding nulls, keyed by Dtype.name.
+NAN_DTYPES = {
+    "str": "object",
+    "int": "float64",
+    "float": "float64",
+    "bool": "object",
+    "datetime64[ns]": "datetime64[ns]",
+}
+NULLABLE_DTYPES = {
+    "str": "string",
+    "int": "Int64",
+    "float": "Float64",
+    "bool": "boolean",
+    "datetime64[ns]": "datetime64[ns]",
+}
+# Columns inserted into the data passed to the decorators before it is copied into fewer blocks.
+MAX_VIEW_INSERTS = 64
 
 
 class BaseFlow(abc.ABC):
     __sheetname__ = DEFAULT_SHEET_NAME
     __replace_none_to_nan__ = True
+    __categorical_output__ = False
+    __nullable_dtypes__ = False
+    __collect_statistics__ = True
+    __optimize_dtypes__ = False
     __strict_mode__ = True
+    __validation_policy__: Optional[ValidationPolicy] = None
+    __memory_budget__: Optional[Union[int, str]] = None
+    __spill_dir__: Optional[str] = None
+    __engine__ = "pandas"
+    __filters__: list[Expr] = []
+    __cache_dir__: Optional[str] = None
+    __cache_size__: Union[int, str] = "1GB"
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Validate the definitions once, when the flow class is created.
+        for definition in cls.definitions().values():
+            definition.validate()
+        cls.validate_filters()
 
     def __init__(
         self,
-        data: Union[pd.DataFrame, pd.ExcelFile],
+        data: FlowData,
         reference: Optional[list[BaseFlow]] = None,
+        validation_policy: Optional[ValidationPolicy] = None,
     ) -> None:
-        self.original = self.parse_data(data)
-        self.pre_data = None
+        self._setup(self.parse_data(data), reference, validation_policy)
+        self.pushed_down = arrow.is_arrow_dataset(data)
         self.data = self.original.copy()
-        self.reference = [] if reference is None else reference
-        self.validator = Validator()
 
         self.execute()
 
+    def _setup(
+        self,
+        data: pd.DataFrame,
+        reference: Optional[list[BaseFlow]],
+        validation_policy: Optional[ValidationPolicy],
+    ) -> None:
+        # The state of a flow, shared by __init__ and from_data. The data is not copied.
+        self.original = data
+        self.pushed_down = False
+        self.pre_data = None
+        self.data = data
+        self.reference = [] if reference is None else reference
+        self.projections: dict[tuple[str, ...], tuple[weakref.ref, pd.DataFrame]] = {}
+        self.expression_cache = ExpressionCache()
+        self.pending_columns: dict[str, pd.Series] = {}
+        self.data_view: Optional[tuple[pd.DataFrame, dict[str, pd.Series], int]] = None
+        self.statistics: dict[str, ColumnStatistics] = {}
+        self.engine = self.create_engine()
+        self.validator = self.create_validator(
+            self.__validation_policy__ if validation_policy is None else validation_policy
+        )
+        self.spill_store = SpillStore(self.__spill_dir__)
+        self.result_cache = ResultCache(self.__cache_dir__, parse_size(self.__cache_size__))
+
     @classmethod
-    def parse_data(cls, data: Union[pd.DataFrame, pd.ExcelFile]) -> pd.DataFrame:
+    def create_engine(cls) -> Optional[DuckDBEngine]:
+        """
+        Create the engine running validation, casts and reference joins, specified by __engine__.
+
+        Returns
+        -------
+        Optional[DuckDBEngine]
+            None for "pandas".
         """
-        Receives and reads pd.DataFrame or pd.ExcelFile.
+        if cls.__engine__ == "pandas":
+            return None
+        if cls.__engine__ == "duckdb":
+            return DuckDBEngine(memory_limit=cls.memory_budget())
+        raise ValueError(f"Expected pandas or duckdb, got {cls.__engine__}")
+
+    def create_validator(self, policy: Optional[ValidationPolicy]) -> Validator:
+        if self.engine is None:
+            return Validator(policy)
+        return DuckDBValidator(self.engine, policy)
+
+    @classmethod
+    def parse_data(cls, data: FlowData) -> pd.DataFrame:
+        """
+        Receives and reads pd.DataFrame, pd.ExcelFile, WorkbookLoader, pyarrow.Table or pyarrow.dataset.Dataset.
+
+        pyarrow.Table is read as pd.DataFrame backed by the same Arrow arrays, and Arrow dtypes are kept.
+        pyarrow.dataset.Dataset is read with __filters__ pushed down, and only the columns of the flow are read.
 
         Parameters
         ----------
-        data: Union[pd.DataFrame, pd.ExcelFile]
+        data: FlowData
 
         Returns
         -------
@@ -58,20 +190,88 @@ class BaseFlow(abc.ABC):
             cls.validate_sheet_name(data)
             data = pd.read_excel(data, sheet_name=cls.__sheetname__)
 
+        if isinstance(data, WorkbookLoader):
+            cls.validate_sheet_name(data)
+            data = data.sheet(cls.__sheetname__)
+
+        if arrow.is_arrow_dataset(data):
+            data = arrow.read_dataset(data, columns=cls.dataset_columns(data), filter=cls.pushdown_filters()[0])
+
+        if arrow.is_arrow_table(data):
+            data = arrow.from_arrow(data)
+
+        if aio.is_async_source(data):
+            raise TypeError("Async sources must be run with arun.")
+
         return data
 
     @classmethod
-    def validate_sheet_name(cls, xlsx: pd.ExcelFile) -> None:
+    def validate_sheet_name(cls, xlsx: Union[pd.ExcelFile, WorkbookLoader]) -> None:
         """
         Check whether the specified Sheet exists in ExcelFile.
 
         Parameters
         ----------
-        xlsx: pd.ExcelFile
+        xlsx: Union[pd.ExcelFile, WorkbookLoader]
         """
         if cls.__sheetname__ not in xlsx.sheet_names:
             raise SheetNotFoundError(sheet=cls.__sheetname__)
 
+    @classmethod
+    def validate_filters(cls) -> None:
+        base_columns = cls.base_columns()
+        for predicate in cls.__filters__:
+            if not isinstance(predicate, Expr):
+                raise TypeError(f"Expected Expr in __filters__, got {type(predicate)}")
+            unknown = predicate.columns() - set(base_columns)
+            if unknown:
+                raise ValueError(f"__filters__ can refer only to base columns, got {', '.join(sorted(unknown))}")
+
+    @classmethod
+    def pushdown_filters(cls) -> tuple[Any, list[Expr]]:
+        """
+        Compile __filters__ to an Arrow expression filtering the raw data, which readers push down.
+
+        Returns
+        -------
+        tuple[Any, list[Expr]]
+            pyarrow.compute.Expression combining the filters with AND, or None if no filter can be compiled,
+            and the filters which can't be compiled and are applied after reading.
+        """
+        definitions = cls.definitions()
+        names = dict((column, definitions[column].name) for column in cls.base_columns() if definitions[column].name)
+        compiled, remaining = None, []
+        for predicate in cls.__filters__:
+            try:
+                expression = predicate.to_arrow(names)
+            except NotImplementedError:
+                remaining.append(predicate)
+                continue
+            compiled = expression if compiled is None else compiled & expression
+        return compiled, remaining
+
+    @classmethod
+    def dataset_columns(cls, dataset: Any) -> Optional[list[str]]:
+        # Columns without definitions are read only if they are kept.
+        if not cls.__strict_mode__:
+            return None
+        columns = cls.source_columns(cls.base_columns())
+        return [column for column in dataset.schema.names if column in columns]
+
+    @classmethod
+    def base_columns(cls) -> list[str]:
+        """
+        Get the columns read from the data, i.e. the columns which are neither created nor merged.
+
+        Returns
+        -------
+        list[str]
+        """
+        creator_columns = [column for _, column, _ in cls.get_decorators(CREATOR_KEY).values()]
+        return [
+            key for key, val in cls.definitions().items() if isinstance(val, Column) and key not in creator_columns
+        ]
+
     @classmethod
     def definitions(cls) -> dict[str, Union[Column, ReferenceColumn]]:
         """
@@ -98,9 +298,11 @@ class BaseFlow(abc.ABC):
 
         # Convert raw data column names and verify that they are the expected type.
         self.rename()
+        self.apply_declared_filters()
         self.pre_validate()
         self.pre_cast()
         self.pre_data = self.data.copy()
+        self.enforce_memory_budget()
 
         for order in self.orders():
             # Modify values with Column.modifier.
@@ -124,6 +326,12 @@ class BaseFlow(abc.ABC):
             # Modify values with decorator referring to ReferenceColumn.
             self.apply_reference_column_modifier_with_decorator(order=order)
 
+            # Write the results of this order at once.
+            self.data_view = None
+            self.flush_columns()
+            self.consolidate()
+            self.enforce_memory_budget()
+
         # Validate all columns.
         self.post_validate(only_base=False)
         self.post_cast(only_base=False)
@@ -131,7 +339,340 @@ class BaseFlow(abc.ABC):
         if self.__replace_none_to_nan__:
             self.replace_none_to_nan()
 
+        if self.__categorical_output__:
+            self.to_categorical()
+
         self.sort_columns()
+        self.enforce_memory_budget()
+
+    @classmethod
+    def incremental(
+        cls,
+        previous: BaseFlow,
+        data: FlowData,
+        reference: Optional[list[BaseFlow]] = None,
+        key: Optional[Union[str, list[str]]] = None,
+        watermark: Optional[str] = None,
+        validation_policy: Optional[ValidationPolicy] = None,
+    ) -> BaseFlow:
+        """
+        Process only new or changed rows and append or upsert them into the previous result.
+
+        If the flow is not row-local (see is_row_local), the whole data is processed again instead.
+
+        Parameters
+        ----------
+        previous: BaseFlow
+            The previous result of this flow.
+        data: FlowData
+            The delta. If watermark is specified, the whole source whose new rows are selected by the watermark.
+        reference: Optional[list[BaseFlow]]
+        key: Optional[Union[str, list[str]]]
+            Columns identifying a row. Rows of the previous result with the same key are replaced.
+            If None, new rows are appended.
+        watermark: Optional[str]
+            Column whose values are greater than the maximum of the previous result in new rows.
+        validation_policy: Optional[ValidationPolicy]
+
+        Returns
+        -------
+        BaseFlow
+        """
+        source = cls.parse_data(data)
+        # With a watermark, data is the whole source.
+        original = source if watermark is not None else cls.upsert(previous.original, source, cls.source_columns(key))
+        if not cls.is_row_local():
+            return cls(original, reference=reference, validation_policy=validation_policy)
+
+        if watermark is not None:
+            source = cls.select_after_watermark(source, previous.data, watermark)
+
+        flow = cls(source, reference=reference, validation_policy=validation_policy)
+        flow.original = original
+        flow.data = cls.upsert(previous.data, flow.data, key)
+        return flow
+
+    @classmethod
+    async def arun(
+        cls,
+        data: aio.AsyncSource,
+        reference: Optional[list[aio.AsyncReference]] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> BaseFlow:
+        """
+        Run the flow without blocking the event loop.
+
+        The source and the references are awaited concurrently, and the flow runs in an executor.
+        The number of flows running at once is bounded by the semaphore.
+
+        Parameters
+        ----------
+        data: AsyncSource
+            FlowData, an awaitable or a coroutine function returning an async source,
+            or an async iterable (or an async generator function) of pd.DataFrame chunks.
+            Async sources are read here, as the other constructors raise TypeError for them.
+        reference: Optional[list[AsyncReference]]
+            Flows, or awaitables returning them, e.g. tasks of other flows.
+        semaphore: Optional[asyncio.Semaphore]
+            Defaults to a semaphore of the running loop, allowing os.cpu_count() flows.
+        executor: Optional[Executor]
+            Defaults to the executor of the running loop.
+        kwargs: Any
+            Passed to the flow, e.g. validation_policy.
+
+        Returns
+        -------
+        BaseFlow
+        """
+        return await aio.run_flow(cls, data, reference=reference, semaphore=semaphore, executor=executor, **kwargs)
+
+    @classmethod
+    def explain(
+        cls,
+        data: Optional[Union[FlowData, plan.Schema]] = None,
+        reference: Optional[list[BaseFlow]] = None,
+    ) -> plan.ExecutionPlan:
+        """
+        Resolve the execution plan without running the flow. print() renders it.
+
+        The plan lists the stages per order: validation checks, casts (and which are no-ops), decorators,
+        reference joins, and the estimated rows and bytes if the input data is given.
+
+        Parameters
+        ----------
+        data: Optional[Union[FlowData, plan.Schema]]
+            The input data, or its schema as a dict of column names and dtypes or a pyarrow.Schema.
+        reference: Optional[list[BaseFlow]]
+            Reference flows, used to estimate the joins.
+
+        Returns
+        -------
+        plan.ExecutionPlan
+        """
+        return plan.explain(cls, data, reference=reference)
+
+    @classmethod
+    def run_partitioned(
+        cls,
+        data: FlowData,
+        reference: Optional[list[BaseFlow]] = None,
+        partitions: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        validation_policy: Optional[ValidationPolicy] = None,
+    ) -> BaseFlow:
+        """
+        Run the flow on row partitions of one large input in worker processes, if the flow is row-local.
+
+        Parameters
+        ----------
+        data: FlowData
+        reference: Optional[list[BaseFlow]]
+        partitions: Optional[int]
+            Defaults to max_workers.
+        max_workers: Optional[int]
+            Defaults to os.cpu_count().
+        validation_policy: Optional[ValidationPolicy]
+
+        Returns
+        -------
+        BaseFlow
+        """
+        return parallel.run_partitioned(
+            cls,
+            data,
+            reference=reference,
+            partitions=partitions,
+            max_workers=max_workers,
+            validation_policy=validation_policy,
+        )
+
+    @classmethod
+    def is_row_local(cls) -> bool:
+        """
+        Whether each output row is computed only from its own input row.
+
+        Filters, full joins, and creators or modifiers without row_local=True are not row-local.
+
+        Returns
+        -------
+        bool
+        """
+        for attr, (decorator_key, _, _) in cls.get_decorators().items():
+            if decorator_key == FILTER_KEY:
+                return False
+            if not getattr(vars(cls)[attr], ROW_LOCAL_KEY, False):
+                return False
+
+        for val in vars(cls).values():
+            if isinstance(val, ReferenceColumn) and val.how == "full":
+                return False
+
+        return True
+
+    @classmethod
+    def source_columns(cls, columns: Optional[Union[str, list[str]]]) -> Optional[list[str]]:
+        if columns is None:
+            return None
+        columns = [columns] if isinstance(columns, str) else columns
+        definitions = cls.definitions()
+        return [
+            definitions[column].name if (column in definitions) and (definitions[column].name is not None) else column
+            for column in columns
+        ]
+
+    @classmethod
+    def select_after_watermark(cls, source: pd.DataFrame, previous: pd.DataFrame, watermark: str) -> pd.DataFrame:
+        if previous.shape[0] == 0:
+            return source
+
+        latest = previous[watermark].max()
+        values = source[cls.source_columns(watermark)[0]]
+        if pd.api.types.is_datetime64_any_dtype(previous[watermark]):
+            values = pd.to_datetime(values)
+        elif pd.api.types.is_numeric_dtype(previous[watermark]):
+            values = pd.to_numeric(values)
+
+        return source[(values > latest).to_numpy()].reset_index(drop=True)
+
+    @staticmethod
+    def upsert(previous: pd.DataFrame, new: pd.DataFrame, key: Optional[Union[str, list[str]]]) -> pd.DataFrame:
+        if new.shape[0] == 0:
+            return previous.copy()
+        if previous.shape[0] == 0:
+            return new.copy()
+
+        if key is not None:
+            key = [key] if isinstance(key, str) else key
+            replaced = pd.MultiIndex.from_frame(previous[key]).isin(pd.MultiIndex.from_frame(new[key]))
+            previous = previous[~replaced]
+
+        return pd.concat([previous, new], ignore_index=True)
+
+    def to_arrow(self) -> pyarrow.Table:
+        """
+        Get the data as an Arrow table. Arrow-backed columns are not copied.
+
+        Returns
+        -------
+        pyarrow.Table
+        """
+        return arrow.to_arrow(self.data, metadata=to_metadata(self.statistics))
+
+    def to_parquet(self, path: str, partition_cols: Optional[list[str]] = None) -> None:
+        """
+        Write the data as a Parquet file, or as a partitioned Parquet dataset if partition_cols is specified.
+
+        Columns with category are dictionary-encoded, and the column statistics are stored in the metadata.
+
+        Parameters
+        ----------
+        path: str
+            File path, or root directory of the dataset.
+        partition_cols: Optional[list[str]]
+        """
+        arrow.write_parquet(
+            self.data, path, list(self.category_columns().keys()), partition_cols, to_metadata(self.statistics)
+        )
+
+    def to_ipc(self, path: str) -> None:
+        """
+        Write the data as an uncompressed Arrow IPC (Feather V2) file, which read_ipc reads without copying.
+
+        Columns with category are dictionary-encoded, and the column statistics are stored in the metadata.
+
+        Parameters
+        ----------
+        path: str
+        """
+        arrow.write_ipc(self.data, path, list(self.category_columns().keys()), to_metadata(self.statistics))
+
+    @classmethod
+    def from_data(cls, data: pd.DataFrame, reference: Optional[list[BaseFlow]] = None) -> BaseFlow:
+        """
+        Create a flow from its result without executing it, e.g. to use a stored result as reference data.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            The result of this flow.
+        reference: Optional[list[BaseFlow]]
+
+        Returns
+        -------
+        BaseFlow
+        """
+        flow = cls.__new__(cls)
+        flow._setup(data, reference, None)
+        cls.set_class_name_to_columns()
+        return flow
+
+    @classmethod
+    def read_ipc(cls, path: str, columns: Optional[list[str]] = None) -> BaseFlow:
+        """
+        Read a result written by to_ipc by memory-mapping it, without copying it into memory.
+        The column statistics stored with it are restored, e.g. to plan the joins of the flows referring to it.
+
+        Parameters
+        ----------
+        path: str
+        columns: Optional[list[str]]
+            Columns to be read. Reference flows need only the columns referred to and the keys.
+
+        Returns
+        -------
+        BaseFlow
+        """
+        flow = cls.from_data(arrow.read_ipc(path, columns))
+        flow.statistics = from_metadata(arrow.read_ipc_metadata(path), columns)
+        return flow
+
+    @classmethod
+    def from_parquet(
+        cls,
+        path: str,
+        reference: Optional[list[BaseFlow]] = None,
+        validation_policy: Optional[ValidationPolicy] = None,
+    ) -> BaseFlow:
+        """
+        Run the flow on a Parquet file or a dataset partitioned by directories such as `year=2024`.
+
+        __filters__ are pushed down into the reader, so partitions and row groups which can't satisfy them
+        are not read.
+
+        Parameters
+        ----------
+        path: str
+        reference: Optional[list[BaseFlow]]
+        validation_policy: Optional[ValidationPolicy]
+
+        Returns
+        -------
+        BaseFlow
+        """
+        return cls(arrow.parquet_dataset(path), reference=reference, validation_policy=validation_policy)
+
+    @classmethod
+    def read_parquet(cls, path: str, columns: Optional[list[str]] = None) -> BaseFlow:
+        """
+        Read a result written by to_parquet. Parquet is compressed and encoded, so the columns are decoded into memory,
+        unlike read_ipc which maps the file without copying it.
+        The column statistics stored with it are restored, e.g. to plan the joins of the flows referring to it.
+
+        Parameters
+        ----------
+        path: str
+            File path, or root directory of the dataset.
+        columns: Optional[list[str]]
+
+        Returns
+        -------
+        BaseFlow
+        """
+        flow = cls.from_data(arrow.read_parquet(path, columns))
+        flow.statistics = from_metadata(arrow.read_parquet_metadata(path), columns)
+        return flow
 
     def column_info(self, column: str) -> Column:
         return self.definitions()[column]
@@ -312,26 +853,34 @@ class BaseFlow(abc.ABC):
 
     def pre_validate(self) -> None:
         self.validator.validate_necessary_columns(self.data, self.columns(only_base=True))
-        self.validator.validate_nullable(self.data, self.original_is_nullable_columns())
-        self.validator.validate_datetime(self.data, self.original_is_datetime_columns())
-        self.validator.validate_regexp(self.data, self.original_regexp_columns())
-        self.validator.validate_category(self.data, self.original_category_columns())
+        self.validator.validate("nullable", self.data, self.original_is_nullable_columns())
+        self.validator.validate("datetime", self.data, self.original_is_datetime_columns())
+        self.validator.validate("regexp", self.data, self.original_regexp_columns())
+        self.validator.validate("category", self.data, self.original_category_columns())
 
     def post_validate(self, only_base: bool = False) -> None:
+        # The checks record the statistics of the columns they scan.
+        statistics = StatisticsCollector() if self.__collect_statistics__ or self.__optimize_dtypes__ else None
         self.validator.validate_necessary_columns(self.data, self.columns(only_base))
-        self.validator.validate_nullable(self.data, self.is_nullable_columns(only_base))
-        self.validator.validate_datetime(self.data, self.is_datetime_columns(only_base))
-        self.validator.validate_regexp(self.data, self.regexp_columns(only_base))
-        self.validator.validate_category(self.data, self.category_columns(only_base))
+        self.validator.validate("nullable", self.data, self.is_nullable_columns(only_base), statistics)
+        self.validator.validate("datetime", self.data, self.is_datetime_columns(only_base))
+        self.validator.validate("regexp", self.data, self.regexp_columns(only_base), statistics)
+        self.validator.validate("category", self.data, self.category_columns(only_base), statistics)
+        if statistics is not None:
+            # Dtypes of all columns are narrowed with their statistics.
+            self.statistics = statistics.collect(
+                self.data, self.columns(only_base) if self.__optimize_dtypes__ else None
+            )
 
     def cast_value(self, column: str, dtype: Dtype) -> None:
-        # Cast Value level dtype
+        # Cast Value level dtype. Values are assigned by position, as the index may not be a RangeIndex.
         series = self.data[column].copy()
+        position = self.data.columns.get_loc(column)
         for i, val in enumerate(series):
             if pd.isna(val):
                 continue
             try:
-                self.data.loc[i, column] = dtype.cast(val)
+                self.data.iloc[i, position] = dtype.cast(val)
             except Exception:
                 raise ValueCastError(
                     column=column,
@@ -341,29 +890,149 @@ class BaseFlow(abc.ABC):
                     to_=dtype.name,
                 )
 
+    def cast_target(self, dtype: Dtype, has_null: bool) -> str:
+        """
+        Decide the dtype a column is cast to.
+
+        Columns with nulls are cast to a dtype holding them, i.e. NaN-based dtypes,
+        or the nullable extension dtypes if __nullable_dtypes__ is True.
+
+        Parameters
+        ----------
+        dtype: Dtype
+        has_null: bool
+
+        Returns
+        -------
+        str
+        """
+        if self.__nullable_dtypes__:
+            return NULLABLE_DTYPES[dtype.name]
+        if has_null:
+            return NAN_DTYPES[dtype.name]
+        return dtype.name
+
     def cast_series(self, column: str, dtype: Dtype) -> None:
-        # Cast Series Level dtype
+        # Cast Series Level dtype. Only non-null values are cast, and nulls are filled by the target dtype.
+        series = self.data[column]
+        notnull = series.notna().to_numpy()
+        has_null = not notnull.all()
+        target = self.cast_target(dtype, has_null)
+        if plan.is_noop_cast(series.dtype, target, dtype):
+            return
         try:
-            if self.data.query(f"{column}.isna()").shape[0] > 0:
+            if not has_null:
+                cast = series.astype(dtype.name)
+                self.data[column] = cast if target == dtype.name else cast.astype(target)
+                return
+
+            cast = series[notnull].astype(dtype.name).astype(target)
+            cast.index = np.flatnonzero(notnull)
+            self.data[column] = pd.Series(cast.reindex(range(series.shape[0])).array, index=series.index)
+        except Exception:
+            if has_null:
+                # Find the value which can't be cast.
+                self.cast_value(column, dtype)
                 return
-            self.data[column] = self.data[column].astype(dtype.name)
+            raise ColumnCastError(column=column, from_=series.dtype.name, to_=dtype.name)
+
+    def cast_arrow(self, column: str, dtype: Dtype) -> None:
+        # Cast Arrow-backed Series to the Arrow type, which holds nulls.
+        series = self.data[column]
+        try:
+            if dtype == DateTime:
+                series = pd.to_datetime(series)
+            self.data[column] = series.astype(arrow.arrow_dtype(dtype))
         except Exception:
             raise ColumnCastError(column=column, from_=self.data[column].dtype.name, to_=dtype.name)
 
+    def cast(self, column: str, dtype: Dtype) -> None:
+        if arrow.is_arrow_series(self.data[column]):
+            self.cast_arrow(column, dtype)
+            return
+        self.cast_series(column, dtype)
+
+    def cast_columns(self, dtypes: dict[str, Dtype]) -> None:
+        cast = {}
+        if self.engine is not None:
+            # Arrow-backed columns keep Arrow dtypes with cast_arrow.
+            cast = self.engine.cast(
+                self.data,
+                dict(
+                    (column, dtype) for column, dtype in dtypes.items() if not arrow.is_arrow_series(self.data[column])
+                ),
+            )
+
+        for column, dtype in dtypes.items():
+            if column in cast:
+                self.data[column] = cast[column]
+            else:
+                self.cast(column, dtype)
+
     def pre_cast(self) -> None:
-        for column, dtype in self.original_dtype_dict().items():
-            self.cast_series(column, dtype)
-            self.cast_value(column, dtype)
+        self.cast_columns(self.original_dtype_dict())
 
     def post_cast(self, only_base: bool = False) -> None:
-        for column, dtype in self.dtype_dict().items():
-            if only_base and (column in self.additional_columns()):
+        self.cast_columns(
+            dict(
+                (column, dtype)
+                for column, dtype in self.dtype_dict().items()
+                if not (only_base and (column in self.additional_columns()))
+            )
+        )
+        if self.__optimize_dtypes__:
+            self.optimize_dtypes()
+
+    def optimize_dtypes(self) -> None:
+        """
+        Narrow the dtypes with the statistics recorded by the validation pass, without scanning the data again.
+
+        Integer columns get the narrowest integer dtype holding their minimum and maximum,
+        and string columns with few distinct values are encoded as pd.Categorical.
+        Columns with category are left to to_categorical.
+        """
+        category_columns = self.category_columns()
+        for column, _statistics in self.statistics.items():
+            if column in category_columns or arrow.is_arrow_series(self.data[column]):
                 continue
-            self.cast_series(column, dtype)
-            self.cast_value(column, dtype)
+            dtype = narrowed_dtype(self.data[column].dtype, _statistics)
+            if dtype is not None:
+                self.data[column] = self.data[column].astype(dtype)
+
+    def to_categorical(self) -> None:
+        """
+        Convert columns with category to pd.Categorical, reusing the hash tables of the category validation.
+        Columns containing values out of the category are kept as they are.
+        """
+        for column, condition in self.category_columns().items():
+            series = self.data[column]
+            if isinstance(series.dtype, pd.CategoricalDtype) or arrow.is_arrow_series(series):
+                continue
+            codes = category_codes(series, condition["category"])
+            if ((codes < 0) & series.notna().to_numpy()).any():
+                continue
+            dtype = pd.CategoricalDtype(category_index(tuple(condition["category"])))
+            self.data[column] = pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=series.index)
 
     def replace_none_to_nan(self) -> None:
-        self.data = self.data.infer_objects(copy=False).replace({None: np.nan})
+        # Only object columns can hold None. Numeric, datetime and extension columns are left as they are,
+        # and nothing is done if the casts left no object columns.
+        for i, dtype in enumerate(self.data.dtypes):
+            if dtype != object:
+                continue
+            series = self.data.iloc[:, i]
+            inferred = series.infer_objects()
+            if inferred.dtype == object:
+                values = inferred.to_numpy()
+                nulls = np.flatnonzero(pd.isna(values))
+                nones = [position for position in nulls if values[position] is None]
+                if nones:
+                    values = values.copy()
+                    values[nones] = np.nan
+                    inferred = pd.Series(values, index=series.index, name=series.name).infer_objects()
+                elif inferred is series:
+                    continue
+            self.data.isetitem(i, inferred)
 
     @classmethod
     def get_num_of_args(cls, func_name: str) -> int:
@@ -384,17 +1053,189 @@ class BaseFlow(abc.ABC):
 
         return decorators
 
+    def call_decorator(self, attr: str) -> Any:
+        depends_on = getattr(vars(type(self))[attr], CACHE_KEY, None)
+        if depends_on is not None:
+            return self.call_cached_decorator(attr, list(depends_on))
+        return self.compute_decorator(attr)
+
+    def call_cached_decorator(self, attr: str, depends_on: list[str]) -> pd.Series:
+        """
+        Call a decorator with cache=True, reusing the result stored by an earlier run with the same depends_on columns.
+
+        Parameters
+        ----------
+        attr: str
+        depends_on: list[str]
+
+        Returns
+        -------
+        pd.Series
+        """
+        if set(depends_on) & self.pending_columns.keys():
+            self.flush_columns()
+        _, _column, _ = getattr(vars(type(self))[attr], DECORATOR_KEY)
+        try:
+            key = self.cache_key(attr, depends_on)
+        except (KeyError, TypeError):
+            # Results of missing columns, or of values which can't be hashed, are not cached.
+            return self.compute_decorator(attr)
+
+        result = self.result_cache.get(key)
+        if result is not None:
+            return result
+
+        result = self.align_column(_column, self.compute_decorator(attr))
+        try:
+            self.result_cache.put(key, result)
+        except OSError:
+            # The cache is only an optimization.
+            pass
+        return result
+
+    def cache_key(self, attr: str, depends_on: list[str]) -> str:
+        cls = type(self)
+        return "_".join(
+            [
+                f"{cls.__name__}.{attr}",
+                function_key(vars(cls)[attr].__func__)[:16],
+                data_key(self.data, depends_on),
+            ]
+        )
+
+    def compute_decorator(self, attr: str) -> Any:
+        if self.get_num_of_args(attr) == 1:
+            result = getattr(self, attr)()
+        else:
+            # Columns added to the data by the decorator are not seen by the others.
+            result = getattr(self, attr)(self.decorator_data().copy(deep=False))
+
+        if isinstance(result, Expr):
+            if result.columns() & self.pending_columns.keys():
+                self.flush_columns()
+            # Subexpressions shared by the decorators are evaluated once.
+            result = result.evaluate(self.data, self.expression_cache)
+        return result
+
+    def write_column(self, column: str, value: Any) -> None:
+        """
+        Hold the result of a creator or modifier until flush_columns writes the results at once.
+
+        The value is aligned to the data like `self.data[column] = value`.
+
+        Parameters
+        ----------
+        column: str
+        value: Any
+        """
+        self.pending_columns[column] = self.align_column(column, value)
+
+    def align_column(self, column: str, value: Any) -> pd.Series:
+        aligned = pd.DataFrame(index=self.data.index)
+        aligned[column] = value
+        return aligned[column]
+
+    def column_values(self, column: str) -> pd.Series:
+        if column in self.pending_columns:
+            return self.pending_columns[column]
+        return self.data[column]
+
+    def decorator_data(self) -> pd.DataFrame:
+        """
+        Get the data with the held columns, passed to the decorators taking the data.
+
+        The data is copied once per phase and shared by the decorators of the phase, and the columns written after it
+        are added to it when the next decorator is called, so the data isn't written or copied for each decorator.
+        Decorators must not modify the values of the data in place.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        if self.data_view is None:
+            self.data_view = (self.data.copy(), {}, 0)
+        view, columns, inserted = self.data_view
+        added = dict(
+            (column, series) for column, series in self.pending_columns.items() if columns.get(column) is not series
+        )
+        if not added:
+            return view
+
+        columns.update(added)
+        with warnings.catch_warnings():
+            # Inserting the columns fragments the view, while concatenating them would copy the whole view
+            # for each decorator. The view is copied into fewer blocks once in a while instead.
+            warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+            for column, series in added.items():
+                view[column] = series.copy()
+        inserted += len(added)
+        if inserted >= MAX_VIEW_INSERTS:
+            view, inserted = view.copy(), 0
+        self.data_view = (view, columns, inserted)
+        return view
+
+    def flush_columns(self) -> None:
+        """
+        Write the held columns to the data in one concat.
+
+        Inserting columns one by one fragments the data into a block per column, which slows down every later copy.
+        """
+        if not self.pending_columns:
+            return
+
+        columns, self.pending_columns = self.pending_columns, {}
+        if self.data.columns.has_duplicates:
+            for column, series in columns.items():
+                self.data[column] = series
+            return
+
+        new_columns = [column for column in columns if column not in self.data.columns]
+        self.data = pd.concat(
+            [columns.get(column, self.data[column]) for column in self.data.columns]
+            + [columns[column] for column in new_columns],
+            axis=1,
+            copy=False,
+        )
+
+    def consolidate(self) -> None:
+        # Copying merges the columns of the same dtype into one block.
+        # Columns spilled under __memory_budget__ are not copied back to memory.
+        if self.memory_budget() is None:
+            self.data = self.data.copy()
+
+    @classmethod
+    def expression_dependencies(cls) -> dict[str, set[str]]:
+        """
+        Get the columns each creator or modifier written as an Expr depends on.
+
+        Only the decorated methods without the data argument are analyzed.
+
+        Returns
+        -------
+        dict[str, set[str]]
+            Key is a column created or modified by the decorator.
+        """
+        dependencies = {}
+        for attr, (decorator_key, _column, _) in cls.get_decorators().items():
+            if decorator_key not in [CREATOR_KEY, MODIFIER_KEY] or cls.get_num_of_args(attr) != 1:
+                continue
+            result = getattr(cls, attr)()
+            if isinstance(result, Expr):
+                dependencies[_column] = result.columns()
+        return dependencies
+
     def apply_column_modifier(self, order: int) -> None:
         modifier_columns = self.modifier_columns(order=order)
         for column, modifier in modifier_columns.items():
-            self.data[column] = self.data[column].apply(modifier)
+            self.write_column(column, self.column_values(column).apply(modifier))
 
     def apply_reference_column_modifier(self, order: int) -> None:
         modifier_reference_columns = self.modifier_reference_columns(order=order)
         for column, modifier in modifier_reference_columns.items():
-            self.data[column] = self.data[column].apply(modifier)
+            self.write_column(column, self.column_values(column).apply(modifier))
 
     def apply_creator_with_decorator(self, order: int) -> None:
+        self.data_view = None
         decorators = self.get_decorators(CREATOR_KEY)
         for attr, (_, _column, _order) in decorators.items():
             if order != _order:
@@ -404,12 +1245,12 @@ class BaseFlow(abc.ABC):
                     column=_column,
                     detail=f"Creator cannot specify reference-columns.(column: {_column})",
                 )
-            if self.get_num_of_args(attr) == 1:
-                self.data[_column] = getattr(self, attr)()
-            else:
-                self.data[_column] = getattr(self, attr)(self.data.copy())
+            self.write_column(_column, self.call_decorator(attr))
+            self.expression_cache.invalidate(_column)
 
     def apply_column_modifier_with_decorator(self, order: int) -> None:
+        self.expression_cache = ExpressionCache()
+        self.data_view = None
         decorators = self.get_decorators(MODIFIER_KEY)
         for attr, (_, _column, _order) in decorators.items():
             if _column in self.reference_columns():
@@ -421,35 +1262,114 @@ class BaseFlow(abc.ABC):
                     column=_column,
                     detail=f"You have specified a column name that does not exist.(column: {_column})",
                 )
-            if self.get_num_of_args(attr) == 1:
-                self.data[_column] = getattr(self, attr)()
-            else:
-                self.data[_column] = getattr(self, attr)(self.data.copy())
+            self.write_column(_column, self.call_decorator(attr))
+            self.expression_cache.invalidate(_column)
 
     def apply_reference_column_modifier_with_decorator(self, order: int) -> None:
+        self.expression_cache = ExpressionCache()
+        self.data_view = None
         decorators = self.get_decorators(MODIFIER_KEY)
         for attr, (_, _column, _order) in decorators.items():
             if _column not in self.reference_columns():
                 continue
             if order != _order:
                 continue
-            if self.get_num_of_args(attr) == 1:
-                self.data[_column] = getattr(self, attr)()
-            else:
-                self.data[_column] = getattr(self, attr)(self.data.copy())
+            self.write_column(_column, self.call_decorator(attr))
+            self.expression_cache.invalidate(_column)
 
     def apply_filter_with_decorator(self, order: int) -> None:
+        """
+        Filter the data with the filters of the order.
+
+        Filters returning a boolean mask or pd.Index are combined with AND, and the rows are taken once.
+        Filters written as an Expr are evaluated on the whole data, since expressions are row-wise.
+        Filters taking the data receive the rows kept by the previous filters.
+        """
+        self.flush_columns()
         decorators = self.get_decorators(FILTER_KEY)
+        # Rows of self.data kept by the filters so far.
+        keep: Optional[np.ndarray] = None
         for attr, (_, _, _order) in decorators.items():
             if order != _order:
                 continue
-            result = getattr(self, attr)(self.data.copy())
-            if not isinstance(result, pd.DataFrame):
-                raise DecoratorReturnTypeError(
-                    dtype=type(result),
-                    detail=f"Expected return type is pd.DataFrame, But you return f{type(result)}",
-                )
-            self.data = result
+            if self.get_num_of_args(attr) == 1:
+                data = self.data
+                result = getattr(self, attr)()
+                if isinstance(result, Expr):
+                    result = result.evaluate(self.data, self.expression_cache)
+            else:
+                data = self.data.copy() if keep is None else self.data[keep]
+                result = getattr(self, attr)(data)
+
+            if isinstance(result, pd.DataFrame):
+                self.data = result
+                self.expression_cache = ExpressionCache()
+                keep = None
+                continue
+
+            mask = self.filter_mask(attr, result, data)
+            if keep is None:
+                keep = mask
+            elif data is self.data:
+                keep = keep & mask
+            else:
+                keep = keep.copy()
+                keep[keep] = mask
+
+        if keep is not None and not keep.all():
+            self.data = self.data.take(np.flatnonzero(keep))
+            self.expression_cache = ExpressionCache()
+
+    def apply_declared_filters(self) -> None:
+        # __filters__ pushed down into the reader are not applied again.
+        predicates = self.pushdown_filters()[1] if self.pushed_down else self.__filters__
+        if not predicates:
+            return
+
+        cache = ExpressionCache()
+        keep = np.ones(self.data.shape[0], dtype=bool)
+        for predicate in predicates:
+            keep &= self.filter_mask("__filters__", predicate.evaluate(self.data, cache), self.data)
+        if not keep.all():
+            # Rows are numbered from 0 as if they were read with the filters pushed down.
+            self.data = with_range_index(self.data.take(np.flatnonzero(keep)))
+
+    @staticmethod
+    def filter_mask(attr: str, result: Any, data: pd.DataFrame) -> np.ndarray:
+        """
+        Convert the result of a filter to a boolean mask of the rows of the data.
+
+        Parameters
+        ----------
+        attr: str
+            Name of the filter.
+        result: Any
+            A boolean pd.Series or np.ndarray, or pd.Index of the rows to keep.
+        data: pd.DataFrame
+            The data the filter received.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        if isinstance(result, pd.Index):
+            return data.index.isin(result)
+
+        if isinstance(result, (pd.Series, np.ndarray)) and pd.api.types.is_bool_dtype(result.dtype):
+            if isinstance(result, pd.Series):
+                if not result.index.equals(data.index):
+                    result = result.reindex(data.index)
+                result = result.fillna(False).to_numpy(dtype=bool)
+            if len(result) == len(data):
+                return result
+
+        raise DecoratorReturnTypeError(
+            dtype=type(result),
+            detail=(
+                "Expected return type is pd.DataFrame, a boolean mask of the rows or pd.Index, "
+                f"But you return {type(result)} (filter: {attr})"
+            ),
+        )
 
     def sort_columns(self) -> None:
         self.data = self.data[self.columns()]
@@ -463,49 +1383,135 @@ class BaseFlow(abc.ABC):
 
     @classmethod
     def args(cls, column: Union[Column, ReferenceColumn]) -> tuple[str, ...]:
-        args = []
-        for key, val in vars(cls).items():
-            if val == column:
-                args.append(key)
-        return tuple(sorted(args))
+        return column.names(cls)
 
     @classmethod
     def get_reference_info(cls) -> list[tuple]:
-        names = []
+        # References to the same data with the same keys are merged at once.
+        columns: dict[tuple, list[str]] = {}
         for key, val in vars(cls).items():
             if not isinstance(val, ReferenceColumn):
                 continue
             if not hasattr(val.column, PYPREP_PARENT_CLASS_NAME):
                 raise ReferenceDataNotInitializationError(key)
-            names.append(
-                (
-                    getattr(val.column, PYPREP_PARENT_CLASS_NAME),  # class
-                    cls.args(val),  # column_name
-                    val.how,
-                    tuple(sorted(val.on)) if isinstance(val.on, list) else (val.on,),
-                    val.order,
-                )
+            reference = (
+                getattr(val.column, PYPREP_PARENT_CLASS_NAME),  # class
+                val.how,
+                tuple(sorted(val.on)) if isinstance(val.on, list) else (val.on,),
+                val.order,
             )
+            columns.setdefault(reference, []).extend(cls.args(val))
+
+        return sorted(
+            (_class_name, tuple(sorted(set(_columns))), _how, _on, _order)
+            for (_class_name, _how, _on, _order), _columns in columns.items()
+        )
 
-        return list(set(names))
+    def find_reference(self, class_name: str) -> Optional[BaseFlow]:
+        for data in self.reference:
+            if data.__class__.__name__ == class_name:
+                return data
+        return None
 
     def confirm_reference_exists(self) -> None:
         for _class_name, _, _, _, _ in self.get_reference_info():
-            if _class_name in [data.__class__.__name__ for data in self.reference]:
+            if self.find_reference(_class_name) is not None:
                 continue
             raise ReferenceDataNotFoundError(name=_class_name)
 
+    def project(self, columns: list[str]) -> pd.DataFrame:
+        """
+        Get the columns of the data without copying them.
+
+        Projections are cached, so flows referring to the same columns share one projection.
+        The projection must be treated as read-only.
+
+        Parameters
+        ----------
+        columns: list[str]
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        key = tuple(columns)
+        # Projections are valid while the data is the same object. Unlike ids, weak references are not reused.
+        if key in self.projections and self.projections[key][0]() is self.data:
+            return self.projections[key][1]
+
+        self.projections = dict((_key, value) for _key, value in self.projections.items() if value[0]() is self.data)
+        projection = pd.concat([self.data[column] for column in dict.fromkeys(columns)], axis=1, copy=False)
+        self.projections[key] = (weakref.ref(self.data), projection)
+        return projection
+
+    def key_statistics(self, keys: list[str]) -> dict[str, ColumnStatistics]:
+        """
+        Get the statistics of the keys flows referring to this flow join on.
+
+        Statistics of the keys which are missing, e.g. keys which no check scans, or were collected before the keys
+        were cast, are collected from the data once, even if __collect_statistics__ is False.
+
+        Parameters
+        ----------
+        keys: list[str]
+
+        Returns
+        -------
+        dict[str, ColumnStatistics]
+        """
+        for key in keys:
+            if key not in self.data.columns:
+                continue
+            if key not in self.statistics or self.statistics[key].dtype != str(self.data[key].dtype):
+                self.statistics[key] = column_statistics(self.data[key])
+        return self.statistics
+
+    @classmethod
+    def memory_budget(cls) -> Optional[int]:
+        return None if cls.__memory_budget__ is None else parse_size(cls.__memory_budget__)
+
+    def join_keys(self) -> list[str]:
+        return list(dict.fromkeys([key for _, _, _, _on, _ in self.get_reference_info() for key in _on]))
+
+    def enforce_memory_budget(self) -> None:
+        """
+        Spill cold numeric columns of the data and the intermediate data to memory-mapped files,
+        if they exceed __memory_budget__. Keys of the joins are kept in memory.
+        """
+        budget = self.memory_budget()
+        if budget is None:
+            return
+
+        self.data = self.spill_store.spill_columns(self.data, budget, hot_columns=self.join_keys())
+        if self.pre_data is not None:
+            self.pre_data = self.spill_store.spill_columns(self.pre_data, 0)
+
     def merge(self, order: int) -> None:
+        budget = self.memory_budget()
         for _class_name, _columns, _how, _on, _order in self.get_reference_info():
             if order != _order:
                 continue
-            reference_data = [data for data in self.reference if data.__class__.__name__ == _class_name][0]
-            self.data = pd.merge(
-                self.data,
-                reference_data.data[list(_columns) + list(_on)],
-                how=_how,
-                on=_on,
-            )
+            reference_data = self.find_reference(_class_name)
+            right = reference_data.project(list(_columns) + list(_on))
+            # pd.merge calls a full outer join "outer".
+            how = "outer" if _how == "full" else _how
+            if self.engine is not None:
+                try:
+                    self.data = self.engine.merge(self.data, right, how=how, on=list(_on))
+                    continue
+                except NotImplementedError:
+                    pass
+
+            if budget is None:
+                self.data = in_memory_merge(
+                    self.data, right, how=how, on=list(_on), statistics=reference_data.key_statistics(list(_on))
+                )
+                continue
+
+            # Join in partitions by hash of the keys, so that each partial join fits in the budget.
+            n = num_of_partitions(self.data, right, budget)
+            self.data = partitioned_merge(self.data, right, how=how, on=list(_on), n=n)
+            self.enforce_memory_budget()
 
     def decorator_orders(self) -> list[int]:
         return list(set([val[2] for key, val in self.get_decorators().items()]))
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import types
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from prep_flow.memory import remove_quietly
+
+CACHE_SUFFIX = ".pkl"
+
+
+def default_directory() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "prep_flow")
+
+
+def update_with_code(digest: Any, code: types.CodeType) -> None:
+    # Nested functions are hashed by their bytecode, since their repr contains the address.
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            update_with_code(digest, const)
+        else:
+            digest.update(repr(const).encode())
+
+
+def function_key(function: Callable) -> str:
+    """
+    Hash the bytecode of a function, so that the cached results are not reused after the function is changed.
+
+    Parameters
+    ----------
+    function: Callable
+
+    Returns
+    -------
+    str
+    """
+    digest = hashlib.sha256()
+    update_with_code(digest, function.__code__)
+    return digest.hexdigest()
+
+
+def data_key(data: pd.DataFrame, columns: list[str]) -> str:
+    """
+    Hash the values, dtypes and index of the columns.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+    columns: list[str]
+
+    Returns
+    -------
+    str
+
+    Raises
+    ------
+    TypeError
+        If the values can't be hashed, e.g. lists.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data.index).to_numpy().tobytes())
+    for column in columns:
+        digest.update(f"{column}:{data[column].dtype}".encode())
+        digest.update(pd.util.hash_pandas_object(data[column], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Results of creators and modifiers stored on disk, reused across runs while their inputs are the same.
+
+    The least recently used results are evicted when the files exceed max_size bytes.
+    """
+
+    def __init__(self, directory: Optional[str], max_size: int) -> None:
+        self.directory = default_directory() if directory is None else directory
+        self.max_size = max_size
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key: str) -> Optional[pd.Series]:
+        path = self.path(key)
+        try:
+            result = pd.read_pickle(path)
+        except Exception:
+            # Missing, or being written by another process.
+            return None
+        try:
+            # Mark the result as recently used.
+            os.utime(path)
+        except OSError:
+            # Evicted by another process after it was read.
+            pass
+        return result
+
+    def put(self, key: str, result: pd.Series) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix="prep_flow_", suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            result.to_pickle(path)
+            os.replace(path, self.path(key))
+        except Exception:
+            remove_quietly(path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used results until the files fit in max_size.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(_size for _, _size, _ in entries)
+        for _, _size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            remove_quietly(path)
+            size -= _size
+
+    def clear(self) -> None:
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_SUFFIX):
+                remove_quietly(entry.path)
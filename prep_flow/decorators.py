@@ -1,14 +1,25 @@
-from typing import Callable
+from typing import Callable, Optional
 
 DECORATOR_KEY = "__decorator__"
 CREATOR_KEY = "__creator__"
 MODIFIER_KEY = "__modifier__"
 FILTER_KEY = "__filter__"
+ROW_LOCAL_KEY = "__row_local__"
+CACHE_KEY = "__cache__"
 
 
-def creator(column: str, use_reference: bool = False, order: int = 0) -> Callable:
+def creator(
+    column: str,
+    use_reference: bool = False,
+    order: int = 0,
+    row_local: bool = False,
+    cache: bool = False,
+    depends_on: Optional[list[str]] = None,
+) -> Callable:
     if column is None:
         raise Exception("creator with no column specified.")
+    if cache and not depends_on:
+        raise Exception("creator with cache=True and no depends_on specified.")
 
     if use_reference:
         order = 1
@@ -16,18 +27,32 @@ def creator(column: str, use_reference: bool = False, order: int = 0) -> Callabl
     def dec(f: Callable) -> classmethod:
         f_cls = classmethod(f)
         setattr(f_cls, DECORATOR_KEY, (CREATOR_KEY, column, order))
+        setattr(f_cls, ROW_LOCAL_KEY, row_local)
+        # Results are cached by the hash of the depends_on columns.
+        setattr(f_cls, CACHE_KEY, tuple(depends_on) if cache else None)
         return f_cls
 
     return dec
 
 
-def modifier(column: str, order: int = 0) -> Callable:
+def modifier(
+    column: str,
+    order: int = 0,
+    row_local: bool = False,
+    cache: bool = False,
+    depends_on: Optional[list[str]] = None,
+) -> Callable:
     if column is None:
         raise Exception("modifier with no column specified.")
+    if cache and not depends_on:
+        raise Exception("modifier with cache=True and no depends_on specified.")
 
     def dec(f: Callable) -> classmethod:
         f_cls = f if isinstance(f, classmethod) else classmethod(f)
         setattr(f_cls, DECORATOR_KEY, (MODIFIER_KEY, column, order))
+        setattr(f_cls, ROW_LOCAL_KEY, row_local)
+        # Results are cached by the hash of the depends_on columns.
+        setattr(f_cls, CACHE_KEY, tuple(depends_on) if cache else None)
         return f_cls
 
     return dec
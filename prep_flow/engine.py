@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import itertools
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from prep_flow.errors import (
+    ColumnCastError,
+    InvalidCategoryFoundError,
+    InvalidRegexpFoundError,
+    NullValueFoundError,
+)
+from prep_flow.expressions import Boolean, DateTime, Dtype, Float, Integer, String
+from prep_flow.functions import Col, Expr, sql_literal
+from prep_flow.join import gather_merge
+from prep_flow.memory import POSITION_COLUMN
+from prep_flow.statistics import StatisticsCollector
+from prep_flow.validator import CategoryCondition, RegexpCondition, Validator
+
+if TYPE_CHECKING:
+    from prep_flow.policy import ValidationPolicy
+
+INTEGER_TYPES = ["TINYINT", "SMALLINT", "INTEGER", "BIGINT", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "HUGEINT"]
+NUMERIC_TYPES = INTEGER_TYPES + ["FLOAT", "DOUBLE"]
+INTEGER_LITERAL = r"\s*[+-]?\d+\s*"
+
+
+def import_duckdb() -> Any:
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("duckdb is required to use the duckdb engine. Install it with `pip install duckdb`.")
+
+    return duckdb
+
+
+def identifier(name: str) -> str:
+    return Col(name).to_sql()
+
+
+class DuckDBEngine:
+    """
+    Run validation, casts and reference joins of a flow on an in-process DuckDB connection.
+
+    Data is registered with the connection without copying it. Joins return the positions of the joined rows,
+    and the rows are gathered by pandas, so the result has the same columns, dtypes and row order as pd.merge.
+    """
+
+    def __init__(self, memory_limit: Optional[int] = None) -> None:
+        duckdb = import_duckdb()
+        config = {} if memory_limit is None else {"memory_limit": f"{memory_limit}B"}
+        self.memory_limit = memory_limit
+        self.connection = duckdb.connect(config=config)
+        self.names = itertools.count()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Connections can't be pickled, so a flow sent to another process opens a new one.
+        return {"memory_limit": self.memory_limit}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def query(self, sql: Callable[..., str], **frames: pd.DataFrame) -> Any:
+        """
+        Run a query on the frames. sql receives the names the frames are registered by, as keyword arguments.
+
+        Raises
+        ------
+        NotImplementedError
+            If DuckDB can't read the frames or run the query, e.g. columns mixing types.
+        """
+        duckdb = import_duckdb()
+        names = dict((key, f"__pyprep_{key}_{next(self.names)}__") for key in frames)
+        try:
+            for key, frame in frames.items():
+                self.connection.register(names[key], frame)
+            return self.connection.sql(sql(**names)).fetchnumpy()
+        except duckdb.Error as e:
+            raise NotImplementedError(str(e))
+        finally:
+            for name in names.values():
+                self.connection.unregister(name)
+
+    def types(self, data: pd.DataFrame) -> dict[str, str]:
+        duckdb = import_duckdb()
+        name = f"__pyprep_types_{next(self.names)}__"
+        try:
+            self.connection.register(name, data.head(0) if data.shape[0] == 0 else data)
+            relation = self.connection.table(name)
+            return dict(zip(relation.columns, [str(t) for t in relation.types]))
+        except duckdb.Error as e:
+            raise NotImplementedError(str(e))
+        finally:
+            self.connection.unregister(name)
+
+    @staticmethod
+    def with_position(data: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+        position = pd.Series(np.arange(data.shape[0]), index=data.index, name=POSITION_COLUMN)
+        return pd.concat([data[column] for column in columns] + [position], axis=1, copy=False)
+
+    def first_invalid(self, data: pd.DataFrame, predicates: dict[str, str]) -> dict[str, Optional[int]]:
+        """
+        Find the first row which satisfies the predicate of each column, in one pass.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+        predicates: dict[str, str]
+            Key is a column name, and value is the SQL predicate of invalid values.
+
+        Returns
+        -------
+        dict[str, Optional[int]]
+            Position of the first invalid value, or None if all values are valid.
+        """
+        if len(predicates) == 0:
+            return {}
+
+        selects = ", ".join(
+            f"min({identifier(POSITION_COLUMN)}) FILTER (WHERE {predicate}) AS {identifier(column)}"
+            for column, predicate in predicates.items()
+        )
+        result = self.query(
+            lambda data: f"SELECT {selects} FROM {data}", data=self.with_position(data, list(predicates))
+        )
+        positions = {}
+        for column in predicates:
+            value = result[column][0]
+            positions[column] = None if np.ma.is_masked(value) or pd.isna(value) else int(value)
+        return positions
+
+    def cast(self, data: pd.DataFrame, dtypes: dict[str, Dtype]) -> dict[str, pd.Series]:
+        """
+        Cast columns with SQL. Only casts which give the same values as pandas are compiled,
+        i.e. columns without nulls from numeric and string types. Others are left to pandas.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+        dtypes: dict[str, Dtype]
+
+        Returns
+        -------
+        dict[str, pd.Series]
+            Cast columns. Key is a column name.
+
+        Raises
+        ------
+        ColumnCastError
+            If values can't be cast.
+        """
+        try:
+            types = self.types(data[list(dtypes)])
+        except NotImplementedError:
+            return {}
+
+        casts, invalid = {}, {}
+        for column, dtype in dtypes.items():
+            expression = self.cast_expression(column, types[column], dtype)
+            if expression is None:
+                continue
+            casts[column] = expression
+            predicate = self.invalid_cast_predicate(column, types[column], dtype)
+            if predicate is not None:
+                invalid[column] = predicate
+        if len(casts) == 0:
+            return {}
+
+        try:
+            nulls = self.first_invalid(data, dict((column, Col(column).isna().to_sql()) for column in casts))
+            casts = dict((column, sql) for column, sql in casts.items() if nulls[column] is None)
+            failed = self.first_invalid(data, dict((column, invalid[column]) for column in casts if column in invalid))
+        except NotImplementedError:
+            return {}
+        for column, position in failed.items():
+            if position is not None:
+                raise ColumnCastError(column=column, from_=data[column].dtype.name, to_=dtypes[column].name)
+        if len(casts) == 0:
+            return {}
+
+        selects = ", ".join(f"{sql} AS {identifier(column)}" for column, sql in casts.items())
+        try:
+            result = self.query(lambda data: f"SELECT {selects} FROM {data}", data=data[list(casts)])
+        except NotImplementedError:
+            # e.g. integers out of range.
+            return {}
+        return dict((column, pd.Series(result[column], index=data.index, name=column)) for column in casts)
+
+    @staticmethod
+    def cast_expression(column: str, source: str, dtype: Dtype) -> Optional[str]:
+        name = identifier(column)
+        if dtype == Float and (source in NUMERIC_TYPES or source == "VARCHAR"):
+            return f"CAST({name} AS DOUBLE)"
+        if dtype == Integer and source in INTEGER_TYPES:
+            return f"CAST({name} AS BIGINT)"
+        if dtype == Integer and source == "VARCHAR":
+            return f"CAST(trim({name}) AS BIGINT)"
+        if dtype == String and (source in INTEGER_TYPES or source == "VARCHAR"):
+            return f"CAST({name} AS VARCHAR)"
+        if dtype == Boolean and source == "BOOLEAN":
+            return name
+        if dtype == DateTime and source == "TIMESTAMP_NS":
+            return name
+        return None
+
+    @staticmethod
+    def invalid_cast_predicate(column: str, source: str, dtype: Dtype) -> Optional[str]:
+        if source != "VARCHAR":
+            return None
+        if dtype == Float:
+            return f"TRY_CAST({identifier(column)} AS DOUBLE) IS NULL"
+        if dtype == Integer:
+            return f"NOT regexp_full_match({identifier(column)}, {sql_literal(INTEGER_LITERAL)})"
+        return None
+
+    def merge(self, left: pd.DataFrame, right: pd.DataFrame, how: str, on: list[str]) -> pd.DataFrame:
+        """
+        Join the data with SQL and gather the joined rows with pandas.
+
+        Rows are returned in the same order as pd.merge, and null keys match each other like pd.merge.
+
+        Parameters
+        ----------
+        left: pd.DataFrame
+        right: pd.DataFrame
+        how: str
+            "left", "right", "inner" or "outer".
+        on: list[str]
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        joins = {"left": "LEFT JOIN", "right": "RIGHT JOIN", "inner": "INNER JOIN", "outer": "FULL OUTER JOIN"}
+        position = identifier(POSITION_COLUMN)
+        condition = " AND ".join(f"l.{identifier(key)} IS NOT DISTINCT FROM r.{identifier(key)}" for key in on)
+        result = self.query(
+            lambda left, right: (
+                f"SELECT coalesce(l.{position}, -1) AS l_position, coalesce(r.{position}, -1) AS r_position "
+                f"FROM {left} AS l {joins[how]} {right} AS r ON {condition}"
+            ),
+            left=self.with_position(left, on),
+            right=self.with_position(right, on),
+        )
+        # The rows are ordered by pandas, as SQL sorts strings and nulls differently.
+        return gather_merge(left, right, how, on, result["l_position"], result["r_position"])
+
+
+class DuckDBValidator(Validator):
+    """
+    Validator compiling null, regular expression and category checks to SQL, checking all columns in one pass.
+
+    Columns which can't be checked by DuckDB, e.g. columns mixing types, are checked by Validator.
+    """
+
+    def __init__(self, engine: DuckDBEngine, policy: Optional[ValidationPolicy] = None) -> None:
+        super().__init__(policy)
+        self.engine = engine
+
+    def validate_nullable(
+        self, data: pd.DataFrame, conditions: dict[str, bool], statistics: Optional[StatisticsCollector] = None
+    ) -> None:
+        predicates = dict((column, Col(column).isna()) for column, nullable in conditions.items() if not nullable)
+        positions = self.first_invalid(data, predicates)
+        for column, nullable in conditions.items():
+            if column not in positions:
+                super().validate_nullable(data, {column: nullable}, statistics)
+            elif positions[column] is not None:
+                position = positions[column]
+                raise NullValueFoundError(column=column, row_number=position + 1, value=data[column].iloc[position])
+            elif statistics is not None:
+                statistics.add(column, null_count=0)
+
+    def validate_regexp(
+        self,
+        data: pd.DataFrame,
+        conditions: dict[str, RegexpCondition],
+        statistics: Optional[StatisticsCollector] = None,
+    ) -> None:
+        types = self.types(data, conditions)
+        predicates = {}
+        for column, condition in conditions.items():
+            # Non-string values are matched as str(value) by Validator.
+            if types.get(column) != "VARCHAR":
+                continue
+            mismatched = ~Col(column).str.contains(f"^(?:{condition['regexp']})")
+            predicates[column] = self.invalid(column, mismatched, condition["nullable"])
+
+        positions = self.first_invalid(data, predicates)
+        for column, condition in conditions.items():
+            if column not in positions:
+                super().validate_regexp(data, {column: condition}, statistics)
+            elif positions[column] is not None:
+                position = positions[column]
+                raise InvalidRegexpFoundError(
+                    column=column,
+                    row_number=position + 1,
+                    value=data[column].iloc[position],
+                    regexp=condition["regexp"],
+                )
+            elif statistics is not None:
+                statistics.add(column)
+
+    def validate_category(
+        self,
+        data: pd.DataFrame,
+        conditions: dict[str, CategoryCondition],
+        statistics: Optional[StatisticsCollector] = None,
+    ) -> None:
+        types = self.types(data, conditions)
+        predicates = {}
+        for column, condition in conditions.items():
+            # SQL compares strings and numbers after casting them, but Validator doesn't.
+            if types.get(column) == "VARCHAR":
+                comparable = all(isinstance(value, str) for value in condition["category"])
+            elif types.get(column) in INTEGER_TYPES:
+                comparable = all(type(value) is int for value in condition["category"])
+            else:
+                comparable = False
+            if not comparable or len(condition["category"]) == 0:
+                continue
+            excluded = ~Col(column).isin(condition["category"])
+            predicates[column] = self.invalid(column, excluded, condition["nullable"])
+
+        positions = self.first_invalid(data, predicates)
+        for column, condition in conditions.items():
+            if column not in positions:
+                super().validate_category(data, {column: condition}, statistics)
+            elif positions[column] is not None:
+                position = positions[column]
+                raise InvalidCategoryFoundError(
+                    column=column,
+                    row_number=position + 1,
+                    value=data[column].iloc[position],
+                    category=condition["category"],
+                )
+            elif statistics is not None:
+                statistics.add(column)
+
+    def types(self, data: pd.DataFrame, conditions: dict[str, Any]) -> dict[str, str]:
+        try:
+            return self.engine.types(data[list(conditions)])
+        except NotImplementedError:
+            return {}
+
+    @staticmethod
+    def invalid(column: str, predicate: Expr, nullable: bool) -> Expr:
+        # Nulls are invalid unless nullable.
+        if nullable:
+            return Col(column).notna() & predicate
+        return Col(column).isna() | predicate
+
+    def first_invalid(self, data: pd.DataFrame, predicates: dict[str, Expr]) -> dict[str, Optional[int]]:
+        """
+        Run the predicates on DuckDB. Columns which are not in the result are left to Validator.
+        """
+        try:
+            return self.engine.first_invalid(data, dict((column, p.to_sql()) for column, p in predicates.items()))
+        except NotImplementedError:
+            # e.g. regular expressions which are not supported by DuckDB (RE2).
+            return {}
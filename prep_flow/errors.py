@@ -1,7 +1,20 @@
 from typing import Any, Optional
 
 
-class SheetNotFoundError(Exception):
+def rebuild_error(error_class: type, state: dict) -> Exception:
+    error = error_class.__new__(error_class)
+    error.__dict__.update(state)
+    return error
+
+
+class PrepFlowError(Exception):
+    # Errors are rebuilt from their attributes when unpickled, e.g. when raised in worker processes,
+    # since their constructors take keyword arguments which Exception doesn't keep.
+    def __reduce__(self) -> tuple:
+        return rebuild_error, (self.__class__, self.__dict__)
+
+
+class SheetNotFoundError(PrepFlowError):
     def __init__(self, sheet: str) -> None:
         self.sheet = sheet
 
@@ -9,7 +22,7 @@ class SheetNotFoundError(Exception):
         return f"There is no {self.sheet} sheet in excel file."
 
 
-class ReferenceDataNotFoundError(Exception):
+class ReferenceDataNotFoundError(PrepFlowError):
     def __init__(self, name: str) -> None:
         self.name = name
 
@@ -17,7 +30,7 @@ class ReferenceDataNotFoundError(Exception):
         return f"The reference data, {self.name}, does not exist."
 
 
-class ReferenceDataNotInitializationError(Exception):
+class ReferenceDataNotInitializationError(PrepFlowError):
     def __init__(self, name: str) -> None:
         self.name = name
 
@@ -25,7 +38,15 @@ class ReferenceDataNotInitializationError(Exception):
         return f"The reference data, {self.name}, is not initialized."
 
 
-class DataColumnsError(Exception):
+class CircularReferenceError(PrepFlowError):
+    def __init__(self, names: list[str]) -> None:
+        self.names = names
+
+    def __str__(self) -> str:
+        return f"The reference data, {self.names}, refer to each other."
+
+
+class DataColumnsError(PrepFlowError):
     def __init__(self, columns: list[str]) -> None:
         self.columns = columns
 
@@ -37,7 +58,7 @@ class NecessaryColumnsNotFoundError(DataColumnsError):
         return f"Necessary columns, {self.columns}, does not exist."
 
 
-class DataColumnError(Exception):
+class DataColumnError(PrepFlowError):
     def __init__(self, column: str) -> None:
         self.column = column
 
@@ -52,18 +73,25 @@ class ColumnCastError(DataColumnError):
         return f"Does not cast from {self.from_} to {self.to_}. (column: {self.column})"
 
 
-class DataValueError(Exception):
+class DataValueError(PrepFlowError):
     def __init__(self, column: str, row_number: int, value: Any) -> None:
         self.column = column
         self.row_number = row_number
         self.value = value
+        self.sampling: Optional[str] = None
+
+    @property
+    def sampling_note(self) -> str:
+        if self.sampling is None:
+            return ""
+        return f" [found by sampling validation: {self.sampling}]"
 
 
 class NullValueFoundError(DataValueError):
     pass
 
     def __str__(self) -> str:
-        return f"NULL is contained in columns where NULL is not allowed. (column: {self.column}, value: {self.value}, row: {self.row_number})"  # noqa
+        return f"NULL is contained in columns where NULL is not allowed. (column: {self.column}, value: {self.value}, row: {self.row_number}){self.sampling_note}"  # noqa
 
 
 class InvalidDateFoundError(DataValueError):
@@ -72,6 +100,7 @@ class InvalidDateFoundError(DataValueError):
     def __str__(self) -> str:
         return (
             f"A non-existent date is specified. (column: {self.column}, value: {self.value}, row: {self.row_number})"
+            f"{self.sampling_note}"
         )
 
 
@@ -79,7 +108,7 @@ class InvalidDateLiteralFoundError(DataValueError):
     pass
 
     def __str__(self) -> str:
-        return f"Contains a string that cannot be recognized as a date. (column: {self.column}, value: {self.value}, row: {self.row_number})"  # noqa
+        return f"Contains a string that cannot be recognized as a date. (column: {self.column}, value: {self.value}, row: {self.row_number}){self.sampling_note}"  # noqa
 
 
 class InvalidRegexpFoundError(DataValueError):
@@ -88,7 +117,7 @@ class InvalidRegexpFoundError(DataValueError):
         self.regexp = regexp
 
     def __str__(self) -> str:
-        return f"Contains a string that does not match the regular expression. (column: {self.column}, value: {self.value}, row: {self.row_number}, regexp: {self.regexp})"  # noqa
+        return f"Contains a string that does not match the regular expression. (column: {self.column}, value: {self.value}, row: {self.row_number}, regexp: {self.regexp}){self.sampling_note}"  # noqa
 
 
 class InvalidCategoryFoundError(DataValueError):
@@ -97,7 +126,7 @@ class InvalidCategoryFoundError(DataValueError):
         self.category = category
 
     def __str__(self) -> str:
-        return f"Contains a string that is not included in the specified category.　(column: {self.column}, value: {self.value}, row: {self.row_number}, category: {self.category}"  # noqa
+        return f"Contains a string that is not included in the specified category.　(column: {self.column}, value: {self.value}, row: {self.row_number}, category: {self.category}{self.sampling_note}"  # noqa
 
 
 class ValueCastError(DataValueError):
@@ -107,10 +136,10 @@ class ValueCastError(DataValueError):
         self.to_ = to_
 
     def __str__(self) -> str:
-        return f"Does not cast from {self.from_} to {self.to_}. (column: {self.column}, value: {self.value}, row: {self.row_number})"  # noqa
+        return f"Does not cast from {self.from_} to {self.to_}. (column: {self.column}, value: {self.value}, row: {self.row_number}){self.sampling_note}"  # noqa
 
 
-class DecoratorError(Exception):
+class DecoratorError(PrepFlowError):
     def __init__(self, column: str, detail: Optional[str] = None) -> None:
         self.column = column
         self.detail = detail
@@ -119,7 +148,7 @@ class DecoratorError(Exception):
         return self.detail
 
 
-class DecoratorReturnTypeError(Exception):
+class DecoratorReturnTypeError(PrepFlowError):
     def __init__(self, dtype: str, detail: Optional[str] = None) -> None:
         self.dtype = dtype
         self.detail = detail
@@ -1,18 +1,12 @@
-from typing import Annotated, Any, Callable, Generic, Optional, Type, TypeVar, Union
+from typing import Any, Callable, Generic, Optional, Type, TypeVar, Union
 
 import pandas as pd
 from pandas._libs.tslibs.timestamps import Timestamp  # noqa
-from pydantic import (
-    BaseModel,
-    ConfigDict,
-    Field,
-    PlainValidator,
-    ValidationInfo,
-    field_validator,
-)
 
 _DType = TypeVar("_DType")
 
+PYPREP_PARENT_CLASS_NAME = "__pyprep_parent_class_name__"
+
 
 class Dtype(Generic[_DType]):
     dtype: Union[str, int, float, bool, Timestamp]
@@ -77,7 +71,7 @@ class DateTime(Dtype[Timestamp]):
         return pd.to_datetime(value)
 
 
-def validate_dtype(v: Any, _: ValidationInfo) -> Dtype:
+def validate_dtype(v: Any, _: Any = None) -> Dtype:
     if not (hasattr(v, "dtype") and hasattr(v, "name")):
         raise TypeError(f"Expected String, Integer, Float, Boolean or DateTime, got {type(v)}")
     if not (
@@ -88,21 +82,139 @@ def validate_dtype(v: Any, _: ValidationInfo) -> Dtype:
     return v
 
 
-class Column(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+class Definition:
+    """
+    Frozen and hashable definition of a column.
+
+    Arguments are validated once, when the flow class is created, and the definition knows the attribute names
+    it is assigned to, so that flows resolve their definitions by identity.
+    """
+
+    __fields__: tuple[str, ...] = ()
+    __slots__ = ("_names", PYPREP_PARENT_CLASS_NAME)
+
+    def __init__(self, **kwargs: Any) -> None:
+        for key in self.__fields__:
+            object.__setattr__(self, key, kwargs[key])
+        object.__setattr__(self, "_names", ())
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        object.__setattr__(self, "_names", self._names + ((owner, name),))
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        # Only the name of the flow class defining the column is set, when the flow is initialized.
+        if key != PYPREP_PARENT_CLASS_NAME:
+            raise AttributeError(f"{self.__class__.__name__} is frozen, and {key} can't be set.")
+        object.__setattr__(self, key, value)
+
+    def __getstate__(self) -> dict[str, Any]:
+        keys = self.__fields__ + (PYPREP_PARENT_CLASS_NAME,)
+        return dict((key, getattr(self, key)) for key in keys if hasattr(self, key))
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        object.__setattr__(self, "_names", ())
+        for key, val in state.items():
+            object.__setattr__(self, key, val)
+
+    def names(self, owner: type) -> tuple[str, ...]:
+        """
+        Get the attribute names of the definition in the flow class.
+
+        Parameters
+        ----------
+        owner: type[BaseFlow]
+
+        Returns
+        -------
+        tuple[str, ...]
+        """
+        names = tuple(name for _owner, name in self._names if _owner is owner and vars(owner).get(name) is self)
+        if len(names) == 0:
+            # Assigned after the class was created.
+            names = tuple(key for key, val in vars(owner).items() if val is self)
+        return tuple(sorted(names))
+
+    def key(self) -> tuple:
+        return tuple(
+            tuple(val) if isinstance(val, list) else val for val in (getattr(self, key) for key in self.__fields__)
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return False
+        return self is other or self.key() == other.key()
 
-    dtype: Annotated[Dtype, PlainValidator(validate_dtype)]
-    name: Optional[str] = Field(default=None)
-    nullable: bool = Field(default=True)
-    regexp: Optional[str] = Field(default=None)
-    category: Optional[list[Union[str, int]]] = Field(default=None)
-    original_dtype: Optional[Annotated[Dtype, PlainValidator(validate_dtype)]] = Field(default=None)
-    original_nullable: bool = Field(default=True)
-    original_regexp: Optional[str] = Field(default=None)
-    original_category: Optional[list[str]] = Field(default=None)
-    modifier: Optional[Callable] = Field(default=None)
-    order: int = Field(default=0)
-    description: Optional[str] = Field(default=None)
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        arguments = ", ".join(
+            f"{key}={getattr(self, key)!r}" for key in self.__fields__ if getattr(self, key) is not None
+        )
+        return f"{self.__class__.__name__}({arguments})"
+
+    def validate(self) -> None:
+        """
+        Validate the arguments.
+
+        Raises
+        ------
+        TypeError
+            If an argument has an unexpected type.
+        ValueError
+            If an argument has an unexpected value.
+        """
+        for key in ["dtype", "original_dtype"]:
+            if key in self.__fields__ and getattr(self, key) is not None:
+                validate_dtype(getattr(self, key))
+        for key in ["nullable", "original_nullable"]:
+            if key in self.__fields__:
+                validate_type(key, getattr(self, key), bool)
+        for key in ["regexp", "original_regexp", "name", "description"]:
+            if key in self.__fields__:
+                validate_type(key, getattr(self, key), (str, type(None)))
+        for key in ["category", "original_category"]:
+            if key in self.__fields__:
+                validate_type(key, getattr(self, key), (list, type(None)))
+        validate_type("order", self.order, int)
+        if self.modifier is not None and not callable(self.modifier):
+            raise TypeError(f"Expected a callable modifier, got {type(self.modifier)}")
+
+
+def validate_type(key: str, value: Any, expected: Union[type, tuple[type, ...]]) -> None:
+    if not isinstance(value, expected):
+        raise TypeError(f"Unexpected type of {key}, got {type(value)}")
+
+
+class Column(Definition):
+    __fields__ = (
+        "dtype",
+        "name",
+        "nullable",
+        "regexp",
+        "category",
+        "original_dtype",
+        "original_nullable",
+        "original_regexp",
+        "original_category",
+        "modifier",
+        "order",
+        "description",
+    )
+    __slots__ = __fields__
+
+    dtype: Type[Dtype]
+    name: Optional[str]
+    nullable: bool
+    regexp: Optional[str]
+    category: Optional[list[Union[str, int]]]
+    original_dtype: Optional[Type[Dtype]]
+    original_nullable: bool
+    original_regexp: Optional[str]
+    original_category: Optional[list[str]]
+    modifier: Optional[Callable]
+    order: int
+    description: Optional[str]
 
     def __init__(
         self,
@@ -119,64 +231,47 @@ class Column(BaseModel):
         order: int = 0,
         description: Optional[str] = None,
     ):
-
         super().__init__(
-            **dict(
-                (key, val)
-                for key, val in {
-                    "dtype": dtype,
-                    "name": name,
-                    "nullable": nullable,
-                    "regexp": regexp,
-                    "category": category,
-                    "original_dtype": original_dtype,
-                    "original_nullable": original_nullable,
-                    "original_regexp": original_regexp,
-                    "original_category": original_category,
-                    "modifier": modifier,
-                    "order": order,
-                    "description": description,
-                }.items()
-                if val is not None
-            )
+            dtype=dtype,
+            name=name,
+            nullable=True if nullable is None else nullable,
+            regexp=regexp,
+            category=category,
+            original_dtype=original_dtype,
+            original_nullable=True if original_nullable is None else original_nullable,
+            original_regexp=original_regexp,
+            original_category=original_category,
+            modifier=modifier,
+            order=0 if order is None else order,
+            description=description,
         )
 
-    def __eq__(self, other) -> bool:
-        if not isinstance(other, Column):
-            return False
-
-        if not (
-            self.dtype == other.dtype
-            and self.name == other.name
-            and self.nullable == other.nullable
-            and self.regexp == other.regexp
-            and self.category == other.category
-            and self.original_dtype == other.original_dtype
-            and self.original_nullable == other.original_nullable
-            and self.original_regexp == other.original_regexp
-            and self.original_category == other.original_category
-            and self.modifier == other.modifier
-            and self.order == other.order
-            and self.description == other.description
-        ):
-            return False
-
-        return True
-
 
-class ReferenceColumn(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+class ReferenceColumn(Definition):
+    __fields__ = (
+        "column",
+        "on",
+        "how",
+        "order",
+        "dtype",
+        "nullable",
+        "regexp",
+        "category",
+        "modifier",
+        "description",
+    )
+    __slots__ = __fields__
 
     column: Column
-    on: Union[str | list[str]]
+    on: Union[str, list[str]]
     how: str
-    order: int = Field(default=0)
-    dtype: Annotated[Dtype, PlainValidator(validate_dtype)] = Field(default=None)
-    nullable: bool = Field(default=True)
-    regexp: Optional[str] = Field(default=None)
-    category: Optional[list[str]] = Field(default=None)
-    modifier: Optional[Callable] = Field(default=None)
-    description: Optional[str] = Field(default=None)
+    order: int
+    dtype: Optional[Type[Dtype]]
+    nullable: bool
+    regexp: Optional[str]
+    category: Optional[list[str]]
+    modifier: Optional[Callable]
+    description: Optional[str]
 
     def __init__(
         self,
@@ -191,49 +286,23 @@ class ReferenceColumn(BaseModel):
         modifier: Optional[Callable] = None,
         description: Optional[str] = None,
     ):
-
         super().__init__(
-            **dict(
-                (key, val)
-                for key, val in {
-                    "column": column,
-                    "on": on,
-                    "how": how,
-                    "order": order,
-                    "dtype": dtype,
-                    "nullable": nullable,
-                    "regexp": regexp,
-                    "category": category,
-                    "modifier": modifier,
-                    "description": description,
-                }.items()
-                if val is not None
-            )
+            column=column,
+            on=on,
+            how=how,
+            order=0 if order is None else order,
+            dtype=dtype,
+            nullable=True if nullable is None else nullable,
+            regexp=regexp,
+            category=category,
+            modifier=modifier,
+            description=description,
         )
 
-    @field_validator("how")
-    def validate_how(cls, v: Any) -> str:  # noqa
-        if v not in ["full", "left", "inner"]:
-            raise ValueError(f"Expected full, left or inner, got {v}")
-
-        return v
-
-    def __eq__(self, other) -> bool:
-        if not isinstance(other, ReferenceColumn):
-            return False
-
-        if not (
-            self.column == other.column
-            and self.on == other.on
-            and self.how == other.how
-            and self.order == other.order
-            and self.dtype == other.dtype
-            and self.nullable == other.nullable
-            and self.regexp == other.regexp
-            and self.category == other.category
-            and self.modifier == other.modifier
-            and self.description == other.description
-        ):
-            return False
-
-        return True
+    def validate(self) -> None:
+        super().validate()
+        validate_type("column", self.column, Column)
+        if not (isinstance(self.on, str) or (isinstance(self.on, list) and all(isinstance(v, str) for v in self.on))):
+            raise TypeError(f"Expected a column name or a list of column names, got {self.on}")
+        if self.how not in ["full", "left", "inner"]:
+            raise ValueError(f"Expected full, left or inner, got {self.how}")
@@ -0,0 +1,464 @@
+from __future__ import annotations
+
+import datetime
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+def broadcast(value: Any, data: pd.DataFrame) -> pd.Series:
+    if isinstance(value, pd.Series):
+        return value
+    return pd.Series([value] * data.shape[0], index=data.index)
+
+
+def evaluate_case(data: pd.DataFrame, *args: Any) -> pd.Series:
+    *branches, default = args
+    result = broadcast(default, data)
+    for i in range(len(branches) - 2, -1, -2):
+        condition, value = branches[i], branches[i + 1]
+        result = broadcast(value, data).where(broadcast(condition, data).fillna(False).astype(bool), result)
+    return result
+
+
+def evaluate_str_concat(data: pd.DataFrame, a: Any, b: Any) -> pd.Series:
+    # Nulls are concatenated as empty strings, like concat in SQL.
+    a, b = broadcast(a, data), broadcast(b, data)
+    return a.astype(str).where(a.notna(), "") + b.astype(str).where(b.notna(), "")
+
+
+def evaluate_date_diff(data: pd.DataFrame, end: Any, start: Any, unit: str) -> pd.Series:
+    # Whole units elapsed, rounded down, which SQL computes from the seconds elapsed in the same way.
+    delta = pd.to_datetime(broadcast(end, data)) - pd.to_datetime(broadcast(start, data))
+    return np.floor(delta / pd.Timedelta(1, unit=unit))
+
+
+# op: (pandas implementation, SQL template)
+OPERATIONS: dict[str, tuple[Callable[..., Any], str]] = {
+    "add": (lambda _, a, b: a + b, "({0} + {1})"),
+    "sub": (lambda _, a, b: a - b, "({0} - {1})"),
+    "mul": (lambda _, a, b: a * b, "({0} * {1})"),
+    "truediv": (lambda _, a, b: a / b, "({0} / {1})"),
+    "floordiv": (lambda _, a, b: a // b, "({0} // {1})"),
+    "mod": (lambda _, a, b: a % b, "({0} % {1})"),
+    "pow": (lambda _, a, b: a**b, "power({0}, {1})"),
+    "neg": (lambda _, a: -a, "(-{0})"),
+    "eq": (lambda _, a, b: a == b, "({0} = {1})"),
+    "ne": (lambda _, a, b: a != b, "({0} <> {1})"),
+    "lt": (lambda _, a, b: a < b, "({0} < {1})"),
+    "le": (lambda _, a, b: a <= b, "({0} <= {1})"),
+    "gt": (lambda _, a, b: a > b, "({0} > {1})"),
+    "ge": (lambda _, a, b: a >= b, "({0} >= {1})"),
+    "and": (lambda _, a, b: a & b, "({0} AND {1})"),
+    "or": (lambda _, a, b: a | b, "({0} OR {1})"),
+    "not": (lambda _, a: ~a, "(NOT {0})"),
+    "isna": (lambda data, a: broadcast(a, data).isna(), "({0} IS NULL)"),
+    "notna": (lambda data, a: broadcast(a, data).notna(), "({0} IS NOT NULL)"),
+    "fillna": (lambda data, a, b: broadcast(a, data).fillna(b), "coalesce({0}, {1})"),
+    "isin": (lambda data, a, *values: broadcast(a, data).isin(values), "({0} IN ({rest}))"),
+    "str_upper": (lambda _, a: a.str.upper(), "upper({0})"),
+    "str_lower": (lambda _, a: a.str.lower(), "lower({0})"),
+    "str_strip": (lambda _, a: a.str.strip(), "trim({0})"),
+    "str_len": (lambda _, a: a.str.len(), "length({0})"),
+    "str_contains": (lambda _, a, pat: a.str.contains(pat, regex=True), "regexp_matches({0}, {1})"),
+    "str_startswith": (lambda _, a, pat: a.str.startswith(pat), "starts_with({0}, {1})"),
+    "str_replace": (
+        lambda _, a, pat, repl: a.str.replace(pat, repl, regex=True),
+        "regexp_replace({0}, {1}, {2}, 'g')",
+    ),
+    "str_concat": (evaluate_str_concat, "concat({0}, {1})"),
+    "dt_year": (lambda _, a: pd.to_datetime(a).dt.year, "year({0})"),
+    "dt_month": (lambda _, a: pd.to_datetime(a).dt.month, "month({0})"),
+    "dt_day": (lambda _, a: pd.to_datetime(a).dt.day, "day({0})"),
+    "case": (evaluate_case, ""),
+    "date_diff": (evaluate_date_diff, ""),
+}
+
+# Seconds of the units of date_diff.
+SQL_DATE_UNITS = {"D": 86400, "h": 3600, "min": 60, "s": 1}
+
+# op: Arrow compute implementation, taking pyarrow.compute and the compiled arguments.
+# Operations which are evaluated differently by pandas and Arrow, e.g. "ne" and "not" on nulls, are not listed.
+ARROW_OPERATIONS: dict[str, Callable[..., Any]] = {
+    "add": lambda pc, a, b: pc.add(a, b),
+    "sub": lambda pc, a, b: pc.subtract(a, b),
+    "mul": lambda pc, a, b: pc.multiply(a, b),
+    "neg": lambda pc, a: pc.negate(a),
+    "eq": lambda pc, a, b: pc.equal(a, b),
+    "lt": lambda pc, a, b: pc.less(a, b),
+    "le": lambda pc, a, b: pc.less_equal(a, b),
+    "gt": lambda pc, a, b: pc.greater(a, b),
+    "ge": lambda pc, a, b: pc.greater_equal(a, b),
+    "and": lambda pc, a, b: pc.and_kleene(a, b),
+    "or": lambda pc, a, b: pc.or_kleene(a, b),
+    "isna": lambda pc, a: pc.is_null(a, nan_is_null=True),
+    "notna": lambda pc, a: pc.invert(pc.is_null(a, nan_is_null=True)),
+    "isin": lambda pc, a, values: pc.is_in(a, value_set=values),
+    "str_upper": lambda pc, a: pc.utf8_upper(a),
+    "str_lower": lambda pc, a: pc.utf8_lower(a),
+    "str_strip": lambda pc, a: pc.utf8_trim_whitespace(a),
+    "str_startswith": lambda pc, a, pat: pc.starts_with(a, pattern=pat),
+    "dt_year": lambda pc, a: pc.year(a),
+    "dt_month": lambda pc, a: pc.month(a),
+    "dt_day": lambda pc, a: pc.day(a),
+}
+
+
+def sql_literal(value: Any) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return repr(value.item() if isinstance(value, np.generic) else value)
+    if isinstance(value, (pd.Timestamp, datetime.datetime)):
+        return f"TIMESTAMP '{pd.Timestamp(value).isoformat(sep=' ')}'"
+    if isinstance(value, datetime.date):
+        return f"DATE '{value.isoformat()}'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def arrow_literal(value: Any) -> Any:
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ExpressionCache(dict):
+    """
+    Results of (sub)expressions shared by the expressions evaluated on the same data.
+
+    Key is Expr.key(), and value is a tuple of the columns the result depends on and the result.
+    """
+
+    def invalidate(self, column: str) -> None:
+        for key in [key for key, (columns, _) in self.items() if column in columns]:
+            del self[key]
+
+
+class Expr:
+    """
+    Declarative column expression, which is evaluated as vectorized operations.
+
+    Combine Col and literals with operators, when, date_diff, and the .str and .dt namespaces.
+    """
+
+    def __init__(self, op: str, *args: Any) -> None:
+        if op not in OPERATIONS and op not in ["col", "lit"]:
+            raise ValueError(f"Unknown operation, {op}.")
+        self.op = op
+        self.args = args
+
+    def key(self) -> tuple:
+        return (self.op,) + tuple(
+            arg.key() if isinstance(arg, Expr) else (type(arg).__name__, repr(arg)) for arg in self.args
+        )
+
+    def columns(self) -> set[str]:
+        """
+        Get the columns the expression depends on.
+
+        Returns
+        -------
+        set[str]
+        """
+        if self.op == "col":
+            return {self.args[0]}
+        columns = set()
+        for arg in self.args:
+            if isinstance(arg, Expr):
+                columns |= arg.columns()
+        return columns
+
+    def evaluate(self, data: pd.DataFrame, cache: Optional[ExpressionCache] = None) -> Any:
+        """
+        Evaluate the expression on the data.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+        cache: Optional[ExpressionCache]
+            Results of subexpressions shared by expressions evaluated on the same data.
+
+        Returns
+        -------
+        Any
+            pd.Series, or a scalar if the expression doesn't depend on any column.
+        """
+        if self.op == "col":
+            return data[self.args[0]]
+        if self.op == "lit":
+            return self.args[0]
+
+        cache = ExpressionCache() if cache is None else cache
+        key = self.key()
+        if key not in cache:
+            args = [arg.evaluate(data, cache) if isinstance(arg, Expr) else arg for arg in self.args]
+            cache[key] = (self.columns(), OPERATIONS[self.op][0](data, *args))
+        return cache[key][1]
+
+    def to_sql(self) -> str:
+        """
+        Compile the expression to a SQL expression.
+
+        Returns
+        -------
+        str
+        """
+        if self.op == "col":
+            return '"' + self.args[0].replace('"', '""') + '"'
+        if self.op == "lit":
+            return sql_literal(self.args[0])
+
+        args = [arg.to_sql() if isinstance(arg, Expr) else sql_literal(arg) for arg in self.args]
+        if self.op == "case":
+            *branches, default = args
+            whens = " ".join(f"WHEN {branches[i]} THEN {branches[i + 1]}" for i in range(0, len(branches), 2))
+            return f"(CASE {whens} ELSE {default} END)"
+        if self.op == "isin" and len(args) == 1:
+            # SQL doesn't allow an empty list of values, and no value is in it.
+            return "FALSE"
+        if self.op == "date_diff":
+            unit = self.args[2]
+            if unit not in SQL_DATE_UNITS:
+                raise ValueError(f"Expected {', '.join(SQL_DATE_UNITS.keys())}, got {unit}")
+            # date_diff of SQL counts the boundaries crossed, e.g. 1 day from 23:00 to 01:00.
+            elapsed = f"epoch(CAST({args[0]} AS TIMESTAMP) - CAST({args[1]} AS TIMESTAMP))"
+            return f"floor({elapsed} / {SQL_DATE_UNITS[unit]})"
+        return OPERATIONS[self.op][1].format(*args, rest=", ".join(args[1:]))
+
+    def to_arrow(self, names: Optional[dict[str, str]] = None) -> Any:
+        """
+        Compile the expression to a pyarrow.compute.Expression, e.g. to filter a dataset while reading it.
+
+        Rows where a predicate is null are dropped by Arrow, like rows where it is False are dropped by pandas.
+
+        Parameters
+        ----------
+        names: Optional[dict[str, str]]
+            Names of the columns in the data, if they differ from the names in the expression.
+
+        Returns
+        -------
+        pyarrow.compute.Expression
+        """
+        from prep_flow.arrow import import_pyarrow
+
+        pa, pc = import_pyarrow()
+        names = {} if names is None else names
+        if self.op == "col":
+            return pc.field(names.get(self.args[0], self.args[0]))
+        if self.op == "lit":
+            return pc.scalar(arrow_literal(self.args[0]))
+        if self.op not in ARROW_OPERATIONS:
+            raise NotImplementedError(f"{self.op} can't be compiled to an Arrow expression.")
+
+        if self.op == "isin":
+            return ARROW_OPERATIONS[self.op](
+                pc, self.args[0].to_arrow(names), pa.array([arrow_literal(value) for value in self.args[1:]])
+            )
+        if self.op == "str_startswith":
+            return ARROW_OPERATIONS[self.op](pc, self.args[0].to_arrow(names), self.args[1])
+
+        args = [arg.to_arrow(names) if isinstance(arg, Expr) else pc.scalar(arrow_literal(arg)) for arg in self.args]
+        return ARROW_OPERATIONS[self.op](pc, *args)
+
+    def __repr__(self) -> str:
+        if self.op == "col":
+            return f"Col({self.args[0]!r})"
+        if self.op == "lit":
+            return f"Lit({self.args[0]!r})"
+        return f"{self.op}({', '.join(repr(arg) for arg in self.args)})"
+
+    # Expr defines __eq__ as an expression, so it can't be used as a key of dict by default.
+    __hash__ = object.__hash__
+
+    def __bool__(self) -> bool:
+        raise TypeError("The truth value of an Expr is ambiguous. Use & and | instead of and and or.")
+
+    def __add__(self, other: Any) -> Expr:
+        return Expr("add", self, other)
+
+    def __radd__(self, other: Any) -> Expr:
+        return Expr("add", other, self)
+
+    def __sub__(self, other: Any) -> Expr:
+        return Expr("sub", self, other)
+
+    def __rsub__(self, other: Any) -> Expr:
+        return Expr("sub", other, self)
+
+    def __mul__(self, other: Any) -> Expr:
+        return Expr("mul", self, other)
+
+    def __rmul__(self, other: Any) -> Expr:
+        return Expr("mul", other, self)
+
+    def __truediv__(self, other: Any) -> Expr:
+        return Expr("truediv", self, other)
+
+    def __rtruediv__(self, other: Any) -> Expr:
+        return Expr("truediv", other, self)
+
+    def __floordiv__(self, other: Any) -> Expr:
+        return Expr("floordiv", self, other)
+
+    def __mod__(self, other: Any) -> Expr:
+        return Expr("mod", self, other)
+
+    def __pow__(self, other: Any) -> Expr:
+        return Expr("pow", self, other)
+
+    def __neg__(self) -> Expr:
+        return Expr("neg", self)
+
+    def __eq__(self, other: Any) -> Expr:  # type: ignore[override]
+        return Expr("eq", self, other)
+
+    def __ne__(self, other: Any) -> Expr:  # type: ignore[override]
+        return Expr("ne", self, other)
+
+    def __lt__(self, other: Any) -> Expr:
+        return Expr("lt", self, other)
+
+    def __le__(self, other: Any) -> Expr:
+        return Expr("le", self, other)
+
+    def __gt__(self, other: Any) -> Expr:
+        return Expr("gt", self, other)
+
+    def __ge__(self, other: Any) -> Expr:
+        return Expr("ge", self, other)
+
+    def __and__(self, other: Any) -> Expr:
+        return Expr("and", self, other)
+
+    def __or__(self, other: Any) -> Expr:
+        return Expr("or", self, other)
+
+    def __invert__(self) -> Expr:
+        return Expr("not", self)
+
+    def isna(self) -> Expr:
+        return Expr("isna", self)
+
+    def notna(self) -> Expr:
+        return Expr("notna", self)
+
+    def fillna(self, value: Any) -> Expr:
+        return Expr("fillna", self, value)
+
+    def isin(self, values: list[Any]) -> Expr:
+        return Expr("isin", self, *values)
+
+    @property
+    def str(self) -> StringFunctions:
+        return StringFunctions(self)
+
+    @property
+    def dt(self) -> DateTimeFunctions:
+        return DateTimeFunctions(self)
+
+
+class StringFunctions:
+    def __init__(self, expr: Expr) -> None:
+        self.expr = expr
+
+    def upper(self) -> Expr:
+        return Expr("str_upper", self.expr)
+
+    def lower(self) -> Expr:
+        return Expr("str_lower", self.expr)
+
+    def strip(self) -> Expr:
+        return Expr("str_strip", self.expr)
+
+    def len(self) -> Expr:
+        return Expr("str_len", self.expr)
+
+    def contains(self, pattern: str) -> Expr:
+        return Expr("str_contains", self.expr, pattern)
+
+    def startswith(self, prefix: str) -> Expr:
+        return Expr("str_startswith", self.expr, prefix)
+
+    def replace(self, pattern: str, replacement: str) -> Expr:
+        return Expr("str_replace", self.expr, pattern, replacement)
+
+    def concat(self, other: Union[Expr, str]) -> Expr:
+        return Expr("str_concat", self.expr, other if isinstance(other, Expr) else Lit(other))
+
+
+class DateTimeFunctions:
+    def __init__(self, expr: Expr) -> None:
+        self.expr = expr
+
+    @property
+    def year(self) -> Expr:
+        return Expr("dt_year", self.expr)
+
+    @property
+    def month(self) -> Expr:
+        return Expr("dt_month", self.expr)
+
+    @property
+    def day(self) -> Expr:
+        return Expr("dt_day", self.expr)
+
+
+class When(Expr):
+    def __init__(self, *args: Any) -> None:
+        super().__init__("case", *args)
+
+    def when(self, condition: Expr, value: Any) -> When:
+        return When(*self.args[:-1], condition, value, self.args[-1])
+
+    def otherwise(self, value: Any) -> When:
+        return When(*self.args[:-1], value)
+
+
+def Col(name: str) -> Expr:  # noqa
+    return Expr("col", name)
+
+
+def Lit(value: Any) -> Expr:  # noqa
+    return Expr("lit", value)
+
+
+def when(condition: Expr, value: Any) -> When:
+    """
+    Conditional expression. Chain .when() for more conditions and .otherwise() for the default value.
+
+    Parameters
+    ----------
+    condition: Expr
+    value: Any
+
+    Returns
+    -------
+    When
+    """
+    return When(condition, value, None)
+
+
+def date_diff(end: Any, start: Any, unit: str = "D") -> Expr:
+    """
+    Number of whole units elapsed from start to end, rounded down, e.g. 0 days from 23:00 to 01:00.
+
+    Parameters
+    ----------
+    end: Any
+        Expr or a datetime.
+    start: Any
+        Expr or a datetime.
+    unit: str
+        "D", "h", "min" or "s".
+
+    Returns
+    -------
+    Expr
+    """
+    return Expr("date_diff", end, start, unit)
@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from prep_flow.statistics import ColumnStatistics, is_sorted
+
+# Joins which lookup_merge computes with the same result as pd.merge.
+LOOKUP_JOINS = ["left", "inner"]
+# Columns inserted into the result of a join one by one, without fragmenting it too much.
+MAX_INSERTED_COLUMNS = 16
+
+
+def with_range_index(data: pd.DataFrame) -> pd.DataFrame:
+    # Unlike reset_index, the columns are not copied.
+    return data.set_axis(pd.RangeIndex(data.shape[0]), axis=0, copy=False)
+
+
+def take_columns(result: pd.DataFrame, right: pd.DataFrame, columns: list[str], indexer: np.ndarray) -> pd.DataFrame:
+    """
+    Add the columns of the right data taken by the indexer to the result, filling -1 with nulls.
+
+    A few columns are inserted into the result, which unlike pd.concat doesn't copy its columns.
+
+    Parameters
+    ----------
+    result: pd.DataFrame
+        A new frame with a RangeIndex, which may be changed.
+    right: pd.DataFrame
+    columns: list[str]
+    indexer: np.ndarray
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    taken = dict((column, right[column].array.take(indexer, allow_fill=True)) for column in columns)
+    if len(columns) > MAX_INSERTED_COLUMNS:
+        return pd.concat([result, pd.DataFrame(taken, index=result.index)], axis=1, copy=False)
+    for column, values in taken.items():
+        result[column] = values
+    return result
+
+
+def gather(
+    left: pd.DataFrame, right: pd.DataFrame, on: list[str], left_indexer: np.ndarray, right_indexer: np.ndarray
+) -> pd.DataFrame:
+    """
+    Build the joined data from the positions of the joined rows, filling -1 with nulls like pd.merge.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    on: list[str]
+    left_indexer: np.ndarray
+    right_indexer: np.ndarray
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    missing = left_indexer < 0
+    if not missing.any():
+        result = with_range_index(left.take(left_indexer))
+    else:
+        # Positions of -1 are missing in the RangeIndex, and filled with nulls for all columns of a dtype at once.
+        result = with_range_index(left).reindex(left_indexer)
+        result.index = pd.RangeIndex(left_indexer.shape[0])
+        for key in on:
+            # Keys of rows only in the right data are taken from the right data.
+            # Each side is indexed only by its own rows, as either side may be empty.
+            left_keys, right_keys = left[key].to_numpy(), right[key].to_numpy()
+            values = np.empty(
+                missing.shape[0], dtype=left_keys.dtype if left_keys.dtype == right_keys.dtype else object
+            )
+            values[~missing] = left_keys.take(left_indexer[~missing])
+            values[missing] = right_keys.take(right_indexer[missing])
+            result[key] = pd.Series(values, index=result.index).infer_objects()
+
+    columns = [column for column in right.columns if column not in on]
+    return take_columns(result, right, columns, right_indexer)
+
+
+def merge_order(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    how: str,
+    on: list[str],
+    left_indexer: np.ndarray,
+    right_indexer: np.ndarray,
+) -> np.ndarray:
+    """
+    Find the order of the joined rows in the result of pd.merge.
+
+    pd.merge keeps the order of the left rows (the right rows for "right"), and sorts the keys for "outer".
+    Null keys are sorted like pd.merge, i.e. NaT first for datetimes and timedeltas, and other nulls last.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    how: str
+        "left", "right", "inner" or "outer".
+    on: list[str]
+    left_indexer: np.ndarray
+        Positions of the joined rows in the left data, where -1 is a row missing in the left data.
+    right_indexer: np.ndarray
+        Positions of the joined rows in the right data, where -1 is a row missing in the right data.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    if how == "right":
+        return np.lexsort((left_indexer, right_indexer))
+    if how != "outer":
+        return np.lexsort((right_indexer, left_indexer))
+
+    # Rows are sorted by the positions of the rows with missing positions last, and then stably by the keys.
+    missing = np.iinfo(np.intp).max
+    order = np.lexsort(
+        (np.where(right_indexer < 0, missing, right_indexer), np.where(left_indexer < 0, missing, left_indexer))
+    )
+    keys = gather(left[on], right[on], on, left_indexer.take(order), right_indexer.take(order))
+    for key in on:
+        if keys[key].dtype.kind in "mM":
+            # pd.merge sorts datetimes by their integers, where NaT is the smallest.
+            keys[key] = keys[key].array.asi8
+    return order.take(keys.sort_values(by=on, kind="stable", na_position="last").index.to_numpy())
+
+
+def gather_merge(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    how: str,
+    on: list[str],
+    left_indexer: np.ndarray,
+    right_indexer: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Build the result of pd.merge from the positions of the joined rows in any order.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    how: str
+        "left", "right", "inner" or "outer".
+    on: list[str]
+    left_indexer: np.ndarray
+        Positions of the joined rows in the left data, where -1 is a row missing in the left data.
+    right_indexer: np.ndarray
+        Positions of the joined rows in the right data, where -1 is a row missing in the right data.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    left_indexer = np.asarray(left_indexer, dtype=np.intp)
+    right_indexer = np.asarray(right_indexer, dtype=np.intp)
+    order = merge_order(left, right, how, on, left_indexer, right_indexer)
+    left_indexer = left_indexer.take(order)
+    right_indexer = right_indexer.take(order)
+    del order
+    return gather(left, right, on, left_indexer, right_indexer)
+
+
+def is_lookup_join(how: str, on: list[str], statistics: dict[str, ColumnStatistics]) -> bool:
+    """
+    Decide from the statistics of the reference data whether a join can look up the keys in a hash index,
+    instead of building a hash join.
+
+    Parameters
+    ----------
+    how: str
+        "left", "inner" or "outer".
+    on: list[str]
+    statistics: dict[str, ColumnStatistics]
+        Statistics of the reference data.
+
+    Returns
+    -------
+    bool
+    """
+    if how not in LOOKUP_JOINS or any(key not in statistics for key in on):
+        return False
+    if any(statistics[key].null_count > 0 for key in on):
+        return False
+    # Unique keys are detected by a single key. Multiple keys are checked by lookup_merge.
+    return len(on) > 1 or statistics[on[0]].may_be_unique()
+
+
+def lookup_merge(left: pd.DataFrame, right: pd.DataFrame, how: str, on: list[str]) -> Optional[pd.DataFrame]:
+    """
+    Join reference data with unique keys by looking up the keys of the left rows in an index of the right keys.
+
+    The result is the same as pd.merge, i.e. rows follow the left rows, and the right columns are filled
+    with nulls of the same dtypes for the left rows without a match.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    how: str
+        "left" or "inner".
+    on: list[str]
+
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        None if the result may differ from pd.merge, e.g. the right keys are not unique,
+        the dtypes of the keys differ, or the columns overlap.
+    """
+    columns = [column for column in right.columns if column not in on]
+    if any(column in left.columns for column in columns):
+        return None
+    if any(left[key].dtype != right[key].dtype for key in on):
+        return None
+
+    if len(on) == 1:
+        index = pd.Index(right[on[0]])
+        keys = pd.Index(left[on[0]])
+    else:
+        index = pd.MultiIndex.from_frame(right[on])
+        keys = pd.MultiIndex.from_frame(left[on])
+    if not index.is_unique:
+        return None
+
+    indexer = index.get_indexer(keys)
+    left = with_range_index(left)
+    if how == "inner":
+        matched = np.flatnonzero(indexer >= 0)
+        left = with_range_index(left.take(matched))
+        indexer = indexer[matched]
+
+    return take_columns(left, right, columns, indexer)
+
+
+def is_sorted_join(
+    left: pd.DataFrame, right: pd.DataFrame, on: list[str], statistics: dict[str, ColumnStatistics]
+) -> bool:
+    """
+    Decide whether both data are sorted by a single key, so that sorted_merge can join them.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    on: list[str]
+    statistics: dict[str, ColumnStatistics]
+        Statistics of the reference data. The right data is checked only if they are missing or stale.
+
+    Returns
+    -------
+    bool
+    """
+    if len(on) != 1 or left[on[0]].dtype != right[on[0]].dtype:
+        return False
+    key = on[0]
+    # The statistics may have been collected before a cast, which changes the order of e.g. numeric strings.
+    if key in statistics and statistics[key].dtype == str(right[key].dtype):
+        if not statistics[key].is_sorted:
+            return False
+    elif not is_sorted(right[key]):
+        return False
+    return is_sorted(left[key])
+
+
+def sorted_matches(left_keys: np.ndarray, right_keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find the first match and the number of matches in the sorted right keys for each left key.
+
+    Parameters
+    ----------
+    left_keys: np.ndarray
+        Sorted keys. Sorted keys are searched faster, as each search starts from the previous match.
+    right_keys: np.ndarray
+        Sorted keys.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Positions of the first matches, and numbers of the matches.
+    """
+    start = right_keys.searchsorted(left_keys, side="left")
+    if right_keys.shape[0] > 0 and (right_keys[1:] != right_keys[:-1]).all():
+        # Unique keys match at most once, which is checked without searching the end of the matches.
+        # Keys greater than all right keys are compared with the last key, which is smaller.
+        matches = right_keys.take(np.minimum(start, right_keys.shape[0] - 1)) == left_keys
+        return start, matches.astype(np.intp)
+    return start, right_keys.searchsorted(left_keys, side="right") - start
+
+
+def scatter(indexer: np.ndarray, positions: np.ndarray, size: int) -> np.ndarray:
+    result = np.full(size, -1, dtype=np.intp)
+    result[positions] = indexer
+    return result
+
+
+def sorted_merge(left: pd.DataFrame, right: pd.DataFrame, how: str, on: list[str]) -> Optional[pd.DataFrame]:
+    """
+    Join data sorted by a single key by merging the sorted keys, instead of building a hash join.
+
+    The matches of each key are found by binary searches of the sorted keys, and the rows are taken
+    in the same order as pd.merge, i.e. the left rows for "left" and "inner", and the sorted keys for "outer".
+    Both keys must be sorted in ascending order without nulls, see is_sorted_join.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    how: str
+        "left", "inner" or "outer".
+    on: list[str]
+
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        None if the columns overlap, as pd.merge adds suffixes to them.
+    """
+    key = on[0]
+    columns = [column for column in right.columns if column != key]
+    if any(column in left.columns for column in columns):
+        return None
+
+    left_keys, right_keys = left[key].to_numpy(), right[key].to_numpy()
+    start, matches = sorted_matches(left_keys, right_keys)
+    if how != "outer" and matches.max(initial=0) <= 1:
+        # Each left row has at most one match, so the left rows are kept or filtered without being repeated.
+        if how == "left" or matches.all():
+            return take_columns(with_range_index(left), right, columns, np.where(matches > 0, start, -1))
+        left_indexer = np.flatnonzero(matches)
+        return take_columns(with_range_index(left.take(left_indexer)), right, columns, start[left_indexer])
+
+    # Rows of the result for each left row. Left rows without a match are kept, except for "inner".
+    rows = matches if how == "inner" else np.maximum(matches, 1)
+    offsets = np.cumsum(rows) - rows
+    left_indexer = np.repeat(np.arange(left.shape[0]), rows)
+    right_indexer = np.repeat(start - offsets, rows) + np.arange(left_indexer.shape[0])
+    right_indexer[np.repeat(matches == 0, rows)] = -1
+    if how != "outer":
+        return take_columns(with_range_index(left.take(left_indexer)), right, columns, right_indexer)
+
+    # Right rows out of the ranges matched by the left keys are kept, and placed among the left rows by their keys.
+    bins = right_keys.shape[0] + 1
+    is_unmatched = (
+        np.cumsum(np.bincount(start, minlength=bins) - np.bincount(start + matches, minlength=bins))[:-1] == 0
+    )
+    unmatched = np.flatnonzero(is_unmatched)
+    unmatched_before = np.concatenate([[0], np.cumsum(is_unmatched)])
+    left_positions = np.arange(left_indexer.shape[0]) + np.repeat(unmatched_before[start], rows)
+    right_positions = np.concatenate([offsets, [left_indexer.shape[0]]])[
+        left_keys.searchsorted(right_keys[unmatched], side="left")
+    ] + np.arange(unmatched.shape[0])
+
+    size = left_indexer.shape[0] + unmatched.shape[0]
+    keys = np.empty(size, dtype=left_keys.dtype)
+    keys[left_positions] = left_keys[left_indexer]
+    keys[right_positions] = right_keys[unmatched]
+    left_indexer = scatter(left_indexer, left_positions, size)
+    right_indexer = scatter(right_indexer, left_positions, size)
+    right_indexer[right_positions] = unmatched
+    # Positions of -1 are missing in the RangeIndex, and filled with nulls for all columns of a dtype at once.
+    result = with_range_index(left).reindex(left_indexer)
+    result[key] = keys
+    result.index = pd.RangeIndex(size)
+    return take_columns(result, right, columns, right_indexer)
+
+
+def in_memory_merge(
+    left: pd.DataFrame, right: pd.DataFrame, how: str, on: list[str], statistics: dict[str, ColumnStatistics]
+) -> pd.DataFrame:
+    """
+    Join the data in memory with the first strategy which applies, all of which give the same result as pd.merge:
+    a lookup of unique keys, a merge of sorted keys, and a hash join.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    how: str
+        "left", "inner" or "outer".
+    on: list[str]
+    statistics: dict[str, ColumnStatistics]
+        Statistics of the reference data.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    joined = None
+    if is_lookup_join(how, on, statistics):
+        joined = lookup_merge(left, right, how=how, on=on)
+    if joined is None and is_sorted_join(left, right, on, statistics):
+        joined = sorted_merge(left, right, how=how, on=on)
+    if joined is None:
+        joined = pd.merge(left, right, how=how, on=on)
+    return joined
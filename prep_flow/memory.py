@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+import tempfile
+import weakref
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from prep_flow.join import gather_merge
+
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3, "TB": 1024**4}
+POSITION_COLUMN = "__pyprep_position__"
+
+
+def parse_size(size: Union[int, str]) -> int:
+    """
+    Parse a size such as 1024, "512MB" or "64GB" into bytes.
+
+    Parameters
+    ----------
+    size: Union[int, str]
+
+    Returns
+    -------
+    int
+    """
+    if isinstance(size, int):
+        return size
+
+    matched = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?B?)\s*", size.upper())
+    if matched is None:
+        raise ValueError(f"Invalid memory size: {size}")
+    return int(float(matched.group(1)) * SIZE_UNITS[matched.group(2)])
+
+
+def format_size(size: int) -> str:
+    """
+    Format bytes into a readable size such as "1.5MB".
+
+    Parameters
+    ----------
+    size: int
+
+    Returns
+    -------
+    str
+    """
+    if size < 1024:
+        return f"{size}B"
+
+    value = float(size)
+    for unit in ["KB", "MB", "GB", "TB"]:
+        value /= 1024
+        if value < 1024 or unit == "TB":
+            break
+    return f"{value:.1f}{unit}"
+
+
+def memory_usage(data: pd.DataFrame) -> int:
+    """
+    Estimate the bytes held in memory by the data. Columns backed by memory-mapped files are not counted.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+
+    Returns
+    -------
+    int
+    """
+    usage = data.memory_usage(index=True, deep=True)
+    return int(usage.sum()) - sum(int(usage[column]) for column in data.columns.unique() if is_spilled(data[column]))
+
+
+def is_spilled(series: Union[pd.Series, pd.DataFrame]) -> bool:
+    if not isinstance(series, pd.Series) or not isinstance(series.dtype, np.dtype):
+        return False
+    base = series.values
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    return base is not None
+
+
+def is_spillable(series: pd.Series) -> bool:
+    # Only fixed-width numpy columns can be mapped to a file as they are.
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM" and not is_spilled(series)
+
+
+class SpillStore:
+    """
+    Move columns to memory-mapped files, so that the OS can page them out under memory pressure.
+
+    Files are unlinked as soon as they are mapped, and the disk space is freed when the columns are released.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory
+
+    def spill(self, series: pd.Series) -> pd.Series:
+        """
+        Copy a numeric column to a memory-mapped file.
+
+        Parameters
+        ----------
+        series: pd.Series
+
+        Returns
+        -------
+        pd.Series
+            Series backed by the file.
+        """
+        values = series.to_numpy()
+        fd, path = tempfile.mkstemp(prefix="prep_flow_", suffix=".spill", dir=self.directory)
+        os.close(fd)
+        if values.nbytes == 0:
+            os.remove(path)
+            return series
+
+        mapped = np.memmap(path, dtype=values.dtype, mode="w+", shape=values.shape)
+        mapped[:] = values
+        mapped.flush()
+        try:
+            os.remove(path)
+        except OSError:
+            # The file can't be removed while it is mapped on some platforms.
+            weakref.finalize(mapped, remove_quietly, path)
+        return pd.Series(mapped, index=series.index, name=series.name, copy=False)
+
+    def spill_columns(self, data: pd.DataFrame, budget: int, hot_columns: Optional[list[str]] = None) -> pd.DataFrame:
+        """
+        Spill the largest cold columns until the data fits in the budget.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+        budget: int
+            Bytes the data can hold in memory.
+        hot_columns: Optional[list[str]]
+            Columns which are kept in memory, e.g. keys of the next joins.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        usage = memory_usage(data)
+        if usage <= budget or data.columns.has_duplicates:
+            return data
+
+        hot_columns = hot_columns or []
+        candidates = [column for column in data.columns if column not in hot_columns and is_spillable(data[column])]
+        candidates.sort(key=lambda column: data[column].memory_usage(index=False, deep=False), reverse=True)
+
+        spilled = {}
+        for column in candidates:
+            if usage <= budget:
+                break
+            spilled[column] = self.spill(data[column])
+            usage -= data[column].memory_usage(index=False, deep=False)
+
+        if not spilled:
+            return data
+        return pd.concat([spilled.get(column, data[column]) for column in data.columns], axis=1, copy=False)
+
+
+def remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def num_of_partitions(left: pd.DataFrame, right: pd.DataFrame, budget: int) -> int:
+    """
+    Decide how many partitions a join is split into, so that each partial join fits in the budget.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    budget: int
+
+    Returns
+    -------
+    int
+    """
+    estimate = memory_usage(left) + memory_usage(right)
+    return max(1, math.ceil(estimate / max(budget, 1)))
+
+
+def hash_partitions(data: pd.DataFrame, on: list[str], n: int) -> np.ndarray:
+    return (pd.util.hash_pandas_object(data[on], index=False).to_numpy() % np.uint64(n)).astype(np.int64)
+
+
+def partition_keys(data: pd.DataFrame, on: list[str], positions: np.ndarray, position_column: str) -> pd.DataFrame:
+    # Only the keys and the positions of the rows are joined, without copying the other columns.
+    keys = pd.DataFrame(dict((key, data[key].array.take(positions)) for key in on))
+    keys[position_column] = positions
+    return keys
+
+
+def partitioned_merge(left: pd.DataFrame, right: pd.DataFrame, how: str, on: list[str], n: int) -> pd.DataFrame:
+    """
+    Join the data in partitions by hash of the keys, so that only one partial join is built at a time.
+
+    Only the keys and the positions of the rows are joined in each partition, and the positions of the joined rows
+    are kept, so that the columns are taken once into the result, without copying the data.
+    Rows follow the left rows (the right rows for "right", and the sorted keys for "outer"), like pd.merge.
+
+    Parameters
+    ----------
+    left: pd.DataFrame
+    right: pd.DataFrame
+    how: str
+        "left", "right", "inner" or "outer".
+    on: list[str]
+    n: int
+        Number of partitions.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if n <= 1:
+        return pd.merge(left, right, how=how, on=on)
+
+    left_position, right_position = POSITION_COLUMN + "left", POSITION_COLUMN + "right"
+    left_partitions = hash_partitions(left, on, n)
+    right_partitions = hash_partitions(right, on, n)
+
+    left_indexers, right_indexers = [], []
+    for partition in range(n):
+        merged = pd.merge(
+            partition_keys(left, on, np.flatnonzero(left_partitions == partition), left_position),
+            partition_keys(right, on, np.flatnonzero(right_partitions == partition), right_position),
+            how=how,
+            on=on,
+        )
+        # Rows missing on one side have NaN positions.
+        left_indexers.append(merged[left_position].fillna(-1).to_numpy(dtype=np.intp))
+        right_indexers.append(merged[right_position].fillna(-1).to_numpy(dtype=np.intp))
+        del merged
+    left_indexer, right_indexer = np.concatenate(left_indexers), np.concatenate(right_indexers)
+    del left_indexers, right_indexers
+    return gather_merge(left, right, how, on, left_indexer, right_indexer)
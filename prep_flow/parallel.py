@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+import pandas as pd
+
+from prep_flow.errors import DataValueError, ReferenceDataNotFoundError
+from prep_flow.join import with_range_index
+from prep_flow.shared import reference_columns
+from prep_flow.statistics import ColumnStatistics
+
+if TYPE_CHECKING:
+    from prep_flow.base import BaseFlow, FlowData
+    from prep_flow.policy import ValidationPolicy
+
+# Reference flows broadcast to the worker process by its initializer.
+_references: list[BaseFlow] = []
+
+
+def set_references(references: list[tuple[type[BaseFlow], pd.DataFrame, dict[str, ColumnStatistics]]]) -> None:
+    global _references
+    _references = []
+    for reference_class, data, statistics in references:
+        _reference = reference_class.from_data(data)
+        # Joins are planned with the statistics of the reference flows, without scanning them again.
+        _reference.statistics = statistics
+        _references.append(_reference)
+
+
+def run_partition(
+    flow_class: type[BaseFlow],
+    data: pd.DataFrame,
+    offset: int,
+    validation_policy: Optional[ValidationPolicy] = None,
+) -> pd.DataFrame:
+    """
+    Run the flow on a partition of the data in a worker process.
+
+    Parameters
+    ----------
+    flow_class: type[BaseFlow]
+    data: pd.DataFrame
+        A partition numbered from 0, as the flow assumes that rows are numbered by their positions.
+    offset: int
+        Position of the partition in the whole data, added to the row numbers of errors.
+    validation_policy: Optional[ValidationPolicy]
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    try:
+        return flow_class(data, reference=_references, validation_policy=validation_policy).data
+    except DataValueError as e:
+        e.row_number += offset
+        raise
+
+
+def partition_bounds(rows: int, partitions: int) -> list[tuple[int, int]]:
+    bounds = np.linspace(0, rows, min(partitions, max(rows, 1)) + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def run_partitioned(
+    flow_class: type[BaseFlow],
+    data: FlowData,
+    reference: Optional[list[BaseFlow]] = None,
+    partitions: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    validation_policy: Optional[ValidationPolicy] = None,
+) -> BaseFlow:
+    """
+    Run a flow on row partitions of the data in worker processes, and concatenate the results in order.
+
+    Only row-local flows (see BaseFlow.is_row_local) are partitioned, i.e. flows whose validation, casts,
+    modifiers, creators and joins compute each row from its own row. Other flows run on the whole data
+    in this process.
+
+    Each worker receives the projections of the reference flows once, when it starts.
+    Row numbers in errors are row numbers in the whole data, and the error of the first failing partition is raised.
+
+    Parameters
+    ----------
+    flow_class: type[BaseFlow]
+        Must be picklable, i.e. defined at the top level of a module, as well as the reference flows.
+    data: FlowData
+    reference: Optional[list[BaseFlow]]
+    partitions: Optional[int]
+        Defaults to max_workers.
+    max_workers: Optional[int]
+        Defaults to os.cpu_count().
+    validation_policy: Optional[ValidationPolicy]
+
+    Returns
+    -------
+    BaseFlow
+        A flow built from the concatenated result.
+    """
+    reference = [] if reference is None else reference
+    source = flow_class.parse_data(data)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    bounds = partition_bounds(source.shape[0], max_workers if partitions is None else partitions)
+    if len(bounds) <= 1 or not flow_class.is_row_local():
+        return flow_class(source, reference=reference, validation_policy=validation_policy)
+
+    # Only the columns each reference merges are sent to the workers.
+    references = []
+    for _class_name in dict.fromkeys([_class_name for _class_name, _, _, _, _ in flow_class.get_reference_info()]):
+        _reference = next(
+            (_reference for _reference in reference if _reference.__class__.__name__ == _class_name), None
+        )
+        if _reference is None:
+            raise ReferenceDataNotFoundError(name=_class_name)
+        columns = reference_columns(flow_class, _class_name)
+        # Statistics of the keys are collected once here, instead of in each worker.
+        _reference.key_statistics(
+            [key for _name, _, _, _on, _ in flow_class.get_reference_info() if _name == _class_name for key in _on]
+        )
+        statistics = dict(
+            (column, _reference.statistics[column]) for column in columns if column in _reference.statistics
+        )
+        references.append((_reference.__class__, _reference.project(columns), statistics))
+
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(bounds)), initializer=set_references, initargs=(references,)
+    ) as executor:
+        futures = [
+            executor.submit(
+                run_partition, flow_class, with_range_index(source.iloc[start:stop]), start, validation_policy
+            )
+            for start, stop in bounds
+        ]
+        try:
+            results = [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    result = pd.concat(results, copy=False)
+    # The labels of the partitions are restored if the rows are kept as they are.
+    # Flows joining reference data reset the index, so the concatenated result is reset in the same way.
+    if all(_result.index.equals(pd.RangeIndex(stop - start)) for _result, (start, stop) in zip(results, bounds)):
+        result.index = source.index
+    else:
+        result.index = pd.RangeIndex(result.shape[0])
+    return flow_class.from_data(result, reference=reference)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Optional, Union
+
+from prep_flow.base import BaseFlow
+from prep_flow.errors import CircularReferenceError, ReferenceDataNotFoundError
+from prep_flow.session import FlowSource
+from prep_flow.shared import SharedFlow, reference_columns
+
+
+def run_flow(flow_class: type[BaseFlow], data: FlowSource, reference: list[BaseFlow]) -> BaseFlow:
+    flow = flow_class(data() if callable(data) else data, reference=reference)
+    # The pipeline owns the reference flows, and frees them when no flow needs them.
+    flow.reference = []
+    return flow
+
+
+def run_shared_flow(
+    flow_class: type[BaseFlow],
+    data: FlowSource,
+    reference: list[SharedFlow],
+    directory: Optional[str] = None,
+) -> SharedFlow:
+    # References are attached to shared memory, and only the columns merged by the flow are mapped.
+    reference = [
+        _reference.attach(reference_columns(flow_class, _reference.flow_class.__name__)) for _reference in reference
+    ]
+    return SharedFlow.publish(run_flow(flow_class, data, reference), directory=directory)
+
+
+class Pipeline:
+    """
+    Run flows referring to each other in the order of their references.
+
+    Flows that don't depend on each other run concurrently, and the results no flow needs anymore are freed.
+
+    With shared_memory, results are handed over between processes as Arrow IPC files in shared memory
+    instead of being pickled, and the flows map only the reference columns they merge.
+    """
+
+    def __init__(
+        self,
+        executor: str = "thread",
+        max_workers: Optional[int] = None,
+        shared_memory: bool = False,
+        shared_dir: Optional[str] = None,
+    ) -> None:
+        if executor not in ["thread", "process"]:
+            raise ValueError(f"Expected thread or process, got {executor}")
+
+        self.executor = executor
+        self.max_workers = max_workers
+        self.shared_memory = shared_memory
+        self.shared_dir = shared_dir
+        self.sources: dict[str, tuple[type[BaseFlow], FlowSource]] = {}
+
+    def add(self, flow_class: type[BaseFlow], data: FlowSource) -> Pipeline:
+        """
+        Add a flow and its data.
+
+        Parameters
+        ----------
+        flow_class: type[BaseFlow]
+        data: FlowSource
+            FlowData, or a callable returning it, which is called when the flow runs.
+            With the process executor, flow_class and data must be picklable.
+
+        Returns
+        -------
+        Pipeline
+        """
+        flow_class.set_class_name_to_columns()
+        self.sources[flow_class.__name__] = (flow_class, data)
+        return self
+
+    def dependencies(self) -> dict[str, list[str]]:
+        """
+        Get the names of the flows referred to by each flow.
+
+        Returns
+        -------
+        dict[str, list[str]]
+
+        Raises
+        ------
+        ReferenceDataNotFoundError
+            If a flow refers to a flow which is not added.
+        """
+        dependencies = {}
+        for name, (flow_class, _) in self.sources.items():
+            names = sorted(set(_class_name for _class_name, _, _, _, _ in flow_class.get_reference_info()))
+            for _name in names:
+                if _name not in self.sources:
+                    raise ReferenceDataNotFoundError(name=_name)
+            dependencies[name] = names
+
+        return dependencies
+
+    def order(self) -> list[str]:
+        """
+        Sort the flows topologically.
+
+        Returns
+        -------
+        list[str]
+
+        Raises
+        ------
+        CircularReferenceError
+            If flows refer to each other.
+        """
+        dependencies = self.dependencies()
+        order = []
+        remaining = dict((name, set(names)) for name, names in dependencies.items())
+        while len(remaining) > 0:
+            ready = [name for name, names in remaining.items() if len(names) == 0]
+            if len(ready) == 0:
+                raise CircularReferenceError(names=list(remaining.keys()))
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for names in remaining.values():
+                names.difference_update(ready)
+
+        return order
+
+    def consumers(self) -> dict[str, list[str]]:
+        consumers = dict((name, []) for name in self.sources.keys())
+        for name, names in self.dependencies().items():
+            for _name in names:
+                consumers[_name].append(name)
+        return consumers
+
+    def create_executor(self) -> Executor:
+        if self.executor == "process":
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def run(self, outputs: Optional[list[type[BaseFlow]]] = None) -> dict[str, BaseFlow]:
+        """
+        Run all flows.
+
+        Parameters
+        ----------
+        outputs: Optional[list[type[BaseFlow]]]
+            Flows to be returned. The others are freed as soon as no flow needs them.
+            If None, the flows no other flow refers to are returned.
+
+        Returns
+        -------
+        dict[str, BaseFlow]
+            Key is a class name of the flow.
+        """
+        order = self.order()
+        dependencies = self.dependencies()
+        consumers = self.consumers()
+        if outputs is None:
+            keep = set(name for name, names in consumers.items() if len(names) == 0)
+        else:
+            keep = set(flow_class.__name__ for flow_class in outputs)
+
+        results: dict[str, Union[BaseFlow, SharedFlow]] = {}
+        waiting = dict((name, len(names)) for name, names in consumers.items())
+        submitted: set[str] = set()
+        running: dict[Future, str] = {}
+
+        with self.create_executor() as executor:
+
+            def submit_ready() -> None:
+                for name in order:
+                    if name in submitted:
+                        continue
+                    if not all(_name in results for _name in dependencies[name]):
+                        continue
+                    flow_class, data = self.sources[name]
+                    reference = [results[_name] for _name in dependencies[name]]
+                    if self.shared_memory:
+                        future = executor.submit(run_shared_flow, flow_class, data, reference, self.shared_dir)
+                    else:
+                        future = executor.submit(run_flow, flow_class, data, reference)
+                    running[future] = name
+                    submitted.add(name)
+
+            try:
+                submit_ready()
+                while len(running) > 0:
+                    done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        results[name] = future.result()
+                        for _name in dependencies[name]:
+                            waiting[_name] -= 1
+                            if waiting[_name] == 0 and _name not in keep:
+                                self.free(results.pop(_name))
+                        if len(consumers[name]) == 0 and name not in keep:
+                            self.free(results.pop(name))
+                    submit_ready()
+            except BaseException:
+                # Free the results published to shared memory, including the ones of the running flows.
+                for future in running:
+                    if not future.cancel() and future.exception() is None:
+                        self.free(future.result())
+                for result in results.values():
+                    self.free(result)
+                raise
+
+        return dict((name, self.attach(result)) for name, result in results.items())
+
+    @staticmethod
+    def free(result: Union[BaseFlow, SharedFlow]) -> None:
+        if isinstance(result, SharedFlow):
+            result.unlink()
+
+    @staticmethod
+    def attach(result: Union[BaseFlow, SharedFlow]) -> BaseFlow:
+        if not isinstance(result, SharedFlow):
+            return result
+        # The mapping stays valid after the file is removed.
+        flow = result.attach()
+        result.unlink()
+        return flow
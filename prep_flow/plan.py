@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from prep_flow import arrow
+from prep_flow.decorators import CACHE_KEY, CREATOR_KEY, FILTER_KEY, MODIFIER_KEY
+from prep_flow.expressions import Dtype, String
+from prep_flow.join import is_lookup_join
+from prep_flow.memory import format_size, memory_usage
+from prep_flow.statistics import is_sorted
+
+if TYPE_CHECKING:
+    import pyarrow
+
+    from prep_flow.base import BaseFlow, FlowData
+
+Schema = Union[dict[str, Any], "pyarrow.Schema"]
+
+# Bytes per row assumed for a column whose values are not known before the flow runs.
+DEFAULT_VALUE_SIZE = 8
+
+
+class Estimate:
+    """
+    Estimated rows and bytes of the data after a stage.
+
+    bound is "=" for an exact number of rows, "<=" for an upper bound and ">=" for a lower bound.
+    rows is None if it can't be estimated.
+    """
+
+    def __init__(self, rows: Optional[int], row_size: float, bound: str = "=") -> None:
+        self.rows = rows
+        self.row_size = row_size
+        self.bound = bound
+
+    def __str__(self) -> str:
+        if self.rows is None:
+            return "rows=?, bytes=?"
+        return f"rows{self.bound}{self.rows}, bytes{self.bound}{format_size(int(self.bytes))}"
+
+    def __repr__(self) -> str:
+        return f"Estimate({self})"
+
+    @property
+    def bytes(self) -> Optional[float]:
+        return None if self.rows is None else self.rows * self.row_size
+
+    def widen(self, size: float) -> Estimate:
+        return Estimate(self.rows, self.row_size + size, self.bound)
+
+    def filtered(self) -> Estimate:
+        if self.bound == ">=":
+            return Estimate(None, self.row_size)
+        return Estimate(self.rows, self.row_size, "<=")
+
+    def joined(self, how: str, unique: bool, size: float) -> Estimate:
+        """
+        Estimate the rows after joining reference data.
+
+        Parameters
+        ----------
+        how: str
+            "left", "inner" or "full".
+        unique: bool
+            Whether the keys of the reference data are unique.
+        size: float
+            Bytes per row of the joined columns.
+
+        Returns
+        -------
+        Estimate
+        """
+        row_size = self.row_size + size
+        if how == "left" and unique:
+            return Estimate(self.rows, row_size, self.bound)
+        if how == "inner" and unique and self.bound != ">=":
+            return Estimate(self.rows, row_size, "<=")
+        if how in ["left", "full"] and self.bound != "<=":
+            return Estimate(self.rows, row_size, ">=")
+        return Estimate(None, row_size)
+
+
+class Stage:
+    def __init__(self, name: str, steps: list[str], estimate: Optional[Estimate] = None) -> None:
+        self.name = name
+        self.steps = steps
+        self.estimate = estimate
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, steps={len(self.steps)})"
+
+    def __str__(self) -> str:
+        header = self.name if self.estimate is None else f"{self.name} [{self.estimate}]"
+        return "\n".join([header] + [f"  - {step}" for step in self.steps])
+
+
+class ExecutionPlan:
+    """
+    Resolved execution plan of a flow, which is rendered by str().
+    """
+
+    def __init__(self, flow_name: str, stages: list[Stage]) -> None:
+        self.flow_name = flow_name
+        self.stages = stages
+
+    def __repr__(self) -> str:
+        return f"ExecutionPlan({self.flow_name}, stages={[stage.name for stage in self.stages]})"
+
+    def __str__(self) -> str:
+        return "\n".join([f"ExecutionPlan of {self.flow_name}"] + [str(stage) for stage in self.stages])
+
+    def stage(self, name: str) -> Stage:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+
+def schema_frame(schema: Schema) -> pd.DataFrame:
+    # An empty frame with the dtypes of the schema.
+    if isinstance(schema, dict):
+        return pd.DataFrame({str(column): pd.Series(dtype=dtype) for column, dtype in schema.items()})
+    return arrow.from_arrow(schema.empty_table())
+
+
+def is_schema(data: Any) -> bool:
+    if isinstance(data, dict):
+        return True
+    pa = sys.modules.get("pyarrow")
+    return pa is not None and isinstance(data, pa.Schema)
+
+
+def value_size(series: pd.Series) -> float:
+    if len(series) > 0:
+        return series.memory_usage(index=False, deep=True) / len(series)
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM":
+        return series.dtype.itemsize
+    return DEFAULT_VALUE_SIZE
+
+
+def is_noop_cast(source: Any, target: str, dtype: Dtype) -> bool:
+    """
+    Whether casting a column of the source dtype leaves it as it is.
+
+    Parameters
+    ----------
+    source: Any
+        Dtype of the column, or None if it is not known.
+    target: str
+    dtype: Dtype
+
+    Returns
+    -------
+    bool
+    """
+    if source is None:
+        return False
+    if dtype == String:
+        # Casting to str converts the values in object columns.
+        return target == "string" and source == "string"
+    try:
+        target_dtype = pd.api.types.pandas_dtype(target)
+        if source != target_dtype:
+            return False
+        # Targets holding NaN for another dtype, e.g. float64 for Integer, still convert the values.
+        return target_dtype == pd.api.types.pandas_dtype(dtype.name) or isinstance(
+            target_dtype, pd.api.extensions.ExtensionDtype
+        )
+    except TypeError:
+        return False
+
+
+def validation_steps(flow: BaseFlow, nullable: dict, datetime: dict, regexp: dict, category: dict) -> list[str]:
+    steps = []
+    if nullable:
+        steps.append(f"nullable: {', '.join(nullable.keys())}")
+    if datetime:
+        steps.append(f"datetime: {', '.join(datetime.keys())}")
+    for column, condition in regexp.items():
+        steps.append(f"regexp: {column} ~ {condition['regexp']}")
+    for column, condition in category.items():
+        steps.append(f"category: {column} in {len(condition['category'])} values (hash lookup)")
+    if steps and flow.validator.policy is not None:
+        steps.append(f"policy: {flow.validator.policy!r}")
+    return steps
+
+
+def cast_steps(flow: BaseFlow, dtypes: dict[str, Dtype], known: dict[str, Any]) -> list[str]:
+    """
+    Describe the casts, and update the known dtypes of the columns.
+
+    Parameters
+    ----------
+    flow: BaseFlow
+    dtypes: dict[str, Dtype]
+        Dtypes the columns are cast to.
+    known: dict[str, Any]
+        Dtypes of the columns, or None for the columns whose dtypes are not known.
+
+    Returns
+    -------
+    list[str]
+    """
+    steps = []
+    for column, dtype in dtypes.items():
+        source = known.get(column)
+        has_null = column in flow.data.columns and bool(flow.data[column].isna().any())
+        target = flow.cast_target(dtype, has_null)
+        if column in flow.data.columns and arrow.is_arrow_series(flow.data[column]):
+            steps.append(f"{column}: {source} -> {dtype.name} (arrow)")
+            known[column] = None
+            continue
+
+        if is_noop_cast(source, target, dtype):
+            steps.append(f"{column}: {source} -> {target} (no-op)")
+        else:
+            via = "duckdb" if flow.engine is not None else "vectorized"
+            steps.append(f"{column}: {'?' if source is None else source} -> {target} ({via})")
+        known[column] = pd.api.types.pandas_dtype(target) if dtype != String else None
+    return steps
+
+
+def cached(flow_class: type[BaseFlow], attr: str) -> str:
+    depends_on = getattr(vars(flow_class)[attr], CACHE_KEY, None)
+    return "" if depends_on is None else f" (cached by {', '.join(depends_on)})"
+
+
+def join_strategy(flow: BaseFlow, how: str, on: list[str], reference_data: Optional[BaseFlow]) -> str:
+    if flow.engine is not None:
+        return "duckdb join"
+    budget = flow.memory_budget()
+    if budget is not None:
+        return f"partitioned hash join within {format_size(budget)}"
+    if reference_data is not None and is_lookup_join(how, on, reference_data.key_statistics(on)):
+        return "lookup join"
+    if reference_data is not None and len(on) == 1 and is_sorted(reference_data.data[on[0]]):
+        return f"sorted merge join if the data is sorted by {on[0]}, otherwise hash join"
+    return "hash join"
+
+
+def explain(
+    flow_class: type[BaseFlow],
+    data: Optional[Union[FlowData, Schema]] = None,
+    reference: Optional[list[BaseFlow]] = None,
+) -> ExecutionPlan:
+    """
+    Resolve the execution plan of a flow without running it.
+
+    Parameters
+    ----------
+    flow_class: type[BaseFlow]
+    data: Optional[Union[FlowData, Schema]]
+        The input data, or its schema as a dict of column names and dtypes or a pyarrow.Schema.
+        Rows and bytes are estimated only from the input data.
+    reference: Optional[list[BaseFlow]]
+        Reference flows, used to estimate the joins.
+
+    Returns
+    -------
+    ExecutionPlan
+    """
+    if data is None:
+        frame, rows = pd.DataFrame(), None
+    elif is_schema(data):
+        frame, rows = schema_frame(data), None
+    else:
+        frame = flow_class.parse_data(data)
+        rows = len(frame)
+
+    flow = flow_class.from_data(frame, reference)
+    flow.rename()
+    known: dict[str, Any] = dict((column, flow.data[column].dtype) for column in flow.data.columns)
+    row_size = float(sum(value_size(flow.data[column]) for column in flow.data.columns))
+    estimate = Estimate(rows, row_size)
+    if rows is not None and rows > 0:
+        estimate = Estimate(rows, memory_usage(flow.data) / rows)
+
+    stages = []
+
+    steps = []
+    definitions = flow_class.definitions()
+    for column in flow.columns(only_base=True):
+        if definitions[column].name is not None:
+            steps.append(f"rename {definitions[column].name} -> {column}")
+    if data is not None:
+        missing = [column for column in flow.columns(only_base=True) if column not in flow.data.columns]
+        if missing:
+            steps.append(f"missing columns: {', '.join(missing)}")
+    if not flow_class.__strict_mode__:
+        steps.append("keep columns without definitions")
+    if arrow.is_arrow_dataset(data):
+        # The dataset was read with the filters pushed down.
+        remaining = flow_class.pushdown_filters()[1]
+        for predicate in flow_class.__filters__:
+            pushed = not any(predicate is _predicate for _predicate in remaining)
+            steps.append(f"filter {predicate!r}{' (pushed down)' if pushed else ''}")
+    else:
+        remaining = flow_class.__filters__
+        for predicate in remaining:
+            steps.append(f"filter {predicate!r}")
+    if remaining:
+        estimate = estimate.filtered()
+    stages.append(Stage("read", steps, estimate))
+
+    stages.append(
+        Stage(
+            "pre_validate",
+            validation_steps(
+                flow,
+                flow.original_is_nullable_columns(),
+                flow.original_is_datetime_columns(),
+                flow.original_regexp_columns(),
+                flow.original_category_columns(),
+            ),
+        )
+    )
+    stages.append(Stage("pre_cast", cast_steps(flow, flow.original_dtype_dict(), known)))
+
+    decorators = flow_class.get_decorators()
+    reference_columns = flow_class.reference_columns()
+    for order in flow.orders():
+        steps = []
+        for column in flow.modifier_columns(order=order):
+            steps.append(f"modify {column} with Column.modifier")
+            known[column] = None
+        for attr, (decorator_key, column, _order) in decorators.items():
+            if decorator_key == MODIFIER_KEY and _order == order and column not in reference_columns:
+                steps.append(f"modify {column} with {attr}{cached(flow_class, attr)}")
+                known[column] = None
+        for attr, (decorator_key, column, _order) in decorators.items():
+            if decorator_key == CREATOR_KEY and _order == order:
+                steps.append(f"create {column} with {attr}{cached(flow_class, attr)}")
+                known[column] = None
+                estimate = estimate.widen(DEFAULT_VALUE_SIZE)
+        for attr, (decorator_key, _, _order) in decorators.items():
+            if decorator_key == FILTER_KEY and _order == order:
+                steps.append(f"filter with {attr}")
+                estimate = estimate.filtered()
+
+        for _class_name, _columns, _how, _on, _order in flow_class.get_reference_info():
+            if _order != order:
+                continue
+            reference_data = flow.find_reference(_class_name)
+            strategy = join_strategy(flow, "outer" if _how == "full" else _how, list(_on), reference_data)
+            step = f"join {_class_name} {_how} on {', '.join(_on)}: {', '.join(_columns)} ({strategy})"
+            if reference_data is None:
+                estimate = estimate.joined(_how, False, DEFAULT_VALUE_SIZE * len(_columns))
+                for column in _columns:
+                    known[column] = None
+            else:
+                right = reference_data.project(list(_columns) + list(_on))
+                unique = not right.duplicated(subset=list(_on)).any()
+                step += f", reference rows={len(right)}{', unique keys' if unique else ''}"
+                estimate = estimate.joined(_how, unique, sum(value_size(right[column]) for column in _columns))
+                for column in _columns:
+                    known[column] = right[column].dtype
+            steps.append(step)
+
+        for column in flow.modifier_reference_columns(order=order):
+            steps.append(f"modify {column} with ReferenceColumn.modifier")
+            known[column] = None
+        for attr, (decorator_key, column, _order) in decorators.items():
+            if decorator_key == MODIFIER_KEY and _order == order and column in reference_columns:
+                steps.append(f"modify {column} with {attr}{cached(flow_class, attr)}")
+                known[column] = None
+        stages.append(Stage(f"order {order}", steps, estimate))
+
+    stages.append(
+        Stage(
+            "post_validate",
+            validation_steps(
+                flow,
+                flow.is_nullable_columns(),
+                flow.is_datetime_columns(),
+                flow.regexp_columns(),
+                flow.category_columns(),
+            ),
+        )
+    )
+    steps = cast_steps(flow, flow.dtype_dict(), known)
+    if flow_class.__optimize_dtypes__:
+        steps.append("narrow dtypes with the column statistics")
+    stages.append(Stage("post_cast", steps))
+
+    steps = []
+    # Only object columns can hold None.
+    object_columns = [column for column in flow.columns() if known.get(column) is None or known[column] == object]
+    if flow_class.__replace_none_to_nan__ and object_columns:
+        steps.append(f"replace None with NaN: {', '.join(object_columns)}")
+    if flow_class.__categorical_output__ and flow.category_columns():
+        steps.append(f"categorical: {', '.join(flow.category_columns().keys())}")
+    steps.append(f"columns: {', '.join(flow.columns())}")
+    stages.append(Stage("output", steps, estimate))
+
+    return ExecutionPlan(flow_class.__name__, stages)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+VALIDATION_CHECKS = ["nullable", "datetime", "regexp", "category"]
+
+
+class ValidationPolicy(BaseModel):
+    """
+    Decide which rows are validated.
+
+    mode is one of "full", "sample" and "head".
+    "sample" validates a random sample of n rows (or frac of the rows) and "head" validates the first ones.
+    checks overrides the policy per check type, keyed by "nullable", "datetime", "regexp" or "category".
+    """
+
+    mode: str = Field(default="full")
+    n: Optional[int] = Field(default=None)
+    frac: Optional[float] = Field(default=None)
+    random_state: Optional[int] = Field(default=None)
+    checks: dict[str, ValidationPolicy] = Field(default_factory=dict)
+
+    @field_validator("mode")
+    def validate_mode(cls, v: Any) -> str:  # noqa
+        if v not in ["full", "sample", "head"]:
+            raise ValueError(f"Expected full, sample or head, got {v}")
+
+        return v
+
+    @field_validator("checks")
+    def validate_checks(cls, v: dict[str, ValidationPolicy]) -> dict[str, ValidationPolicy]:  # noqa
+        for check in v.keys():
+            if check not in VALIDATION_CHECKS:
+                raise ValueError(f"Expected {', '.join(VALIDATION_CHECKS)}, got {check}")
+
+        return v
+
+    @model_validator(mode="after")
+    def validate_size(self) -> ValidationPolicy:
+        if self.mode == "full":
+            return self
+        if (self.n is None) == (self.frac is None):
+            raise ValueError(f"Specify either n or frac with {self.mode} mode.")
+        if self.n is not None and self.n < 0:
+            raise ValueError(f"Expected n >= 0, got {self.n}")
+        if self.frac is not None and not (0.0 <= self.frac <= 1.0):
+            raise ValueError(f"Expected 0.0 <= frac <= 1.0, got {self.frac}")
+
+        return self
+
+    def for_check(self, check: str) -> ValidationPolicy:
+        return self.checks.get(check, self)
+
+    def positions(self, num_of_rows: int) -> Optional[np.ndarray]:
+        """
+        Get the positions of the rows to be validated.
+
+        Parameters
+        ----------
+        num_of_rows: int
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Sorted positions, or None if all rows are validated.
+        """
+        if self.mode == "full":
+            return None
+
+        size = self.n if self.n is not None else int(num_of_rows * self.frac)
+        if size >= num_of_rows:
+            return None
+
+        if self.mode == "head":
+            return np.arange(size)
+
+        rng = np.random.default_rng(self.random_state)
+        return np.sort(rng.choice(num_of_rows, size=size, replace=False))
+
+    def describe(self, size: int, num_of_rows: int) -> str:
+        if self.mode == "head":
+            return f"first {size} of {num_of_rows} rows"
+
+        return f"random sample of {size} of {num_of_rows} rows"
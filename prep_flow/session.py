@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Union
+
+from prep_flow.base import BaseFlow, FlowData
+from prep_flow.errors import ReferenceDataNotFoundError
+
+FlowSource = Union[FlowData, Callable[[], FlowData]]
+
+
+class FlowSession:
+    """
+    Build reference flows lazily, once, and share them across the flows referring to them.
+    """
+
+    def __init__(self) -> None:
+        self.sources: dict[str, tuple[type[BaseFlow], FlowSource]] = {}
+        self.flows: dict[str, BaseFlow] = {}
+        self.lock = threading.RLock()
+
+    def register(self, flow_class: type[BaseFlow], data: FlowSource) -> None:
+        """
+        Register a flow and its data.
+
+        Parameters
+        ----------
+        flow_class: type[BaseFlow]
+        data: FlowSource
+            FlowData, or a callable returning it, which is called when first needed.
+        """
+        flow_class.set_class_name_to_columns()
+        with self.lock:
+            self.sources[flow_class.__name__] = (flow_class, data)
+            self.flows.pop(flow_class.__name__, None)
+
+    def get(self, flow_class: Union[type[BaseFlow], str]) -> BaseFlow:
+        """
+        Get the registered flow, building it and its references at the first call.
+
+        Parameters
+        ----------
+        flow_class: Union[type[BaseFlow], str]
+            Flow class or its name.
+
+        Returns
+        -------
+        BaseFlow
+
+        Raises
+        ------
+        ReferenceDataNotFoundError
+            If the flow is not registered.
+        """
+        name = flow_class if isinstance(flow_class, str) else flow_class.__name__
+        with self.lock:
+            if name not in self.flows:
+                if name not in self.sources:
+                    raise ReferenceDataNotFoundError(name=name)
+                _flow_class, data = self.sources[name]
+                self.flows[name] = self.run(_flow_class, data() if callable(data) else data)
+            return self.flows[name]
+
+    def references(self, flow_class: type[BaseFlow]) -> list[BaseFlow]:
+        """
+        Get the flows referred to by flow_class, building them if necessary.
+
+        Parameters
+        ----------
+        flow_class: type[BaseFlow]
+
+        Returns
+        -------
+        list[BaseFlow]
+        """
+        names = dict.fromkeys(_class_name for _class_name, _, _, _, _ in flow_class.get_reference_info())
+        return [self.get(name) for name in names]
+
+    def run(self, flow_class: type[BaseFlow], data: FlowData, **kwargs: Any) -> BaseFlow:
+        """
+        Run flow_class with the shared reference flows.
+
+        Parameters
+        ----------
+        flow_class: type[BaseFlow]
+        data: FlowData
+        kwargs: Any
+            Passed to flow_class.
+
+        Returns
+        -------
+        BaseFlow
+        """
+        return flow_class(data, reference=self.references(flow_class), **kwargs)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.flows.clear()
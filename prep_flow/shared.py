@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import uuid
+from typing import TYPE_CHECKING, Optional
+
+from prep_flow import arrow
+from prep_flow.memory import remove_quietly
+from prep_flow.statistics import from_metadata, to_metadata
+
+if TYPE_CHECKING:
+    from prep_flow.base import BaseFlow
+
+SHARED_MEMORY_DIR = "/dev/shm"
+
+
+def default_directory() -> str:
+    # Files in /dev/shm stay in memory, and are mapped by other processes without copying.
+    if os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return SHARED_MEMORY_DIR
+    return tempfile.gettempdir()
+
+
+class SharedFlow:
+    """
+    Lightweight, picklable handle of a flow result published as an Arrow IPC file in shared memory.
+
+    Other processes attach to the result by memory-mapping the file, without copying or unpickling the data.
+    The publisher owns the file, and removes it with unlink.
+    """
+
+    def __init__(self, flow_class: type[BaseFlow], path: str) -> None:
+        self.flow_class = flow_class
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f"SharedFlow({self.flow_class.__name__}, {self.path!r})"
+
+    @classmethod
+    def publish(
+        cls,
+        flow: BaseFlow,
+        columns: Optional[list[str]] = None,
+        directory: Optional[str] = None,
+    ) -> SharedFlow:
+        """
+        Publish the data of the flow.
+
+        Parameters
+        ----------
+        flow: BaseFlow
+        columns: Optional[list[str]]
+            Columns to be published, e.g. the columns other flows merge. If None, all columns are published.
+        directory: Optional[str]
+            Defaults to /dev/shm, or the temporary directory if it is not available.
+
+        Returns
+        -------
+        SharedFlow
+        """
+        data = flow.data if columns is None else flow.project(columns)
+        directory = default_directory() if directory is None else directory
+        path = os.path.join(directory, f"prep_flow_{flow.__class__.__name__}_{uuid.uuid4().hex}.arrow")
+        dictionary_columns = [column for column in flow.category_columns().keys() if column in data.columns]
+        try:
+            statistics = dict(
+                (column, flow.statistics[column]) for column in data.columns if column in flow.statistics
+            )
+            arrow.write_ipc(data, path, dictionary_columns, to_metadata(statistics))
+        except Exception:
+            remove_quietly(path)
+            raise
+        return cls(flow.__class__, path)
+
+    def attach(self, columns: Optional[list[str]] = None) -> BaseFlow:
+        """
+        Attach to the published data without copying it. Columns are backed by Arrow arrays in shared memory.
+
+        Parameters
+        ----------
+        columns: Optional[list[str]]
+            Columns to be attached. If None, all published columns are attached.
+
+        Returns
+        -------
+        BaseFlow
+            A flow which is not executed again, and can be used as reference data.
+        """
+        flow = self.flow_class.from_data(arrow.read_ipc(self.path, columns))
+        flow.statistics = from_metadata(arrow.read_ipc_metadata(self.path), columns)
+        return flow
+
+    def unlink(self) -> None:
+        """
+        Remove the published data. Processes which already attached to it keep their mapping.
+        """
+        remove_quietly(self.path)
+
+
+def reference_columns(flow_class: type[BaseFlow], reference_class_name: str) -> list[str]:
+    """
+    Get the columns of the reference data which flow_class merges.
+
+    Parameters
+    ----------
+    flow_class: type[BaseFlow]
+    reference_class_name: str
+
+    Returns
+    -------
+    list[str]
+    """
+    columns: list[str] = []
+    for _class_name, _columns, _, _on, _ in flow_class.get_reference_info():
+        if _class_name == reference_class_name:
+            columns.extend(list(_columns) + list(_on))
+    return list(dict.fromkeys(columns))
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+# Key of the statistics in the metadata of Arrow schemas.
+STATISTICS_KEY = b"prep_flow.statistics"
+# Number of the smallest hashes kept to estimate the number of distinct values.
+SKETCH_SIZE = 1024
+# Columns whose estimated distinct values are at least this ratio of the rows may be unique.
+UNIQUE_RATIO = 0.9
+# String columns whose distinct values are at most this ratio of the non-null values are encoded as pd.Categorical.
+CATEGORICAL_RATIO = 0.5
+INTEGER_WIDTHS = [8, 16, 32]
+
+
+class ColumnStatistics:
+    """
+    Statistics of a column, recorded by the validation checks which scan it, see StatisticsCollector.
+
+    distinct is exact for strings and up to SKETCH_SIZE distinct values,
+    and estimated from the smallest hashes of the values above it.
+    minimum and maximum are None if the values can't be compared,
+    and max_length is None unless the values are strings.
+    is_sorted is True if the values are sorted in ascending order without nulls.
+    """
+
+    def __init__(
+        self,
+        dtype: str,
+        rows: int,
+        null_count: int,
+        distinct: Optional[int],
+        minimum: Any = None,
+        maximum: Any = None,
+        max_length: Optional[int] = None,
+        is_sorted: bool = False,
+    ) -> None:
+        self.dtype = dtype
+        self.rows = rows
+        self.null_count = null_count
+        self.distinct = distinct
+        self.minimum = minimum
+        self.maximum = maximum
+        self.max_length = max_length
+        self.is_sorted = is_sorted
+
+    def __repr__(self) -> str:
+        return (
+            f"ColumnStatistics(dtype={self.dtype}, rows={self.rows}, null_count={self.null_count}, "
+            f"distinct={self.distinct}, minimum={self.minimum!r}, maximum={self.maximum!r}, "
+            f"max_length={self.max_length}, is_sorted={self.is_sorted})"
+        )
+
+    def may_be_unique(self) -> bool:
+        if self.distinct is None:
+            return False
+        return self.distinct >= (self.rows - self.null_count) * UNIQUE_RATIO
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "dtype": self.dtype,
+            "rows": self.rows,
+            "null_count": self.null_count,
+            "distinct": self.distinct,
+            "minimum": json_value(self.minimum),
+            "maximum": json_value(self.maximum),
+            "max_length": self.max_length,
+            "is_sorted": self.is_sorted,
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict[str, Any]) -> ColumnStatistics:
+        statistics = cls(**values)
+        if is_datetime_dtype(statistics.dtype):
+            statistics.minimum = None if statistics.minimum is None else pd.Timestamp(statistics.minimum)
+            statistics.maximum = None if statistics.maximum is None else pd.Timestamp(statistics.maximum)
+        return statistics
+
+
+def is_datetime_dtype(dtype: str) -> bool:
+    return dtype.startswith("datetime64") or dtype.startswith("timestamp")
+
+
+def json_value(value: Any) -> Any:
+    # Values which can't be written as JSON are not stored.
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return None
+
+
+def estimate_distinct(series: pd.Series) -> int:
+    """
+    Estimate the number of distinct non-null values from the SKETCH_SIZE smallest hashes of the values.
+
+    Parameters
+    ----------
+    series: pd.Series
+        Non-null values.
+
+    Returns
+    -------
+    int
+
+    Raises
+    ------
+    TypeError
+        If the values can't be hashed, e.g. lists.
+    """
+    hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    size = SKETCH_SIZE
+    while size < hashes.shape[0]:
+        threshold = np.partition(hashes, size - 1)[size - 1]
+        smallest = np.unique(hashes[hashes <= threshold])
+        if smallest.shape[0] >= SKETCH_SIZE:
+            # The k-th smallest of uniformly distributed hashes is about k / distinct of the range of the hashes.
+            return int(round((SKETCH_SIZE - 1) * 2.0**64 / (float(smallest[SKETCH_SIZE - 1]) + 1)))
+        # Many duplicates among the smallest hashes.
+        size *= 4
+    return int(pd.unique(hashes).shape[0])
+
+
+def max_string_length(values: pd.Series) -> Optional[int]:
+    if values.shape[0] == 0 or pd.api.types.infer_dtype(values, skipna=True) != "string":
+        return None
+    return int(values.str.len().max())
+
+
+def is_sorted(series: pd.Series) -> bool:
+    # Only numpy dtypes are compared by the sorted merge join. The check stops at the first descending pair.
+    if not isinstance(series.dtype, np.dtype):
+        return False
+    # Missing keys can't be compared with the others, so they are left to the hash join.
+    if series.hasnans:
+        return False
+    try:
+        return bool(series.is_monotonic_increasing)
+    except TypeError:
+        return False
+
+
+def column_statistics(
+    series: pd.Series, null_count: Optional[int] = None, distinct_values: Optional[pd.Index] = None
+) -> ColumnStatistics:
+    """
+    Collect the statistics of a column with vectorized scans.
+
+    Strings are hashed once to find their distinct values, and the minimum, the maximum and the max length
+    are taken from the distinct values.
+
+    Parameters
+    ----------
+    series: pd.Series
+    null_count: Optional[int]
+        Number of nulls, if the caller already counted them.
+    distinct_values: Optional[pd.Index]
+        Distinct non-null values, if the caller already found them, e.g. the categories found in the values.
+
+    Returns
+    -------
+    ColumnStatistics
+    """
+    if null_count is None:
+        null_count = int(series.isna().sum())
+    values = series.dropna() if null_count > 0 and distinct_values is None else series
+    distinct: Optional[int] = None
+    max_length = None
+    if distinct_values is not None:
+        values = pd.Series(distinct_values)
+        distinct = values.shape[0]
+        max_length = max_string_length(values)
+    elif pd.api.types.is_string_dtype(series.dtype):
+        try:
+            values = pd.Series(pd.unique(values))
+            distinct = values.shape[0]
+            max_length = max_string_length(values)
+        except TypeError:
+            # Unhashable values, e.g. lists.
+            pass
+    else:
+        try:
+            distinct = estimate_distinct(values)
+        except TypeError:
+            pass
+
+    minimum, maximum = None, None
+    if values.shape[0] > 0:
+        try:
+            minimum, maximum = values.min(), values.max()
+        except TypeError:
+            # Values of different types.
+            pass
+    return ColumnStatistics(
+        dtype=str(series.dtype),
+        rows=int(series.shape[0]),
+        null_count=null_count,
+        distinct=distinct,
+        minimum=minimum.item() if isinstance(minimum, np.generic) else minimum,
+        maximum=maximum.item() if isinstance(maximum, np.generic) else maximum,
+        max_length=max_length,
+        is_sorted=is_sorted(series),
+    )
+
+
+class StatisticsCollector:
+    """
+    Collect the statistics of the columns scanned by the validation checks, from what the checks find.
+
+    The checks of non-nullable columns find that they have no nulls, and the category checks find the category
+    of each value, so the distinct values, the minimum, the maximum and the max length of the category columns
+    are taken from the categories found, without hashing and comparing the values again.
+    """
+
+    def __init__(self) -> None:
+        # Null counts of the columns scanned by the checks, or None if the checks don't tell them.
+        self.null_counts: dict[str, Optional[int]] = {}
+        # Categories found in the values of the category columns.
+        self.categories: dict[str, pd.Index] = {}
+
+    def add(self, column: str, null_count: Optional[int] = None) -> None:
+        """
+        Record a column scanned by a check.
+
+        Parameters
+        ----------
+        column: str
+        null_count: Optional[int]
+            Number of nulls, if the check tells it, e.g. 0 for non-nullable columns.
+        """
+        if self.null_counts.get(column) is None:
+            self.null_counts[column] = null_count
+
+    def add_categories(self, column: str, codes: np.ndarray, category: pd.Index) -> None:
+        """
+        Record a column whose values were looked up in its category.
+
+        Parameters
+        ----------
+        column: str
+        codes: np.ndarray
+            Positions of the values in the category, or -1 for nulls.
+        category: pd.Index
+            Unique categories.
+        """
+        self.add(column)
+        found = np.bincount(codes[codes >= 0], minlength=category.shape[0]) > 0
+        self.categories[column] = category[found]
+
+    def collect(self, data: pd.DataFrame, columns: Optional[list[str]] = None) -> dict[str, ColumnStatistics]:
+        """
+        Build the statistics of the columns, scanning only what the checks didn't find.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            The data the checks scanned.
+        columns: Optional[list[str]]
+            Columns whose statistics are collected. If None, the columns scanned by the checks.
+
+        Returns
+        -------
+        dict[str, ColumnStatistics]
+        """
+        return dict(
+            (
+                column,
+                column_statistics(data[column], self.null_counts.get(column), self.categories.get(column)),
+            )
+            for column in (self.null_counts.keys() if columns is None else columns)
+            if column in data.columns
+        )
+
+
+def narrowed_dtype(dtype: Any, statistics: ColumnStatistics) -> Optional[str]:
+    """
+    Get a narrower dtype holding the values of a column, from its statistics.
+
+    Parameters
+    ----------
+    dtype: Any
+        The current dtype of the column.
+    statistics: ColumnStatistics
+
+    Returns
+    -------
+    Optional[str]
+        None if the column is kept as it is.
+    """
+    name = str(dtype)
+    if name in ["int64", "Int64"]:
+        # The statistics may have been collected before the values were cast to integers.
+        if not all(type(value) is int for value in [statistics.minimum, statistics.maximum]):
+            return None
+        for width in INTEGER_WIDTHS:
+            info = np.iinfo(f"int{width}")
+            if info.min <= statistics.minimum and statistics.maximum <= info.max:
+                return f"{name[0]}nt{width}"
+        return None
+
+    if name in ["object", "string"] and statistics.max_length is not None and statistics.distinct is not None:
+        if statistics.distinct <= (statistics.rows - statistics.null_count) * CATEGORICAL_RATIO:
+            return "category"
+    return None
+
+
+def to_metadata(statistics: dict[str, ColumnStatistics]) -> dict[bytes, bytes]:
+    """
+    Encode the statistics as metadata of an Arrow schema, so that they are stored with the data.
+
+    Parameters
+    ----------
+    statistics: dict[str, ColumnStatistics]
+
+    Returns
+    -------
+    dict[bytes, bytes]
+    """
+    if not statistics:
+        return {}
+    return {
+        STATISTICS_KEY: json.dumps(
+            dict((column, column_statistics.to_dict()) for column, column_statistics in statistics.items())
+        ).encode()
+    }
+
+
+def from_metadata(
+    metadata: Optional[dict[bytes, bytes]], columns: Optional[list[str]] = None
+) -> dict[str, ColumnStatistics]:
+    """
+    Decode the statistics stored in the metadata of an Arrow schema.
+
+    Parameters
+    ----------
+    metadata: Optional[dict[bytes, bytes]]
+    columns: Optional[list[str]]
+        Columns whose statistics are decoded. If None, the statistics of all columns are decoded.
+
+    Returns
+    -------
+    dict[str, ColumnStatistics]
+    """
+    if not metadata or STATISTICS_KEY not in metadata:
+        return {}
+    values = json.loads(metadata[STATISTICS_KEY])
+    return dict(
+        (column, ColumnStatistics.from_dict(values[column]))
+        for column in (values.keys() if columns is None else columns)
+        if column in values
+    )
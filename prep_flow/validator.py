@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import functools
 import re
-from typing import TypedDict, Union
+from typing import TYPE_CHECKING, Iterable, Optional, TypedDict, Union
 
+import numpy as np
 import pandas as pd
 from pandas._libs.tslibs.parsing import DateParseError  # noqa
 
+from prep_flow import arrow
 from prep_flow.errors import (
+    DataValueError,
     InvalidCategoryFoundError,
     InvalidDateFoundError,
     InvalidDateLiteralFoundError,
@@ -14,6 +18,10 @@ from prep_flow.errors import (
     NecessaryColumnsNotFoundError,
     NullValueFoundError,
 )
+from prep_flow.statistics import StatisticsCollector
+
+if TYPE_CHECKING:
+    from prep_flow.policy import ValidationPolicy
 
 
 class RegexpCondition(TypedDict):
@@ -26,7 +34,79 @@ class CategoryCondition(TypedDict):
     nullable: bool
 
 
+@functools.lru_cache(maxsize=256)
+def category_index(category: tuple[Union[str, int], ...]) -> pd.Index:
+    """
+    Build the hash table of a category once, and share it between flows and runs.
+
+    Parameters
+    ----------
+    category: tuple[Union[str, int], ...]
+
+    Returns
+    -------
+    pd.Index
+        Unique categories.
+    """
+    return pd.Index(list(dict.fromkeys(category)), tupleize_cols=False)
+
+
+def category_codes(series: pd.Series, category: list[Union[str, int]]) -> np.ndarray:
+    """
+    Look up the values in the category with a hash table. Values which are not included get -1.
+
+    Parameters
+    ----------
+    series: pd.Series
+    category: list[Union[str, int]]
+
+    Returns
+    -------
+    np.ndarray
+    """
+    return category_index(tuple(category)).get_indexer(series)
+
+
+def find_category_mismatches(series: pd.Series, codes: Optional[np.ndarray], nullable: bool) -> Iterable[int]:
+    """
+    Find the positions of the values which may not be included in the category, from the codes of the values.
+
+    The candidates are checked again with the operator in by the caller, so the result is the same as a Python loop.
+
+    Parameters
+    ----------
+    series: pd.Series
+    codes: Optional[np.ndarray]
+        Codes looked up by category_codes, or None if the values can't be looked up.
+    nullable: bool
+
+    Returns
+    -------
+    Iterable[int]
+    """
+    if codes is None:
+        # Unhashable values are checked one by one.
+        return range(series.shape[0])
+
+    mismatched = codes < 0
+    if nullable:
+        mismatched &= series.notna().to_numpy()
+    return np.flatnonzero(mismatched)
+
+
+def lookup_category_codes(series: pd.Series, category: list[Union[str, int]]) -> Optional[np.ndarray]:
+    try:
+        return category_codes(series, category)
+    except TypeError:
+        # Unhashable values, e.g. lists.
+        return None
+
+
 class Validator:
+    def __init__(self, policy: Optional[ValidationPolicy] = None) -> None:
+        # The policy is None, if all rows are validated.
+        self.policy = policy
+
     @staticmethod
     def validate_necessary_columns(data: pd.DataFrame, necessary_columns: list[str]) -> None:
         """
@@ -49,7 +129,9 @@ class Validator:
             raise NecessaryColumnsNotFoundError(columns=results)
 
     @staticmethod
-    def validate_nullable(data: pd.DataFrame, conditions: dict[str, bool]) -> None:
+    def validate_nullable(
+        data: pd.DataFrame, conditions: dict[str, bool], statistics: Optional[StatisticsCollector] = None
+    ) -> None:
         """
         Parameters
         ----------
@@ -62,6 +144,8 @@ class Validator:
                 "column_name_2": bool,
                 ...,
             }
+        statistics: Optional[StatisticsCollector]
+            Records the columns checked, if given.
 
         Raises
         ------
@@ -70,9 +154,18 @@ class Validator:
         for column, nullable in conditions.items():
             if nullable:
                 continue
-            for i, target in enumerate(data[column]):
-                if pd.isna(target):
-                    raise NullValueFoundError(column=column, row_number=i + 1, value=target)
+            if arrow.is_arrow_series(data[column]):
+                position = arrow.find_null(data[column])
+                if position is not None:
+                    raise NullValueFoundError(
+                        column=column, row_number=position + 1, value=data[column].iloc[position]
+                    )
+            else:
+                for i, target in enumerate(data[column]):
+                    if pd.isna(target):
+                        raise NullValueFoundError(column=column, row_number=i + 1, value=target)
+            if statistics is not None:
+                statistics.add(column, null_count=0)
 
     @staticmethod
     def validate_datetime(data: pd.DataFrame, conditions: dict[str, bool]) -> None:
@@ -101,6 +194,8 @@ class Validator:
         for column, is_datetime in conditions.items():
             if not is_datetime:
                 continue
+            if arrow.is_arrow_series(data[column]) and arrow.is_datetime_series(data[column]):
+                continue
             for i, target in enumerate(data[column]):
                 try:
                     pd.to_datetime(target)
@@ -111,7 +206,9 @@ class Validator:
                         raise InvalidDateLiteralFoundError(column=column, row_number=i + 1, value=target)
 
     @staticmethod
-    def validate_regexp(data: pd.DataFrame, conditions: dict[str, RegexpCondition]) -> None:
+    def validate_regexp(
+        data: pd.DataFrame, conditions: dict[str, RegexpCondition], statistics: Optional[StatisticsCollector] = None
+    ) -> None:
         """
         Raise an error, if values don't match regular expressions.
 
@@ -125,6 +222,8 @@ class Validator:
                 "column_name_2": {"regexp": "some_regexp", "nullable": bool},
                 ...,
             }
+        statistics: Optional[StatisticsCollector]
+            Records the columns checked, if given.
 
         Raises
         ------
@@ -132,6 +231,21 @@ class Validator:
             If values don't match regular expressions.
         """
         for column, condition in conditions.items():
+            if arrow.is_arrow_series(data[column]):
+                try:
+                    position = arrow.find_regexp_mismatch(data[column], condition["regexp"], condition["nullable"])
+                    if position is not None:
+                        raise InvalidRegexpFoundError(
+                            column=column,
+                            row_number=position + 1,
+                            value=data[column].iloc[position],
+                            regexp=condition["regexp"],
+                        )
+                    if statistics is not None:
+                        statistics.add(column)
+                    continue
+                except NotImplementedError:
+                    pass
             for i, target in enumerate(data[column]):
                 if condition["nullable"] and pd.isna(target):
                     continue
@@ -143,9 +257,13 @@ class Validator:
                         value=target,
                         regexp=condition["regexp"],
                     )
+            if statistics is not None:
+                statistics.add(column)
 
     @staticmethod
-    def validate_category(data: pd.DataFrame, conditions: dict[str, CategoryCondition]) -> None:
+    def validate_category(
+        data: pd.DataFrame, conditions: dict[str, CategoryCondition], statistics: Optional[StatisticsCollector] = None
+    ) -> None:
         """
         Raise an error, if the specified category doesn't contain values.
 
@@ -159,6 +277,8 @@ class Validator:
                 "column_name_2": {"category": ["category_1", "category_2", ...], "nullable": bool},
                 ...,
             }
+        statistics: Optional[StatisticsCollector]
+            Records the columns checked and the categories found in them, if given.
 
         Raises
         ------
@@ -166,7 +286,24 @@ class Validator:
             If the specified category doesn't contain values.
         """
         for column, condition in conditions.items():
-            for i, target in enumerate(data[column]):
+            if arrow.is_arrow_series(data[column]):
+                try:
+                    position = arrow.find_category_mismatch(data[column], condition["category"], condition["nullable"])
+                    if position is not None:
+                        raise InvalidCategoryFoundError(
+                            column=column,
+                            row_number=position + 1,
+                            value=data[column].iloc[position],
+                            category=condition["category"],
+                        )
+                    if statistics is not None:
+                        statistics.add(column)
+                    continue
+                except NotImplementedError:
+                    pass
+            codes = lookup_category_codes(data[column], condition["category"])
+            for i in find_category_mismatches(data[column], codes, condition["nullable"]):
+                target = data[column].iloc[i]
                 if condition["nullable"] and pd.isna(target):
                     continue
                 if target not in condition["category"]:
@@ -176,3 +313,47 @@ class Validator:
                         value=target,
                         category=condition["category"],
                     )
+            if statistics is None:
+                continue
+            if codes is None:
+                statistics.add(column)
+            else:
+                statistics.add_categories(column, codes, category_index(tuple(condition["category"])))
+
+    def validate(
+        self, check: str, data: pd.DataFrame, conditions: dict, statistics: Optional[StatisticsCollector] = None
+    ) -> None:
+        """
+        Run validate_{check} on the rows selected by the validation policy.
+
+        Errors raised from a sample keep the row number of the whole data and describe the sample.
+
+        Parameters
+        ----------
+        check: str
+            One of "nullable", "datetime", "regexp" and "category".
+        data: pd.DataFrame
+        conditions: dict
+            Passed to validate_{check} as it is.
+        statistics: Optional[StatisticsCollector]
+            Passed to validate_{check}, unless the rows are sampled, as a sample doesn't tell the statistics.
+            The datetime check doesn't take it.
+        """
+        validate = getattr(self, f"validate_{check}")
+        scan = validate if statistics is None else functools.partial(validate, statistics=statistics)
+        if self.policy is None:
+            scan(data, conditions)
+            return
+
+        policy = self.policy.for_check(check)
+        positions = policy.positions(data.shape[0])
+        if positions is None or len(conditions) == 0:
+            scan(data, conditions)
+            return
+
+        try:
+            validate(data[list(conditions.keys())].iloc[positions], conditions)
+        except DataValueError as e:
+            e.sampling = policy.describe(len(positions), data.shape[0])
+            e.row_number = int(positions[e.row_number - 1]) + 1
+            raise
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
+
+import pandas as pd
+
+from prep_flow.errors import SheetNotFoundError
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def read_sheet(path: str, sheet_name: str) -> pd.DataFrame:
+    return pd.read_excel(path, sheet_name=sheet_name)
+
+
+class WorkbookLoader:
+    """
+    Read the sheets of an Excel workbook once and share them between flows.
+
+    Sheets needed by several flows are parsed in one pass (or in parallel worker processes),
+    and cached as Parquet (or pickle, if pyarrow is not installed) keyed by the hash and modification time of the file.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], cache_dir: Optional[str] = None, max_workers: int = 1) -> None:
+        self.path = os.fspath(path)
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.sheets: dict[str, pd.DataFrame] = {}
+        self.lock = threading.Lock()
+        self._key: Optional[str] = None
+        self._sheet_names: Optional[list[str]] = None
+
+    def key(self) -> str:
+        """
+        Identify the content of the file by its hash and modification time.
+
+        Returns
+        -------
+        str
+        """
+        if self._key is None:
+            digest = hashlib.sha256()
+            with open(self.path, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            digest.update(str(os.stat(self.path).st_mtime_ns).encode())
+            self._key = digest.hexdigest()
+        return self._key
+
+    def cache_path(self, name: str, create: bool = False) -> Optional[str]:
+        # The directory is created only to write to the cache, so that reading it has no side effects.
+        if self.cache_dir is None:
+            return None
+        directory = os.path.join(self.cache_dir, self.key())
+        if create:
+            os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, hashlib.sha256(name.encode()).hexdigest()[:16])
+
+    @property
+    def sheet_names(self) -> list[str]:
+        if self._sheet_names is None:
+            path = self.cache_path("__sheet_names__")
+            if path is not None and os.path.exists(path + ".json"):
+                with open(path + ".json") as f:
+                    self._sheet_names = json.load(f)
+            else:
+                with pd.ExcelFile(self.path) as xlsx:
+                    self._sheet_names = list(xlsx.sheet_names)
+                path = self.cache_path("__sheet_names__", create=True)
+                if path is not None:
+                    with open(path + ".json", "w") as f:
+                        json.dump(self._sheet_names, f)
+        return self._sheet_names
+
+    def read_cache(self, sheet_name: str) -> Optional[pd.DataFrame]:
+        path = self.cache_path(sheet_name)
+        if path is None:
+            return None
+        if os.path.exists(path + ".parquet"):
+            return pd.read_parquet(path + ".parquet")
+        if os.path.exists(path + ".pkl"):
+            return pd.read_pickle(path + ".pkl")
+        return None
+
+    def write_cache(self, sheet_name: str, data: pd.DataFrame) -> None:
+        path = self.cache_path(sheet_name, create=True)
+        if path is None:
+            return
+        if importlib.util.find_spec("pyarrow") is not None:
+            try:
+                data.to_parquet(path + ".parquet")
+                return
+            except Exception:
+                # Columns mixing types can't be written as Parquet.
+                if os.path.exists(path + ".parquet"):
+                    os.remove(path + ".parquet")
+        data.to_pickle(path + ".pkl")
+
+    def load(self, sheet_names: list[str]) -> dict[str, pd.DataFrame]:
+        """
+        Read the sheets which are neither loaded nor cached yet, in one pass.
+
+        Parameters
+        ----------
+        sheet_names: list[str]
+
+        Returns
+        -------
+        dict[str, pd.DataFrame]
+
+        Raises
+        ------
+        SheetNotFoundError
+            If the workbook doesn't have a sheet.
+        """
+        with self.lock:
+            for sheet_name in sheet_names:
+                if sheet_name not in self.sheet_names:
+                    raise SheetNotFoundError(sheet=sheet_name)
+
+            missing = []
+            for sheet_name in dict.fromkeys(sheet_names):
+                if sheet_name in self.sheets:
+                    continue
+                cached = self.read_cache(sheet_name)
+                if cached is None:
+                    missing.append(sheet_name)
+                else:
+                    self.sheets[sheet_name] = cached
+
+            if len(missing) == 1 or (len(missing) > 1 and self.max_workers <= 1):
+                parsed = pd.read_excel(self.path, sheet_name=missing)
+            elif len(missing) > 1:
+                with ProcessPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                    parsed = dict(zip(missing, executor.map(read_sheet, [self.path] * len(missing), missing)))
+            else:
+                parsed = {}
+
+            for sheet_name, data in parsed.items():
+                self.write_cache(sheet_name, data)
+                self.sheets[sheet_name] = data
+
+            return dict((sheet_name, self.sheets[sheet_name]) for sheet_name in sheet_names)
+
+    def load_flows(self, flow_classes: list[type]) -> dict[str, pd.DataFrame]:
+        """
+        Read the sheets of the flows in one pass.
+
+        Parameters
+        ----------
+        flow_classes: list[type[BaseFlow]]
+
+        Returns
+        -------
+        dict[str, pd.DataFrame]
+            Key is a sheet name.
+        """
+        return self.load([flow_class.__sheetname__ for flow_class in flow_classes])
+
+    def sheet(self, sheet_name: str) -> pd.DataFrame:
+        """
+        Get a sheet. It is shared between flows, so it must be treated as read-only.
+
+        Parameters
+        ----------
+        sheet_name: str
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        return self.load([sheet_name])[sheet_name]
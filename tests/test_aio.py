@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pandas as pd
+import pytest
+
+from prep_flow import BaseFlow, Column, ReferenceColumn, String, creator, modifier
+
+
+class PrefectureFlow(BaseFlow):
+    prefecture_code = Column(dtype=String)
+    prefecture_name = Column(dtype=String)
+
+
+class MemberFlow(BaseFlow):
+    name = Column(dtype=String)
+    prefecture_code = Column(dtype=String)
+    prefecture_name = ReferenceColumn(column=PrefectureFlow.prefecture_name, how="left", on="prefecture_code")
+    thread = Column(dtype=String)
+
+    @creator("thread")
+    def create_thread(self, data: pd.DataFrame) -> pd.Series:
+        return pd.Series(threading.current_thread().name, index=data.index)
+
+
+async def load_prefecture() -> pd.DataFrame:
+    await asyncio.sleep(0)
+    return pd.DataFrame({"prefecture_code": ["001", "002"], "prefecture_name": ["tokyo", "osaka"]})
+
+
+async def load_members():
+    for names in [["taro", "hanako"], ["jiro"]]:
+        await asyncio.sleep(0)
+        yield pd.DataFrame({"name": names, "prefecture_code": ["001", "002", "001"][: len(names)]})
+
+
+def test_arun():
+    async def main():
+        prefecture = asyncio.create_task(PrefectureFlow.arun(load_prefecture))
+        member = await MemberFlow.arun(load_members(), reference=[prefecture])
+        return member, await prefecture
+
+    member, prefecture = asyncio.run(main())
+    assert prefecture.data["prefecture_name"].tolist() == ["tokyo", "osaka"]
+    assert member.data["name"].tolist() == ["taro", "hanako", "jiro"]
+    assert member.data["prefecture_name"].tolist() == ["tokyo", "osaka", "tokyo"]
+    # The flow runs off the event loop thread.
+    assert member.data["thread"][0] != threading.main_thread().name
+
+
+def test_arun_with_semaphore():
+    running = []
+    max_running = []
+
+    class CountingFlow(BaseFlow):
+        name = Column(dtype=String)
+
+        @modifier("name")
+        def modify_name(self, data: pd.DataFrame) -> pd.Series:
+            running.append(True)
+            max_running.append(len(running))
+            threading.Event().wait(0.01)
+            running.pop()
+            return data["name"]
+
+    async def main():
+        semaphore = asyncio.Semaphore(2)
+        data = pd.DataFrame({"name": ["a"]})
+        return await asyncio.gather(*[CountingFlow.arun(data, semaphore=semaphore) for _ in range(6)])
+
+    flows = asyncio.run(main())
+    assert len(flows) == 6
+    assert max(max_running) <= 2
+
+
+def test_arun_nested_sources():
+    async def open_members():
+        await asyncio.sleep(0)
+        return load_members()
+
+    async def main():
+        prefecture = await PrefectureFlow.arun(asyncio.ensure_future(load_prefecture()))
+        # Async generator functions are called, and awaitables returning async sources are read until the data.
+        members = [
+            await MemberFlow.arun(source, reference=[prefecture])
+            for source in [load_members, open_members, open_members()]
+        ]
+        return prefecture, members
+
+    prefecture, members = asyncio.run(main())
+    assert prefecture.data["prefecture_name"].tolist() == ["tokyo", "osaka"]
+    for member in members:
+        assert member.data["prefecture_name"].tolist() == ["tokyo", "osaka", "tokyo"]
+
+
+def test_async_source_with_init():
+    prefecture = PrefectureFlow(pd.DataFrame({"prefecture_code": ["001"], "prefecture_name": ["tokyo"]}))
+
+    # Only arun reads async sources.
+    for source in [load_prefecture, load_members]:
+        with pytest.raises(TypeError):
+            PrefectureFlow(source)
+        with pytest.raises(TypeError):
+            MemberFlow.run_partitioned(source, reference=[prefecture])
+        with pytest.raises(TypeError):
+            PrefectureFlow.incremental(prefecture, source, key="prefecture_code")
@@ -0,0 +1,161 @@
+import os
+
+import pandas as pd
+import pytest
+
+from prep_flow import (
+    BaseFlow,
+    Col,
+    Column,
+    ColumnCastError,
+    DateTime,
+    Integer,
+    InvalidCategoryFoundError,
+    InvalidRegexpFoundError,
+    NullValueFoundError,
+    ReferenceColumn,
+    String,
+    creator,
+)
+
+pa = pytest.importorskip("pyarrow")
+
+
+class MemberFlow(BaseFlow):
+    id = Column(dtype=String, regexp=r"id_[0-9]+", nullable=False)
+    age = Column(dtype=Integer)
+    gender = Column(dtype=String, category=["man", "woman"])
+    birthday = Column(dtype=DateTime)
+    name = Column(dtype=String, original_nullable=False)
+    name_length = Column(dtype=Integer)
+
+    @creator("name_length")
+    def create_name_length(self, data: pd.DataFrame) -> pd.Series:
+        return data["name"].str.len()
+
+
+def create_table(**columns) -> "pa.Table":
+    data = {
+        "id": ["id_1", "id_2", "id_3"],
+        "age": ["28", None, "40"],
+        "gender": ["man", "woman", None],
+        "birthday": ["1995-10-19", "1998-3-25", None],
+        "name": ["taro", "hanako", "jiro"],
+    }
+    data.update(columns)
+    return pa.table(data)
+
+
+def test_arrow_flow():
+    flow = MemberFlow(create_table())
+
+    assert flow.data["id"].dtype == pd.ArrowDtype(pa.string())
+    assert flow.data["age"].dtype == pd.ArrowDtype(pa.int64())
+    assert flow.data["birthday"].dtype == pd.ArrowDtype(pa.timestamp("ns"))
+    assert flow.data["age"].tolist() == [28, pd.NA, 40]
+    assert flow.data["name_length"].tolist() == [4, 6, 4]
+
+    table = flow.to_arrow()
+    assert isinstance(table, pa.Table)
+    assert table.column_names == ["id", "age", "gender", "birthday", "name", "name_length"]
+    assert table.schema.field("gender").type == pa.string()
+
+
+def test_arrow_validation():
+    with pytest.raises(NullValueFoundError) as e:
+        MemberFlow(create_table(name=["taro", None, "jiro"]))
+    assert e.value.column == "name"
+    assert e.value.row_number == 2
+
+    with pytest.raises(InvalidRegexpFoundError) as e:
+        MemberFlow(create_table(id=["id_1", "id_2", "3_id_"]))
+    assert e.value.row_number == 3
+    assert e.value.value == "3_id_"
+
+    with pytest.raises(InvalidCategoryFoundError) as e:
+        MemberFlow(create_table(gender=["man", "男", None]))
+    assert e.value.row_number == 2
+    assert e.value.value == "男"
+
+    with pytest.raises(ColumnCastError) as e:
+        MemberFlow(create_table(age=["28", "二十六", None]))
+    assert e.value.column == "age"
+
+
+def test_write_and_read(tmp_path):
+    class PrefectureFlow(BaseFlow):
+        prefecture_code = Column(dtype=String)
+        prefecture_name = Column(dtype=String)
+        region = Column(dtype=String, category=["kanto", "kansai"])
+
+    class ShopFlow(BaseFlow):
+        shop = Column(dtype=String)
+        prefecture_code = Column(dtype=String)
+        prefecture_name = ReferenceColumn(column=PrefectureFlow.prefecture_name, how="left", on="prefecture_code")
+
+    prefecture = PrefectureFlow(
+        pd.DataFrame(
+            {
+                "prefecture_code": ["13", "27", "14"],
+                "prefecture_name": ["tokyo", "osaka", "kanagawa"],
+                "region": ["kanto", "kansai", "kanto"],
+            }
+        )
+    )
+    prefecture.to_ipc(str(tmp_path / "prefecture.arrow"))
+    prefecture.to_parquet(str(tmp_path / "prefecture.parquet"))
+    prefecture.to_parquet(str(tmp_path / "prefecture"), partition_cols=["region"])
+
+    ipc = PrefectureFlow.read_ipc(str(tmp_path / "prefecture.arrow"))
+    assert ipc.data["prefecture_name"].tolist() == ["tokyo", "osaka", "kanagawa"]
+    assert ipc.data["region"].dtype == "category"
+    # A flow created from its result has the same state as an executed flow.
+    assert vars(ipc).keys() == vars(prefecture).keys()
+
+    parquet = PrefectureFlow.read_parquet(str(tmp_path / "prefecture.parquet"), columns=["prefecture_code", "region"])
+    assert parquet.data.columns.tolist() == ["prefecture_code", "region"]
+    assert parquet.data["region"].dtype == "category"
+
+    dataset = PrefectureFlow.read_parquet(str(tmp_path / "prefecture"))
+    assert sorted(dataset.data["prefecture_code"].tolist()) == ["13", "14", "27"]
+    assert sorted(os.listdir(tmp_path / "prefecture")) == ["region=kansai", "region=kanto"]
+
+    shop = ShopFlow(pd.DataFrame({"shop": ["a", "b"], "prefecture_code": ["27", "99"]}), reference=[ipc])
+    assert shop.data["prefecture_name"].tolist()[0] == "osaka"
+    assert pd.isna(shop.data["prefecture_name"].tolist()[1])
+
+
+def test_filter_pushdown(tmp_path):
+    class PrefectureFlow(BaseFlow):
+        __filters__ = [Col("region") == "kanto", Col("code") != "14"]
+        code = Column(dtype=String, name="prefecture_code")
+        region = Column(dtype=String)
+
+    df = pd.DataFrame({"prefecture_code": ["13", "27", "14", "12"], "region": ["kanto", "kansai", "kanto", "kanto"]})
+    pd.DataFrame(df).to_parquet(str(tmp_path / "prefecture"), partition_cols=["region"])
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(str(tmp_path / "prefecture"), format="parquet", partitioning="hive")
+    compiled, remaining = PrefectureFlow.pushdown_filters()
+    assert [repr(predicate) for predicate in remaining] == ["ne(Col('code'), '14')"]
+    # Partitions pruned by the filters are never read.
+    fragments = [fragment.path for fragment in dataset.get_fragments(filter=compiled)]
+    assert len(fragments) == 1 and "region=kanto" in fragments[0]
+
+    flow = PrefectureFlow.from_parquet(str(tmp_path / "prefecture"))
+    assert sorted(flow.data["code"].tolist()) == ["12", "13"]
+
+    plan = PrefectureFlow.explain(dataset)
+    assert plan.stage("read").steps[1:] == [
+        "filter eq(Col('region'), 'kanto') (pushed down)",
+        "filter ne(Col('code'), '14')",
+    ]
+
+    # The same filters are applied after renaming the other data.
+    assert PrefectureFlow(df).data["code"].tolist() == ["13", "12"]
+
+    with pytest.raises(ValueError):
+
+        class InvalidFlow(BaseFlow):
+            __filters__ = [Col("unknown") == 1]
+            code = Column(dtype=String)
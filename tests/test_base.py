@@ -1,3 +1,6 @@
+import pickle
+import warnings
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -5,11 +8,13 @@ import pytest
 from prep_flow import (
     BaseFlow,
     Boolean,
+    Col,
     Column,
     ColumnCastError,
     DateTime,
     DecoratorError,
     DecoratorReturnTypeError,
+    Float,
     Integer,
     InvalidCategoryFoundError,
     InvalidDateFoundError,
@@ -21,6 +26,7 @@ from prep_flow import (
     ReferenceDataNotFoundError,
     ReferenceDataNotInitializationError,
     String,
+    ValidationPolicy,
     creator,
     data_filter,
     modifier,
@@ -244,6 +250,49 @@ def test_cast_value():
     assert data["age"].dtype == "float64"
 
 
+def test_cast_with_nan_dtypes():
+    class Flow(BaseFlow):
+        age = Column(dtype=Integer, nullable=True)
+        flag = Column(dtype=Boolean, nullable=True)
+        score = Column(dtype=Float, nullable=True)
+
+    # Columns already in the dtypes holding NaN are still cast to the dtypes of the columns.
+    df = pd.DataFrame({"age": [1.5, np.nan, 2.7], "flag": [1, 0, None], "score": [1.5, np.nan, 2.0]})
+    data = Flow(df).data
+
+    assert data["age"].tolist()[::2] == [1.0, 2.0]
+    assert data["flag"].tolist()[:2] == [True, False]
+    assert data["score"].tolist()[::2] == [1.5, 2.0]
+    assert Flow.explain(df).stage("post_cast").steps[:3] == [
+        "age: float64 -> float64 (vectorized)",
+        "flag: float64 -> object (vectorized)",
+        "score: float64 -> float64 (no-op)",
+    ]
+
+
+def test_cast_nullable_dtypes():
+    class Flow(BaseFlow):
+        __nullable_dtypes__ = True
+        first_name = Column(dtype=String, nullable=True, name="first name")
+        age = Column(dtype=Integer, nullable=True)
+        flag = Column(dtype=Boolean, nullable=True)
+
+    df = pd.DataFrame(
+        {
+            "first name": ["Taro", None, "Hanako"],
+            "age": ["28", None, "26"],
+            "flag": [True, None, False],
+        }
+    )
+    data = Flow(df).data
+
+    assert data["first_name"].dtype == "string"
+    assert data["age"].dtype == "Int64"
+    assert data["flag"].dtype == "boolean"
+    assert data["age"].tolist() == [28, pd.NA, 26]
+    assert data["first_name"].isna().tolist() == [False, True, False]
+
+
 def test_base_flow():
     original = pd.DataFrame(
         {
@@ -399,6 +448,24 @@ def test_series_cast():
     assert e.value.to_ == "int"
 
 
+def test_validation_policy():
+    class Flow(BaseFlow):
+        __validation_policy__ = ValidationPolicy(mode="head", n=2)
+
+        id = Column(dtype=String, regexp=r"id_[0-9]+")
+
+    df = pd.DataFrame({"id": ["id_1", "id_2", "3"]})
+
+    flow = Flow(df)
+    assert flow.data.shape == (3, 1)
+
+    with pytest.raises(InvalidRegexpFoundError) as e:
+        _ = Flow(df, validation_policy=ValidationPolicy(mode="sample", frac=1.0))
+
+    assert e.value.row_number == 3
+    assert e.value.sampling is None
+
+
 def test_filter():
     class Flow(BaseFlow):
         age = Column(dtype=Integer, nullable=True)
@@ -414,6 +481,51 @@ def test_filter():
     assert_dataframes(flow.data, answer)
 
 
+def test_filter_mask():
+    received = []
+
+    class Flow(BaseFlow):
+        name = Column(dtype=String)
+        age = Column(dtype=Integer)
+
+        @data_filter()
+        def filter_adult(cls):
+            return Col("age") >= 20
+
+        @data_filter()
+        def filter_name(cls, data: pd.DataFrame) -> pd.Series:
+            received.append(data["name"].tolist())
+            return data["name"] != "Jiro"
+
+        @data_filter()
+        def filter_index(cls, data: pd.DataFrame) -> pd.Index:
+            return data.index[data["age"] < 60]
+
+    df = pd.DataFrame({"name": ["Taro", "Jiro", "Hanako", "Saburo", "Yoshiko"], "age": [28, 32, 18, 30, 65]})
+    flow = Flow(df)
+
+    assert flow.data["name"].tolist() == ["Taro", "Saburo"]
+    assert flow.data.index.tolist() == [0, 3]
+    # Filters taking the data receive the rows kept by the previous filters.
+    assert received == [["Taro", "Jiro", "Saburo", "Yoshiko"]]
+
+
+def test_declared_filters_with_cast_value():
+    class Flow(BaseFlow):
+        __filters__ = [Col("keep") == "y"]
+        keep = Column(dtype=String)
+        date = Column(dtype=DateTime, nullable=True)
+
+    # Mixed values with a null are cast value by value.
+    dates = [pd.Timestamp("2024-01-01").date(), "2024-01-02", pd.Timestamp("2024-01-03", tz="UTC"), None]
+    df = pd.DataFrame({"keep": ["n", "y", "y", "y"], "date": dates})
+    data = Flow(df).data
+
+    expected = Flow(df[df["keep"] == "y"].reset_index(drop=True)).data
+    pd.testing.assert_frame_equal(data, expected)
+    assert data["date"].tolist()[:2] == [pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-03", tz="UTC")]
+
+
 def test_reference_column_1():
     class PrefectureFlow(BaseFlow):
         prefecture_code = Column(dtype=String)
@@ -767,7 +879,7 @@ def test_decorator_with_error_3():
 
         @data_filter()
         def filter_name(self, data: pd.DataFrame):
-            return data["name"] == "Taro"
+            return "Taro"
 
     df_member = pd.DataFrame({"name": ["Taro", "Hanako"]})
 
@@ -821,3 +933,188 @@ def test_strict_mode():
     flow = Flow(df)
 
     assert_dataframes(flow.data, answer)
+
+
+def test_incremental():
+    class Flow(BaseFlow):
+        id = Column(dtype=Integer)
+        name = Column(dtype=String, modifier=lambda x: x.upper())
+        updated_at = Column(dtype=DateTime)
+        name_length = Column(dtype=Integer)
+
+        @creator("name_length", row_local=True)
+        def create_name_length(self, data: pd.DataFrame) -> pd.Series:
+            return data["name"].str.len()
+
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "name": ["taro", "hanako"],
+            "updated_at": ["2024-01-01", "2024-01-02"],
+        }
+    )
+    df_delta = pd.DataFrame({"id": [2, 3], "name": ["jiro", "saburo"], "updated_at": ["2024-01-03", "2024-01-03"]})
+    answer = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "name": ["TARO", "JIRO", "SABURO"],
+            "updated_at": pd.to_datetime(["2024-01-01", "2024-01-03", "2024-01-03"]),
+            "name_length": [4, 4, 6],
+        }
+    )
+
+    assert Flow.is_row_local()
+    previous = Flow(df)
+
+    flow = Flow.incremental(previous, df_delta, key="id")
+    assert_dataframes(flow.data, answer)
+    assert flow.original.shape == (3, 3)
+
+    appended = Flow.incremental(previous, df_delta)
+    assert appended.data["id"].tolist() == [1, 2, 2, 3]
+
+    df_source = pd.concat([df, df_delta], ignore_index=True)
+    watermarked = Flow.incremental(previous, df_source, key="id", watermark="updated_at")
+    assert_dataframes(watermarked.data, answer)
+
+
+def test_incremental_fallback():
+    class Flow(BaseFlow):
+        id = Column(dtype=Integer)
+        age = Column(dtype=Integer)
+
+        @data_filter()
+        def filter_age(self, data: pd.DataFrame) -> pd.DataFrame:
+            return data.query("age >= 20").reset_index(drop=True)
+
+    previous = Flow(pd.DataFrame({"id": [1, 2], "age": [28, 10]}))
+    flow = Flow.incremental(previous, pd.DataFrame({"id": [2, 3], "age": [21, 30]}), key="id")
+
+    assert not Flow.is_row_local()
+    assert_dataframes(flow.data, pd.DataFrame({"id": [1, 2, 3], "age": [28, 21, 30]}))
+
+
+def test_replace_none_to_nan():
+    class Flow(BaseFlow):
+        name = Column(dtype=String, nullable=True)
+        age = Column(dtype=Float, nullable=True)
+        note = Column(dtype=String, nullable=True)
+
+    flow = Flow.from_data(pd.DataFrame({"name": ["Taro", None], "age": [28.0, np.nan], "note": [None, None]}))
+    age = flow.data["age"].to_numpy()
+    flow.replace_none_to_nan()
+
+    assert flow.data["name"].tolist()[1] is np.nan
+    assert flow.data["note"].dtype == "float64"
+    # Columns which can't hold None are not touched.
+    assert np.shares_memory(flow.data["age"].to_numpy(), age)
+
+
+def test_many_creators():
+    def add(i):
+        return lambda cls: Col("value") + i
+
+    namespace = {"value": Column(dtype=Integer)}
+    for i in range(150):
+        namespace[f"value_{i}"] = Column(dtype=Integer)
+        namespace[f"create_value_{i}"] = creator(f"value_{i}")(add(i))
+    # Creators see the columns created before them.
+    namespace["total"] = Column(dtype=Integer)
+    namespace["create_total"] = creator("total")(lambda cls: Col("value_1") + Col("value_149"))
+    Flow = type("Flow", (BaseFlow,), namespace)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", pd.errors.PerformanceWarning)
+        data = Flow(pd.DataFrame({"value": [1, 2]})).data
+
+    assert data["value_149"].tolist() == [150, 151]
+    assert data["total"].tolist() == [152, 154]
+    assert data._mgr.nblocks == 1
+
+
+def test_many_creators_taking_data():
+    received = []
+
+    def add(i):
+        def create(cls, data):
+            received.append(data)
+            assert "temporary" not in data.columns
+            data["temporary"] = 0
+            return data[f"value_{i - 1}"] + 1 if i > 0 else data["value"]
+
+        return create
+
+    namespace = {"value": Column(dtype=Integer)}
+    for i in range(150):
+        namespace[f"value_{i}"] = Column(dtype=Integer)
+        namespace[f"create_value_{i}"] = creator(f"value_{i}")(add(i))
+    Flow = type("Flow", (BaseFlow,), namespace)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", pd.errors.PerformanceWarning)
+        data = Flow(pd.DataFrame({"value": [1, 2]})).data
+
+    # Creators see the columns created before them, and not the columns added to the data by the others.
+    assert data["value_149"].tolist() == [150, 151]
+    assert received[-1].columns.tolist() == ["value"] + [f"value_{i}" for i in range(149)] + ["temporary"]
+    # The data isn't copied for each creator, and the results are written once.
+    copies = set(id(np.asarray(data["value"].to_numpy()).base) for data in received)
+    assert len(copies) <= 3
+    assert data._mgr.nblocks == 1
+
+
+def test_categorical_output():
+    class MemberFlow(BaseFlow):
+        __categorical_output__ = True
+
+        name = Column(dtype=String)
+        gender = Column(dtype=String, category=["man", "woman"])
+        rank = Column(dtype=Integer, category=[1, 2, 3])
+
+    member = MemberFlow(pd.DataFrame({"name": ["a", "b", "c"], "gender": ["man", "woman", "man"], "rank": [3, 1, 2]}))
+    assert member.data["gender"].dtype == pd.CategoricalDtype(["man", "woman"])
+    assert member.data["gender"].tolist() == ["man", "woman", "man"]
+    assert member.data["rank"].cat.codes.tolist() == [2, 0, 1]
+    assert member.data["name"].dtype == object
+
+
+def test_column_definitions():
+    column = Column(dtype=String, category=["a", "b"])
+    assert column == Column(dtype=String, category=["a", "b"])
+    assert hash(column) == hash(Column(dtype=String, category=["a", "b"]))
+    assert column != Column(dtype=String)
+    assert len({column, Column(dtype=String, category=["a", "b"])}) == 1
+
+    with pytest.raises(AttributeError):
+        column.nullable = False
+
+    column = pickle.loads(pickle.dumps(column))
+    assert column.category == ["a", "b"]
+
+    with pytest.raises(TypeError):
+
+        class InvalidDtypeFlow(BaseFlow):
+            name = Column(dtype=str)
+
+    with pytest.raises(ValueError):
+
+        class InvalidHowFlow(BaseFlow):
+            name = ReferenceColumn(column=Column(dtype=String), how="cross", on="id")
+
+
+def test_reference_info():
+    class PrefectureFlow(BaseFlow):
+        prefecture_code = Column(dtype=String)
+        prefecture_name = Column(dtype=String)
+        region = Column(dtype=String)
+
+    class MemberFlow(BaseFlow):
+        prefecture_code = Column(dtype=String)
+        prefecture_name = ReferenceColumn(column=PrefectureFlow.prefecture_name, how="left", on="prefecture_code")
+        region = ReferenceColumn(column=PrefectureFlow.region, how="left", on="prefecture_code")
+
+    PrefectureFlow.set_class_name_to_columns()
+    assert MemberFlow.args(MemberFlow.region) == ("region",)
+    assert MemberFlow.get_reference_info() == [
+        ("PrefectureFlow", ("prefecture_name", "region"), "left", ("prefecture_code",), 0)
+    ]
@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+import pytest
+
+from prep_flow import BaseFlow, Column, Integer, String, creator, modifier
+from prep_flow.cache import ResultCache, data_key, function_key
+
+
+def test_keys():
+    def f(x):
+        return x + 1
+
+    def g(x):
+        return x + 2
+
+    assert function_key(f) == function_key(f)
+    assert function_key(f) != function_key(g)
+
+    data = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    assert data_key(data, ["a"]) == data_key(data.copy(), ["a"])
+    assert data_key(data, ["a"]) != data_key(data.assign(a=[1, 3]), ["a"])
+    assert data_key(data, ["a"]) == data_key(data.assign(b=["z", "z"]), ["a"])
+
+
+def test_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_size=0)
+    cache.put("a", pd.Series([1, 2]))
+    assert cache.get("a") is None
+
+    cache = ResultCache(str(tmp_path), max_size=10**6)
+    for key in ["a", "b", "c"]:
+        cache.put(key, pd.Series(range(100)))
+        os.utime(cache.path(key), (0, {"a": 1, "b": 3, "c": 2}[key]))
+    cache.max_size = 2 * os.path.getsize(cache.path("a"))
+    cache.evict()
+    assert cache.get("a") is None
+    assert cache.get("b").tolist() == list(range(100))
+
+
+def test_get_evicted_by_another_process(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), max_size=10**6)
+    cache.put("a", pd.Series([1, 2]))
+
+    # The file is removed between reading it and marking it as recently used.
+    read_pickle = pd.read_pickle
+
+    def read_and_evict(path):
+        result = read_pickle(path)
+        os.remove(path)
+        return result
+
+    monkeypatch.setattr(pd, "read_pickle", read_and_evict)
+    assert cache.get("a").tolist() == [1, 2]
+
+
+def test_cached_decorators(tmp_path):
+    calls = []
+
+    class Flow(BaseFlow):
+        __cache_dir__ = str(tmp_path)
+        address = Column(dtype=String)
+        name = Column(dtype=String)
+        code = Column(dtype=Integer)
+
+        @creator("code", cache=True, depends_on=["address"])
+        def create_code(cls, data: pd.DataFrame) -> pd.Series:
+            calls.append("code")
+            return data["address"].str.len()
+
+        @modifier("name", cache=True, depends_on=["name"])
+        def modify_name(cls, data: pd.DataFrame) -> pd.Series:
+            calls.append("name")
+            return data["name"].str.upper()
+
+    df = pd.DataFrame({"address": ["tokyo", "osaka"], "name": ["taro", "hanako"]})
+    first = Flow(df).data
+    second = Flow(df.copy()).data
+    assert calls == ["name", "code"]
+    pd.testing.assert_frame_equal(first, second)
+    assert second["code"].tolist() == [5, 5]
+    assert second["name"].tolist() == ["TARO", "HANAKO"]
+
+    # Results are computed again for other inputs.
+    third = Flow(df.assign(address=["kyoto", "nagoya"])).data
+    assert calls == ["name", "code", "code"]
+    assert third["code"].tolist() == [5, 6]
+
+
+def test_cache_without_depends_on():
+    with pytest.raises(Exception):
+
+        @creator("code", cache=True)
+        def create_code(cls, data: pd.DataFrame) -> pd.Series:
+            return data["address"]
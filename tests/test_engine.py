@@ -0,0 +1,167 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prep_flow import (
+    BaseFlow,
+    Column,
+    ColumnCastError,
+    Float,
+    Integer,
+    InvalidCategoryFoundError,
+    InvalidRegexpFoundError,
+    NullValueFoundError,
+    ReferenceColumn,
+    String,
+    Validator,
+    modifier,
+)
+
+duckdb = pytest.importorskip("duckdb")
+
+from prep_flow.engine import DuckDBEngine, DuckDBValidator  # noqa: E402
+
+
+@pytest.mark.parametrize("how", ["left", "right", "inner", "outer"])
+def test_merge(how):
+    left = pd.DataFrame({"key": ["b", "a", "c", None, "e"], "x": range(5)})
+    right = pd.DataFrame({"key": ["a", "b", "d", None], "y": [1, 2, 3, 4]})
+
+    expected = pd.merge(left, right, how=how, on=["key"])
+    result = DuckDBEngine().merge(left, right, how=how, on=["key"])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("how", ["left", "right", "outer"])
+def test_merge_null_keys(how):
+    dates = pd.to_datetime(["2024-01-02", None, "2024-01-01", None])
+    left = pd.DataFrame({"key": dates, "code": [2.0, np.nan, 1.0, np.nan], "x": range(4)})
+    right = pd.DataFrame({"key": dates[[3, 0, 2]], "code": [np.nan, 2.0, 3.0], "y": range(3)})
+
+    expected = pd.merge(left, right, how=how, on=["key", "code"])
+    result = DuckDBEngine().merge(left, right, how=how, on=["key", "code"])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("how", ["left", "right", "inner", "outer"])
+def test_merge_empty(how):
+    left = pd.DataFrame({"key": [2, 1], "x": [1.0, 2.0]})
+    right = pd.DataFrame({"key": [1, 3], "y": [1.0, 2.0]})
+
+    # Rows only in the other data are kept when either data is empty.
+    for _left, _right in [(left.iloc[:0], right), (left, right.iloc[:0])]:
+        expected = pd.merge(_left, _right, how=how, on=["key"])
+        result = DuckDBEngine().merge(_left, _right, how=how, on=["key"])
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_cast():
+    data = pd.DataFrame(
+        {
+            "a": ["1", " 2", "-3"],
+            "b": ["1.5", "2", "nan"],
+            "c": [1, 2, 3],
+            "d": ["1", None, "3"],
+            "e": ["1", "x", "3"],
+        }
+    )
+    engine = DuckDBEngine()
+
+    cast = engine.cast(data, {"a": Integer, "b": Float, "c": String, "d": Integer})
+    assert list(cast.keys()) == ["a", "b", "c"]
+    assert cast["a"].tolist() == [1, 2, -3]
+    assert cast["a"].dtype == np.int64
+    assert cast["b"].tolist()[:2] == [1.5, 2.0]
+    assert cast["c"].tolist() == ["1", "2", "3"]
+
+    with pytest.raises(ColumnCastError):
+        engine.cast(data, {"e": Integer})
+
+    # Flows using the engine can be sent to worker processes.
+    engine = pickle.loads(pickle.dumps(engine))
+    assert engine.cast(data, {"c": String})["c"].tolist() == ["1", "2", "3"]
+
+
+def test_validator():
+    data = pd.DataFrame(
+        {
+            "a": ["x", "y", None],
+            "b": ["abc", "abd", "xyz"],
+            "c": [1, 2, 5],
+            "d": ["x", 1, None],
+        }
+    )
+    validator = DuckDBValidator(DuckDBEngine())
+
+    validator.validate_nullable(data, {"a": True, "b": False})
+    with pytest.raises(NullValueFoundError) as e:
+        validator.validate_nullable(data, {"b": False, "a": False})
+    assert e.value.row_number == 3
+
+    validator.validate_regexp(data, {"b": {"regexp": "[a-z]{3}", "nullable": False}})
+    with pytest.raises(InvalidRegexpFoundError) as e:
+        validator.validate_regexp(data, {"b": {"regexp": "ab", "nullable": False}})
+    assert e.value.row_number == 3
+
+    with pytest.raises(InvalidCategoryFoundError) as e:
+        validator.validate_category(data, {"c": {"category": [1, 2], "nullable": False}})
+    assert e.value.row_number == 3
+
+    # Columns mixing types are checked by Validator.
+    for conditions in [{"d": {"category": ["x", 1], "nullable": True}}, {"d": {"category": ["x"], "nullable": True}}]:
+        try:
+            Validator.validate_category(data, conditions)
+        except InvalidCategoryFoundError as expected:
+            with pytest.raises(InvalidCategoryFoundError) as e:
+                validator.validate_category(data, conditions)
+            assert e.value.row_number == expected.row_number
+        else:
+            validator.validate_category(data, conditions)
+
+
+def test_engine():
+    class PrefectureFlow(BaseFlow):
+        prefecture_code = Column(dtype=Integer, original_dtype=Integer)
+        prefecture_name = Column(dtype=String, nullable=False)
+
+    def define_member_flow(engine):
+        class MemberFlow(BaseFlow):
+            __engine__ = engine
+
+            name = Column(dtype=String, nullable=False)
+            prefecture_code = Column(dtype=Integer, original_dtype=Integer, regexp=r"\d+")
+            gender = Column(dtype=String, category=["man", "woman"])
+            score = Column(dtype=Float, original_dtype=String)
+            prefecture_name = ReferenceColumn(column=PrefectureFlow.prefecture_name, how="left", on="prefecture_code")
+
+            @modifier("name")
+            def modify_name(self, data: pd.DataFrame) -> pd.Series:
+                return data["name"].str.upper()
+
+        return MemberFlow
+
+    prefecture = PrefectureFlow(
+        pd.DataFrame({"prefecture_code": ["1", "2", "3"], "prefecture_name": ["tokyo", "osaka", "kyoto"]})
+    )
+    df_member = pd.DataFrame(
+        {
+            "name": ["taro", "john", "hanako"],
+            "prefecture_code": ["2", "1", "4"],
+            "gender": ["man", "man", "woman"],
+            "score": ["1.5", "2", "3.25"],
+        }
+    )
+
+    expected = define_member_flow("pandas")(df_member, reference=[prefecture])
+    member = define_member_flow("duckdb")(df_member, reference=[prefecture])
+    pd.testing.assert_frame_equal(member.data, expected.data)
+
+    df_member["gender"] = ["man", "other", "woman"]
+    with pytest.raises(InvalidCategoryFoundError) as e:
+        define_member_flow("duckdb")(df_member, reference=[prefecture])
+    assert e.value.row_number == 2
+
+    with pytest.raises(ValueError):
+        define_member_flow("spark")(df_member, reference=[prefecture])
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from prep_flow import (
+    BaseFlow,
+    Col,
+    Column,
+    DateTime,
+    Integer,
+    Lit,
+    String,
+    creator,
+    date_diff,
+    modifier,
+    when,
+)
+from prep_flow.functions import ExpressionCache
+
+
+def test_evaluate():
+    data = pd.DataFrame({"a": [1, 2, 3], "b": [10, 20, 30], "name": [" taro", "hanako ", None]})
+
+    assert (Col("a") + Col("b") * 2).evaluate(data).tolist() == [21, 42, 63]
+    assert (1 - Col("a")).evaluate(data).tolist() == [0, -1, -2]
+    assert ((Col("a") > 1) & (Col("b") < 30)).evaluate(data).tolist() == [False, True, False]
+    assert Col("a").isin([1, 3]).evaluate(data).tolist() == [True, False, True]
+    assert Col("name").str.strip().str.upper().evaluate(data).tolist()[:2] == ["TARO", "HANAKO"]
+    assert Col("name").isna().evaluate(data).tolist() == [False, False, True]
+    assert Lit(1).evaluate(data) == 1
+
+    expr = when(Col("a") == 1, "one").when(Col("a") == 2, "two").otherwise("many")
+    assert expr.evaluate(data).tolist() == ["one", "two", "many"]
+    assert when(Col("a") == 1, "one").evaluate(data).tolist() == ["one", None, None]
+
+    with pytest.raises(TypeError):
+        bool(Col("a") == 1)
+
+
+def test_str_concat():
+    data = pd.DataFrame({"a": ["x", None, None], "b": ["y", "z", None]})
+
+    # Nulls are concatenated as empty strings, like concat in SQL.
+    assert Col("a").str.concat(Col("b")).evaluate(data).tolist() == ["xy", "z", ""]
+    assert Col("a").str.concat("_s").evaluate(data).tolist() == ["x_s", "_s", "_s"]
+    assert Col("a").str.concat(None).evaluate(data).tolist() == ["x", "", ""]
+    assert Col("a").str.concat("_s").to_sql() == "concat(\"a\", '_s')"
+
+
+def test_date_diff():
+    data = pd.DataFrame({"start": pd.to_datetime(["2024-01-01", None]), "end": pd.to_datetime(["2024-01-31", None])})
+
+    result = date_diff(Col("end"), Col("start")).evaluate(data)
+    assert result.tolist()[0] == 30
+    assert np.isnan(result.tolist()[1])
+    assert date_diff(pd.Timestamp("2024-01-02"), Col("start"), unit="h").evaluate(data).tolist()[0] == 24
+
+
+def test_date_diff_partial_units():
+    duckdb = pytest.importorskip("duckdb")
+    data = pd.DataFrame(
+        {
+            "start": pd.to_datetime(["2024-01-01 23:00", "2024-01-02 01:00", "2024-01-01 00:00", None]),
+            "end": pd.to_datetime(["2024-01-02 01:00", "2024-01-01 23:00", "2024-01-03 12:30", "2024-01-01 00:00"]),
+        }
+    )
+
+    # Both pandas and SQL count the whole units elapsed, not the boundaries crossed.
+    for unit, expected in [("D", [0, -1, 2]), ("h", [2, -2, 60])]:
+        expr = date_diff(Col("end"), Col("start"), unit=unit)
+        result = expr.evaluate(data)
+        assert result.tolist()[:3] == expected and np.isnan(result.tolist()[3])
+        sql = duckdb.sql(f"SELECT {expr.to_sql()} AS diff FROM data").df()["diff"]
+        pd.testing.assert_series_equal(sql, result, check_names=False)
+
+
+def test_isin_empty():
+    duckdb = pytest.importorskip("duckdb")
+    data = pd.DataFrame({"a": [1, 2]})
+
+    expr = Col("a").isin([])
+    assert expr.evaluate(data).tolist() == [False, False]
+    assert duckdb.sql(f"SELECT {expr.to_sql()} AS result FROM data").df()["result"].tolist() == [False, False]
+
+
+def test_columns_and_cache():
+    expr = (Col("a") + Col("b")) * (Col("a") + Col("b")) + Col("c")
+    assert expr.columns() == {"a", "b", "c"}
+
+    data = pd.DataFrame({"a": [1], "b": [2], "c": [3]})
+    cache = ExpressionCache()
+    assert expr.evaluate(data, cache).tolist() == [12]
+    assert (Col("a") + Col("b")).key() in cache
+
+    cache.invalidate("c")
+    assert expr.key() not in cache
+    assert (Col("a") + Col("b")).key() in cache
+
+
+def test_to_sql():
+    assert (Col("a") + 1).to_sql() == '("a" + 1)'
+    assert Col("name").str.upper().to_sql() == 'upper("name")'
+    assert Col("code").isin(["a", "b'"]).to_sql() == "(\"code\" IN ('a', 'b'''))"
+    assert Col("code").isin([]).to_sql() == "FALSE"
+    assert when(Col("a") > 0, "plus").otherwise(None).to_sql() == "(CASE WHEN (\"a\" > 0) THEN 'plus' ELSE NULL END)"
+    assert date_diff(Col("end"), Col("start")).to_sql() == (
+        'floor(epoch(CAST("end" AS TIMESTAMP) - CAST("start" AS TIMESTAMP)) / 86400)'
+    )
+
+
+def test_to_arrow():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"a": [1, None, 3], "name": ["taro", "hanako", None]})
+
+    assert table.filter((Col("a") + 1 > 2).to_arrow()).num_rows == 1
+    assert table.filter(Col("code").isin(["taro"]).to_arrow({"code": "name"})).num_rows == 1
+    assert table.filter((Col("a").isna() | Col("name").str.startswith("t")).to_arrow()).num_rows == 2
+
+    with pytest.raises(NotImplementedError):
+        (Col("a") != 1).to_arrow()
+
+
+def test_flow_with_expression():
+    class MemberFlow(BaseFlow):
+        name = Column(dtype=String)
+        birthday = Column(dtype=DateTime)
+        age = Column(dtype=Integer)
+        generation = Column(dtype=String)
+
+        @modifier("name")
+        def modify_name(cls):
+            return Col("name").str.upper()
+
+        @creator("age")
+        def create_age(cls):
+            return date_diff(pd.Timestamp("2024-01-01"), Col("birthday")) // 365
+
+        @creator("generation")
+        def create_generation(cls):
+            return when(date_diff(pd.Timestamp("2024-01-01"), Col("birthday")) // 365 < 30, "young").otherwise("adult")
+
+    df = pd.DataFrame({"name": ["taro", "hanako"], "birthday": ["1995-10-19", "1998-03-25"]})
+    flow = MemberFlow(df)
+
+    assert flow.data["name"].tolist() == ["TARO", "HANAKO"]
+    assert flow.data["age"].tolist() == [28, 25]
+    assert flow.data["generation"].tolist() == ["young", "young"]
+    assert MemberFlow.expression_dependencies() == {
+        "name": {"name"},
+        "age": {"birthday"},
+        "generation": {"birthday"},
+    }
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+import pytest
+
+import prep_flow
+
+
+def imported_modules(statement: str) -> set[str]:
+    # Measure in a new interpreter, since pandas is already imported by the tests.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(line.split("|")[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:"))
+
+
+def test_import_time():
+    modules = imported_modules("import prep_flow")
+    assert "prep_flow" in modules
+    assert not {"pandas", "numpy", "pydantic", "pyarrow", "duckdb"} & modules
+
+    modules = imported_modules("from prep_flow import NullValueFoundError, creator")
+    assert not {"pandas", "numpy", "pydantic"} & modules
+
+    modules = imported_modules("from prep_flow import BaseFlow, Column, String")
+    assert "pandas" in modules
+    assert not {"pydantic", "duckdb"} & modules
+
+
+def test_lazy_attributes():
+    assert set(prep_flow.__all__) <= set(dir(prep_flow))
+    for name in prep_flow.__all__:
+        assert getattr(prep_flow, name).__name__ == name
+
+    with pytest.raises(AttributeError):
+        _ = prep_flow.UnknownFlow
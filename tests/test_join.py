@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from prep_flow import BaseFlow, Column, DateTime, Float, ReferenceColumn
+from prep_flow.join import in_memory_merge, is_sorted_join, sorted_merge
+
+
+class RateFlow(BaseFlow):
+    date = Column(dtype=DateTime, nullable=False)
+    rate = Column(dtype=Float)
+
+
+class SalesFlow(BaseFlow):
+    date = Column(dtype=DateTime)
+    amount = Column(dtype=Float)
+    rate = ReferenceColumn(RateFlow.rate, on="date", how="full")
+
+
+def test_sorted_merge():
+    rng = np.random.default_rng(0)
+    for size in [0, 1, 20, 50]:
+        left_keys = np.sort(rng.integers(0, 15, size))
+        right_keys = np.sort(rng.integers(0, 15, 20))
+        for keys in [(left_keys, right_keys), (left_keys, np.unique(right_keys))]:
+            left = pd.DataFrame(
+                {"key": keys[0], "value": rng.integers(0, 9, size), "flag": rng.random(size) > 0.5},
+                index=rng.permutation(size),
+            )
+            right = pd.DataFrame({"key": keys[1], "number": rng.integers(0, 9, keys[1].shape[0])})
+            for how in ["left", "inner", "outer"]:
+                pd.testing.assert_frame_equal(
+                    sorted_merge(left, right, how, ["key"]), pd.merge(left, right, how=how, on="key")
+                )
+
+    left = pd.DataFrame({"key": ["a", "b", "b", "d"], "value": range(4)})
+    right = pd.DataFrame({"key": ["b", "c", "d", "d"], "number": range(4)})
+    assert is_sorted_join(left, right, ["key"], {})
+    assert not is_sorted_join(left[::-1], right, ["key"], {})
+    pd.testing.assert_frame_equal(sorted_merge(left, right, "outer", ["key"]), pd.merge(left, right, how="outer"))
+
+
+def test_sorted_merge_with_missing_keys():
+    left = pd.DataFrame({"k": ["k0"], "a": [1]})
+    for keys in [[None], ["k1", None]]:
+        right = pd.DataFrame({"k": keys, "b": range(len(keys))})
+        assert not is_sorted_join(left, right, ["k"], {})
+        result = in_memory_merge(left, right, "outer", ["k"], {})
+        pd.testing.assert_frame_equal(result, pd.merge(left, right, how="outer", on="k"))
+
+
+def test_sorted_merge_in_flow():
+    dates = pd.date_range("2024-01-01", periods=10)
+    rate_flow = RateFlow(pd.DataFrame({"date": dates[::2], "rate": np.arange(5.0)}))
+    assert rate_flow.statistics["date"].is_sorted
+
+    df = pd.DataFrame({"date": dates[[0, 1, 1, 4, 9]], "amount": np.arange(5.0)})
+    assert is_sorted_join(df, rate_flow.data, ["date"], rate_flow.statistics)
+    sales_flow = SalesFlow(df, reference=[rate_flow])
+    expected = pd.merge(df, rate_flow.data, how="outer", on="date")
+    pd.testing.assert_frame_equal(sales_flow.data, expected[["date", "amount", "rate"]])
+
+    plan = SalesFlow.explain(df, reference=[rate_flow])
+    assert "(sorted merge join if the data is sorted by date, otherwise hash join)" in plan.stage("order 0").steps[0]
@@ -0,0 +1,128 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prep_flow import BaseFlow, Column, Float, Integer, ReferenceColumn
+from prep_flow.memory import (
+    SpillStore,
+    is_spilled,
+    memory_usage,
+    parse_size,
+    partitioned_merge,
+)
+
+
+def test_parse_size():
+    assert parse_size(1024) == 1024
+    assert parse_size("512") == 512
+    assert parse_size("2KB") == 2048
+    assert parse_size("1.5 GB") == int(1.5 * 1024**3)
+
+    with pytest.raises(ValueError):
+        parse_size("many")
+
+
+def test_spill_columns(tmp_path):
+    data = pd.DataFrame({"id": np.arange(1000), "value": np.arange(1000) * 0.5, "name": ["a"] * 1000})
+    store = SpillStore(str(tmp_path))
+
+    spilled = store.spill_columns(data, budget=memory_usage(data) - 1, hot_columns=["id"])
+    assert spilled.equals(data)
+    assert not is_spilled(spilled["id"])
+    assert is_spilled(spilled["value"])
+    assert not is_spilled(spilled["name"])
+    assert memory_usage(spilled) < memory_usage(data)
+
+    # Files are removed as soon as they are mapped.
+    assert list(tmp_path.iterdir()) == []
+
+    assert store.spill_columns(data, budget=memory_usage(data)) is data
+
+
+@pytest.mark.parametrize("how", ["left", "right", "inner", "outer"])
+def test_partitioned_merge(how):
+    left = pd.DataFrame({"key": ["b", "a", "c", "a", "e", "b"], "x": range(6)})
+    right = pd.DataFrame({"key": ["a", "b", "d", "a"], "y": range(4)})
+
+    expected = pd.merge(left, right, how=how, on=["key"])
+    for n in [1, 2, 3, 8]:
+        result = partitioned_merge(left, right, how=how, on=["key"], n=n)
+        if how == "inner":
+            # pd.merge doesn't keep the left order between duplicated keys of an inner join.
+            result = result.sort_values(["x", "y"], ignore_index=True)
+            expected = expected.sort_values(["x", "y"], ignore_index=True)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("how", ["left", "right", "outer"])
+def test_partitioned_merge_null_keys(how):
+    dates = pd.to_datetime(["2024-01-02", None, "2024-01-01", None, "2024-01-03"])
+    for left_keys, right_keys in [
+        (["b", None, "a", None, "e"], ["a", None, "d", "b"]),
+        (dates, dates[[3, 0, 2]]),
+        ([2.0, np.nan, 1.0, 3.0, np.nan], [np.nan, 1.0, 4.0]),
+    ]:
+        left = pd.DataFrame({"key": left_keys, "x": range(5)})
+        right = pd.DataFrame({"key": right_keys, "y": range(len(right_keys))})
+
+        # Null keys match each other and are sorted like pd.merge, i.e. NaT first and other nulls last.
+        expected = pd.merge(left, right, how=how, on=["key"])
+        for n in [2, 3]:
+            pd.testing.assert_frame_equal(partitioned_merge(left, right, how=how, on=["key"], n=n), expected)
+
+
+def peak_memory(function, *args, **kwargs) -> int:
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("how", ["left", "outer"])
+def test_partitioned_merge_memory(tmp_path, how):
+    rows = 200000
+    rng = np.random.default_rng(0)
+    left = pd.DataFrame({"key": rng.integers(0, 50, rows), "a": rng.random(rows), "b": rng.random(rows)})
+    left = SpillStore(str(tmp_path)).spill_columns(left, 0, hot_columns=["key"])
+    right = pd.DataFrame({"key": np.arange(60), "y": np.arange(60.0)})
+
+    # Only the keys and the positions of the rows are joined in partitions, and the columns are taken once.
+    expected = peak_memory(pd.merge, left, right, how=how, on=["key"])
+    assert peak_memory(partitioned_merge, left, right, how=how, on=["key"], n=8) < expected * 1.5
+
+
+def test_memory_budget():
+    class PrefectureFlow(BaseFlow):
+        prefecture_code = Column(dtype=Integer)
+        population = Column(dtype=Float)
+
+    def define_member_flow(budget):
+        class MemberFlow(BaseFlow):
+            __memory_budget__ = budget
+
+            member_id = Column(dtype=Integer)
+            prefecture_code = Column(dtype=Integer)
+            score = Column(dtype=Float)
+            population = ReferenceColumn(column=PrefectureFlow.population, how="full", on="prefecture_code")
+
+        return MemberFlow
+
+    prefecture = PrefectureFlow(pd.DataFrame({"prefecture_code": [1, 2, 3, 5], "population": [1.0, 2.0, 3.0, 5.0]}))
+    df_member = pd.DataFrame(
+        {
+            "member_id": np.arange(2000),
+            "prefecture_code": np.arange(2000) % 4 + 1,
+            "score": np.arange(2000) * 0.1,
+        }
+    )
+
+    expected = define_member_flow(None)(df_member, reference=[prefecture])
+    member = define_member_flow("16KB")(df_member, reference=[prefecture])
+
+    pd.testing.assert_frame_equal(member.data, expected.data)
+    assert is_spilled(member.data["score"])
+    assert not is_spilled(member.data["prefecture_code"])
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+
+from prep_flow import (
+    BaseFlow,
+    Column,
+    DateTime,
+    Integer,
+    NullValueFoundError,
+    ReferenceColumn,
+    String,
+    creator,
+    data_filter,
+)
+from prep_flow.parallel import partition_bounds
+
+
+class PrefectureFlow(BaseFlow):
+    prefecture_code = Column(dtype=String)
+    prefecture_name = Column(dtype=String)
+    population = Column(dtype=Integer)
+
+
+class MemberFlow(BaseFlow):
+    name = Column(dtype=String)
+    age = Column(dtype=Integer, nullable=False)
+    prefecture_code = Column(dtype=String)
+    prefecture_name = ReferenceColumn(column=PrefectureFlow.prefecture_name, how="left", on="prefecture_code")
+    name_length = Column(dtype=Integer)
+
+    @creator("name_length", row_local=True)
+    def create_name_length(cls, data: pd.DataFrame) -> pd.Series:
+        return data["name"].str.len()
+
+
+class AdultFlow(BaseFlow):
+    name = Column(dtype=String)
+    age = Column(dtype=Integer, original_dtype=Integer)
+
+    @data_filter()
+    def filter_adult(cls, data: pd.DataFrame) -> pd.Series:
+        return data["age"] >= data["age"].median()
+
+
+class EventFlow(BaseFlow):
+    event = Column(dtype=String)
+    date = Column(dtype=DateTime, nullable=True)
+
+
+def create_data(rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "name": [f"member_{i}" for i in range(rows)],
+            "age": [str(20 + i % 50) for i in range(rows)],
+            "prefecture_code": [["13", "27", "99"][i % 3] for i in range(rows)],
+        }
+    )
+
+
+def test_partition_bounds():
+    assert partition_bounds(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert partition_bounds(2, 4) == [(0, 1), (1, 2)]
+    assert partition_bounds(0, 4) == [(0, 0)]
+
+
+def test_run_partitioned():
+    prefecture = PrefectureFlow(
+        pd.DataFrame({"prefecture_code": ["13", "27"], "prefecture_name": ["tokyo", "osaka"], "population": [1, 2]})
+    )
+    df = create_data(1000)
+
+    flow = MemberFlow.run_partitioned(df, reference=[prefecture], partitions=4, max_workers=2)
+    pd.testing.assert_frame_equal(flow.data, MemberFlow(df, reference=[prefecture]).data)
+
+    # Row numbers of errors are row numbers in the whole data.
+    df.loc[900, "age"] = None
+    with pytest.raises(NullValueFoundError) as e:
+        MemberFlow.run_partitioned(df, reference=[prefecture], partitions=4, max_workers=2)
+    assert e.value.row_number == 901
+
+
+def test_run_partitioned_not_row_local():
+    df = create_data(100)[["name", "age"]]
+    flow = AdultFlow.run_partitioned(df, partitions=4, max_workers=2)
+    pd.testing.assert_frame_equal(flow.data, AdultFlow(df).data)
+
+
+def test_run_partitioned_cast_value():
+    # Mixed values with a null are cast value by value, by their positions in each partition.
+    date, timestamp = pd.Timestamp("2024-01-01").date(), pd.Timestamp("2024-01-03", tz="UTC")
+    df = pd.DataFrame(
+        {"event": list("abcdef"), "date": ["2024-01-02", timestamp, None, date, timestamp, None]},
+        index=[10, 11, 12, 13, 14, 15],
+    )
+    flow = EventFlow.run_partitioned(df, partitions=2, max_workers=2)
+    pd.testing.assert_frame_equal(flow.data, EventFlow(df).data)
+    assert flow.data.shape[0] == 6
+    assert flow.data.index.tolist() == [10, 11, 12, 13, 14, 15]
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+from prep_flow import (
+    BaseFlow,
+    CircularReferenceError,
+    Column,
+    Pipeline,
+    ReferenceColumn,
+    ReferenceDataNotFoundError,
+    String,
+)
+
+
+class CountryFlow(BaseFlow):
+    country_code = Column(dtype=String)
+    country_name = Column(dtype=String)
+
+
+class PrefectureFlow(BaseFlow):
+    prefecture_code = Column(dtype=String)
+    country_code = Column(dtype=String)
+    country_name = ReferenceColumn(column=CountryFlow.country_name, how="left", on="country_code")
+
+
+class ShopFlow(BaseFlow):
+    shop = Column(dtype=String)
+    shop_country_code = Column(dtype=String)
+
+
+class MemberFlow(BaseFlow):
+    name = Column(dtype=String)
+    prefecture_code = Column(dtype=String)
+    shop = Column(dtype=String)
+    country_code = ReferenceColumn(column=PrefectureFlow.country_code, how="left", on="prefecture_code")
+    shop_country_code = ReferenceColumn(column=ShopFlow.shop_country_code, how="left", on="shop")
+
+
+def create_pipeline(executor: str, **kwargs) -> Pipeline:
+    return (
+        Pipeline(executor=executor, max_workers=2, **kwargs)
+        .add(
+            MemberFlow, pd.DataFrame({"name": ["taro", "hanako"], "prefecture_code": ["13", "99"], "shop": ["a", "b"]})
+        )
+        .add(ShopFlow, pd.DataFrame({"shop": ["a", "b"], "shop_country_code": ["JP", "US"]}))
+        .add(PrefectureFlow, pd.DataFrame({"prefecture_code": ["13", "99"], "country_code": ["JP", "US"]}))
+        .add(CountryFlow, pd.DataFrame({"country_code": ["JP", "US"], "country_name": ["japan", "america"]}))
+    )
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_pipeline(executor):
+    pipeline = create_pipeline(executor)
+
+    order = pipeline.order()
+    assert order.index("CountryFlow") < order.index("PrefectureFlow") < order.index("MemberFlow")
+    assert order.index("ShopFlow") < order.index("MemberFlow")
+
+    results = pipeline.run()
+    assert list(results.keys()) == ["MemberFlow"]
+    assert results["MemberFlow"].data["country_code"].tolist() == ["JP", "US"]
+    assert results["MemberFlow"].data["shop_country_code"].tolist() == ["JP", "US"]
+
+    results = pipeline.run(outputs=[PrefectureFlow, MemberFlow])
+    assert sorted(results.keys()) == ["MemberFlow", "PrefectureFlow"]
+    assert results["PrefectureFlow"].data["country_name"].tolist() == ["japan", "america"]
+
+
+def test_pipeline_with_error():
+    pipeline = Pipeline().add(MemberFlow, pd.DataFrame({"name": [], "prefecture_code": [], "shop": []}))
+    with pytest.raises(ReferenceDataNotFoundError) as e:
+        pipeline.run()
+    assert e.value.name == "PrefectureFlow"
+
+    class AFlow(BaseFlow):
+        a = Column(dtype=String)
+
+    class BFlow(BaseFlow):
+        b = Column(dtype=String)
+        a = ReferenceColumn(column=AFlow.a, how="left", on="b")
+
+    AFlow.b = ReferenceColumn(column=BFlow.b, how="left", on="a")
+    pipeline = Pipeline().add(AFlow, pd.DataFrame({"a": ["x"]})).add(BFlow, pd.DataFrame({"b": ["x"]}))
+    with pytest.raises(CircularReferenceError) as e:
+        pipeline.order()
+    assert sorted(e.value.names) == ["AFlow", "BFlow"]
@@ -0,0 +1,77 @@
+import pandas as pd
+
+from prep_flow import (
+    BaseFlow,
+    Column,
+    Float,
+    Integer,
+    ReferenceColumn,
+    String,
+    creator,
+    data_filter,
+)
+
+
+class ScoreFlow(BaseFlow):
+    id = Column(dtype=String)
+    score = Column(dtype=Float)
+
+
+class MemberFlow(BaseFlow):
+    id = Column(dtype=String, name="ID")
+    age = Column(dtype=Integer, original_dtype=Integer)
+    gender = Column(dtype=String, category=["man", "woman"])
+    score = ReferenceColumn(ScoreFlow.score, on="id", how="left", order=1)
+    double_age = Column(dtype=Integer)
+
+    @creator("double_age")
+    def create_double_age(cls, data: pd.DataFrame) -> pd.Series:
+        return data["age"] * 2
+
+    @data_filter(order=1)
+    def filter_adult(cls, data: pd.DataFrame) -> pd.DataFrame:
+        return data[data["age"] >= 20]
+
+
+def test_explain():
+    df = pd.DataFrame({"ID": ["a", "b"], "age": [28, 26], "gender": ["man", "woman"]})
+    score = ScoreFlow(pd.DataFrame({"id": ["a", "b"], "score": [1.0, 2.0]}))
+    plan = MemberFlow.explain(df, reference=[score])
+
+    assert [stage.name for stage in plan.stages] == [
+        "read",
+        "pre_validate",
+        "pre_cast",
+        "order 0",
+        "order 1",
+        "post_validate",
+        "post_cast",
+        "output",
+    ]
+    assert plan.stage("read").steps == ["rename ID -> id"]
+    assert plan.stage("pre_cast").steps == ["age: int64 -> int (no-op)"]
+    assert plan.stage("order 0").steps == ["create double_age with create_double_age"]
+    assert plan.stage("order 1").steps == [
+        "filter with filter_adult",
+        "join ScoreFlow left on id: score (lookup join), reference rows=2, unique keys",
+    ]
+    assert "category: gender in 2 values (hash lookup)" in plan.stage("post_validate").steps
+    assert plan.stage("read").estimate.rows == 2
+    assert str(plan.stage("output").estimate).startswith("rows<=2")
+    assert str(plan).startswith("ExecutionPlan of MemberFlow")
+    assert plan.stage("output").steps[0] == "replace None with NaN: id, gender"
+
+    # The flow isn't run.
+    assert MemberFlow.explain(pd.DataFrame({"ID": ["a"], "age": [-1]})).stage("read").steps == [
+        "rename ID -> id",
+        "missing columns: gender",
+    ]
+
+
+def test_explain_schema():
+    plan = MemberFlow.explain({"ID": "object", "age": "float64", "gender": "object"})
+
+    assert plan.stage("read").estimate.rows is None
+    assert plan.stage("pre_cast").steps == ["age: float64 -> int (vectorized)"]
+    assert "age: int64 -> int (no-op)" in plan.stage("post_cast").steps
+    assert plan.stage("order 1").steps[-1] == "join ScoreFlow left on id: score (hash join)"
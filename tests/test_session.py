@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from prep_flow import (
+    BaseFlow,
+    Column,
+    FlowSession,
+    ReferenceColumn,
+    ReferenceDataNotFoundError,
+    String,
+)
+
+
+def test_session():
+    loaded = []
+
+    class PrefectureFlow(BaseFlow):
+        prefecture_code = Column(dtype=String)
+        prefecture_name = Column(dtype=String)
+        region = Column(dtype=String)
+
+    class MemberFlow(BaseFlow):
+        name = Column(dtype=String)
+        prefecture_code = Column(dtype=String)
+        prefecture_name = ReferenceColumn(column=PrefectureFlow.prefecture_name, how="left", on="prefecture_code")
+
+    class ShopFlow(BaseFlow):
+        shop = Column(dtype=String)
+        prefecture_code = Column(dtype=String)
+        prefecture_name = ReferenceColumn(column=PrefectureFlow.prefecture_name, how="inner", on="prefecture_code")
+
+    def load_prefecture() -> pd.DataFrame:
+        loaded.append(True)
+        return pd.DataFrame(
+            {
+                "prefecture_code": ["001", "002"],
+                "prefecture_name": ["tokyo", "osaka"],
+                "region": ["kanto", "kansai"],
+            }
+        )
+
+    session = FlowSession()
+    session.register(PrefectureFlow, load_prefecture)
+    assert loaded == []
+
+    member = session.run(MemberFlow, pd.DataFrame({"name": ["taro", "jiro"], "prefecture_code": ["001", "003"]}))
+    shop = session.run(ShopFlow, pd.DataFrame({"shop": ["a", "b"], "prefecture_code": ["002", "003"]}))
+
+    assert loaded == [True]
+    assert member.reference[0] is shop.reference[0] is session.get(PrefectureFlow)
+    assert member.data["prefecture_name"].tolist()[0] == "tokyo"
+    assert pd.isna(member.data["prefecture_name"].tolist()[1])
+    assert shop.data["prefecture_name"].tolist() == ["osaka"]
+
+    with pytest.raises(ReferenceDataNotFoundError) as e:
+        session.get("UnknownFlow")
+    assert e.value.name == "UnknownFlow"
+
+
+def test_project():
+    class Flow(BaseFlow):
+        code = Column(dtype=String)
+        name = Column(dtype=String)
+        region = Column(dtype=String)
+
+    flow = Flow(pd.DataFrame({"code": ["001", "002"], "name": ["tokyo", "osaka"], "region": ["kanto", "kansai"]}))
+    projection = flow.project(["name", "code"])
+
+    assert projection.columns.tolist() == ["name", "code"]
+    assert np.shares_memory(projection["name"].to_numpy(), flow.data["name"].to_numpy())
+    assert flow.project(["name", "code"]) is projection
+
+    # Projections of replaced data are not reused, even if the new data gets the id of the freed data.
+    for i in range(10):
+        flow.data = None
+        flow.data = pd.DataFrame({"code": ["001", "002"], "name": [f"city_{i}", "osaka"], "region": ["a", "b"]})
+        assert flow.project(["name", "code"])["name"].tolist() == [f"city_{i}", "osaka"]
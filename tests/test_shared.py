@@ -0,0 +1,67 @@
+import os
+import pickle
+
+import pandas as pd
+import pytest
+
+from prep_flow import BaseFlow, Column, ReferenceColumn, String
+
+pytest.importorskip("pyarrow")
+
+from prep_flow.shared import SharedFlow, reference_columns  # noqa: E402
+
+from . import test_pipeline  # noqa: E402
+
+
+class PrefectureFlow(BaseFlow):
+    prefecture_code = Column(dtype=String)
+    prefecture_name = Column(dtype=String)
+    region = Column(dtype=String, category=["kanto", "kansai"])
+
+
+class MemberFlow(BaseFlow):
+    name = Column(dtype=String)
+    prefecture_code = Column(dtype=String)
+    prefecture_name = ReferenceColumn(column=PrefectureFlow.prefecture_name, how="left", on="prefecture_code")
+
+
+def test_shared_flow(tmp_path):
+    prefecture = PrefectureFlow(
+        pd.DataFrame(
+            {
+                "prefecture_code": ["13", "27"],
+                "prefecture_name": ["tokyo", "osaka"],
+                "region": ["kanto", "kansai"],
+            }
+        )
+    )
+    handle = pickle.loads(pickle.dumps(SharedFlow.publish(prefecture, directory=str(tmp_path))))
+
+    attached = handle.attach()
+    assert isinstance(attached, PrefectureFlow)
+    assert attached.data["prefecture_name"].tolist() == ["tokyo", "osaka"]
+    assert isinstance(attached.data["prefecture_name"].dtype, pd.ArrowDtype)
+    assert attached.data["region"].dtype == "category"
+
+    assert reference_columns(MemberFlow, "PrefectureFlow") == ["prefecture_name", "prefecture_code"]
+    projected = handle.attach(reference_columns(MemberFlow, "PrefectureFlow"))
+    assert projected.data.columns.tolist() == ["prefecture_name", "prefecture_code"]
+
+    member = MemberFlow(pd.DataFrame({"name": ["taro"], "prefecture_code": ["27"]}), reference=[projected])
+    assert member.data["prefecture_name"].tolist() == ["osaka"]
+
+    handle.unlink()
+    assert os.listdir(tmp_path) == []
+    # Attached data stays mapped after the file is removed.
+    assert attached.data["prefecture_code"].tolist() == ["13", "27"]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_pipeline_with_shared_memory(executor, tmp_path):
+    pipeline = test_pipeline.create_pipeline(executor, shared_memory=True, shared_dir=str(tmp_path))
+
+    results = pipeline.run(outputs=[test_pipeline.PrefectureFlow, test_pipeline.MemberFlow])
+    assert results["MemberFlow"].data["country_code"].tolist() == ["JP", "US"]
+    assert results["MemberFlow"].data["shop_country_code"].tolist() == ["JP", "US"]
+    assert results["PrefectureFlow"].data["country_name"].tolist() == ["japan", "america"]
+    assert os.listdir(tmp_path) == []
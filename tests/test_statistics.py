@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from prep_flow import (
+    BaseFlow,
+    Column,
+    Integer,
+    ReferenceColumn,
+    String,
+    ValidationPolicy,
+)
+from prep_flow.join import lookup_merge
+from prep_flow.statistics import column_statistics, from_metadata, to_metadata
+
+
+class PrefectureFlow(BaseFlow):
+    prefecture_code = Column(dtype=Integer)
+    prefecture = Column(dtype=String)
+
+
+class MemberFlow(BaseFlow):
+    __optimize_dtypes__ = True
+    name = Column(dtype=String)
+    age = Column(dtype=Integer)
+    gender = Column(dtype=String)
+    prefecture_code = Column(dtype=Integer)
+    prefecture = ReferenceColumn(PrefectureFlow.prefecture, on="prefecture_code", how="left")
+
+
+def test_column_statistics():
+    statistics = column_statistics(pd.Series(["tokyo", None, "osaka", "tokyo"]))
+    assert statistics.rows == 4
+    assert statistics.null_count == 1
+    assert statistics.distinct == 2
+    assert (statistics.minimum, statistics.maximum) == ("osaka", "tokyo")
+    assert statistics.max_length == 5
+    assert not statistics.may_be_unique()
+
+    statistics = column_statistics(pd.Series(np.arange(100000) % 50000))
+    assert (statistics.minimum, statistics.maximum) == (0, 49999)
+    assert statistics.max_length is None
+    assert abs(statistics.distinct - 50000) < 5000
+
+    statistics = column_statistics(pd.Series([[1], [2]]))
+    assert statistics.distinct is None
+
+    statistics = column_statistics(pd.Series(pd.to_datetime(["2024-01-01", "2024-02-01"])))
+    restored = from_metadata(to_metadata({"date": statistics}))["date"]
+    assert restored.maximum == pd.Timestamp("2024-02-01")
+    assert restored.distinct == 2
+
+
+def test_lookup_merge():
+    left = pd.DataFrame({"key": [3, 1, 2, 5, 1], "value": range(5)}, index=[9, 8, 7, 6, 5])
+    right = pd.DataFrame(
+        {
+            "key": [1, 2, 3],
+            "number": [10, 20, 30],
+            "flag": [True, False, True],
+            "nullable": pd.array([1, None, 3], dtype="Int64"),
+        }
+    )
+    for how in ["left", "inner"]:
+        pd.testing.assert_frame_equal(
+            lookup_merge(left, right, how, ["key"]), pd.merge(left, right, how=how, on="key")
+        )
+
+    assert lookup_merge(left, pd.concat([right, right]), "left", ["key"]) is None
+    assert lookup_merge(left, right.assign(value=0), "left", ["key"]) is None
+
+
+def test_statistics_in_flow(tmp_path):
+    prefecture_flow = PrefectureFlow(pd.DataFrame({"prefecture_code": [1, 2], "prefecture": ["Tokyo", "Osaka"]}))
+    # Only the columns scanned by the checks, and the keys which flows referring to the flow join on, have statistics.
+    assert prefecture_flow.statistics == {}
+
+    df = pd.DataFrame(
+        {
+            "name": ["Taro", "Hanako", "Jiro", "Saburo"],
+            "age": [28, 26, 300, 1],
+            "gender": ["man", "woman", "man", "man"],
+            "prefecture_code": [2, 1, 3, 2],
+        }
+    )
+    member_flow = MemberFlow(df, reference=[prefecture_flow])
+    assert list(prefecture_flow.statistics.keys()) == ["prefecture_code"]
+    assert prefecture_flow.statistics["prefecture_code"].may_be_unique()
+    assert member_flow.statistics["age"].maximum == 300
+    assert member_flow.statistics["name"].max_length == 6
+    assert member_flow.data["age"].dtype == "int16"
+    assert member_flow.data["prefecture_code"].dtype == "int8"
+    assert isinstance(member_flow.data["gender"].dtype, pd.CategoricalDtype)
+    assert member_flow.data["name"].dtype == object
+    assert member_flow.data["prefecture"].tolist() == ["Osaka", "Tokyo", np.nan, "Osaka"]
+
+    # The statistics are stored with the data, and restored without scanning it.
+    prefecture_flow.to_ipc(str(tmp_path / "prefecture.arrow"))
+    restored = PrefectureFlow.read_ipc(str(tmp_path / "prefecture.arrow"))
+    assert restored.statistics["prefecture_code"].distinct == 2
+    plan = MemberFlow.explain(df, reference=[restored])
+    assert "(lookup join)" in plan.stage("order 0").steps[0]
+
+
+def test_statistics_from_validation():
+    class ShopFlow(BaseFlow):
+        shop = Column(dtype=String, nullable=False)
+        city = Column(dtype=String, category=["tokyo", "osaka", "kyoto"], nullable=True)
+        code = Column(dtype=String, regexp=r"[A-Z]\d")
+        note = Column(dtype=String)
+
+    df = pd.DataFrame(
+        {
+            "shop": ["a", "b", "c", "d"],
+            "city": ["tokyo", None, "osaka", "tokyo"],
+            "code": ["A1", "B2", None, "C3"],
+            "note": ["x", "y", "z", "w"],
+        }
+    )
+    statistics = ShopFlow(df).statistics
+    assert list(statistics.keys()) == ["shop", "code", "city"]
+    assert (statistics["shop"].null_count, statistics["code"].null_count) == (0, 1)
+    # Statistics of category columns are taken from the categories found by the check.
+    city = statistics["city"]
+    assert (city.null_count, city.distinct, city.minimum, city.maximum, city.max_length) == (1, 2, "osaka", "tokyo", 5)
+
+    # Sampled checks don't tell the statistics of all rows.
+    assert ShopFlow(df, validation_policy=ValidationPolicy(mode="head", n=2)).statistics == {}
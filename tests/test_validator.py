@@ -8,6 +8,7 @@ from prep_flow import (
     InvalidRegexpFoundError,
     NecessaryColumnsNotFoundError,
     NullValueFoundError,
+    ValidationPolicy,
     Validator,
 )
 
@@ -178,3 +179,63 @@ def test_validate_category():
     conditions_4 = {"gender": {"category": [0, 1], "nullable": False}}
     Validator.validate_category(data_4, conditions_4)
     assert True
+
+
+def test_validation_policy():
+    assert ValidationPolicy().positions(10) is None
+    assert ValidationPolicy(mode="head", n=3).positions(10).tolist() == [0, 1, 2]
+    assert ValidationPolicy(mode="head", frac=0.5).positions(10).tolist() == [0, 1, 2, 3, 4]
+    assert ValidationPolicy(mode="head", n=20).positions(10) is None
+
+    positions = ValidationPolicy(mode="sample", n=4, random_state=0).positions(10)
+    assert len(positions) == 4
+    assert positions.tolist() == sorted(positions.tolist())
+    assert positions.tolist() == ValidationPolicy(mode="sample", n=4, random_state=0).positions(10).tolist()
+
+    policy = ValidationPolicy(mode="head", n=1, checks={"category": ValidationPolicy()})
+    assert policy.for_check("category").mode == "full"
+    assert policy.for_check("regexp").mode == "head"
+
+    with pytest.raises(ValueError):
+        ValidationPolicy(mode="sample")
+    with pytest.raises(ValueError):
+        ValidationPolicy(mode="all")
+    with pytest.raises(ValueError):
+        ValidationPolicy(checks={"unknown": ValidationPolicy()})
+
+
+def test_validate_with_sampling():
+    data = pd.DataFrame({"gender": ["man", "woman", "man", "男", "woman"]})
+    conditions = {"gender": {"category": ["man", "woman"], "nullable": False}}
+
+    Validator(ValidationPolicy(mode="head", n=3)).validate("category", data, conditions)
+
+    with pytest.raises(InvalidCategoryFoundError) as e:
+        Validator(ValidationPolicy(mode="head", n=4)).validate("category", data, conditions)
+    assert e.value.row_number == 4
+    assert e.value.sampling == "first 4 of 5 rows"
+    assert "found by sampling validation" in str(e.value)
+
+    with pytest.raises(InvalidCategoryFoundError) as e:
+        Validator().validate("category", data, conditions)
+    assert e.value.sampling is None
+    assert "sampling" not in str(e.value)
+
+
+def test_validate_large_category():
+    category = [f"{i:05d}" for i in range(5000)]
+    data = pd.DataFrame({"code": [f"{i:05d}" for i in range(0, 10000, 7)] + [None]})
+
+    valid = data["code"].isna() | (data["code"] < "05000")
+    Validator.validate_category(data[valid].dropna(), {"code": {"category": category, "nullable": False}})
+    Validator.validate_category(data[valid], {"code": {"category": category, "nullable": True}})
+
+    with pytest.raises(InvalidCategoryFoundError) as e:
+        Validator.validate_category(data, {"code": {"category": category, "nullable": True}})
+    assert e.value.row_number == 716
+    assert e.value.value == "05005"
+
+    # Values equal to a category, e.g. 1.0 and 1, are included like the operator in.
+    Validator.validate_category(pd.DataFrame({"code": [1.0, 2]}), {"code": {"category": [1, 2], "nullable": False}})
+    with pytest.raises(InvalidCategoryFoundError):
+        Validator.validate_category(pd.DataFrame({"code": ["1"]}), {"code": {"category": [1], "nullable": False}})
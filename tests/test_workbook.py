@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+from prep_flow import BaseFlow, Column, SheetNotFoundError, String, WorkbookLoader
+
+
+class MemberFlow(BaseFlow):
+    __sheetname__ = "member"
+
+    name = Column(dtype=String)
+
+
+class ShopFlow(BaseFlow):
+    __sheetname__ = "shop"
+
+    shop = Column(dtype=String)
+
+
+@pytest.fixture
+def workbook(tmp_path) -> str:
+    path = str(tmp_path / "workbook.xlsx")
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"name": ["taro", "hanako"]}).to_excel(writer, sheet_name="member", index=False)
+        pd.DataFrame({"shop": ["a", "b", "c"]}).to_excel(writer, sheet_name="shop", index=False)
+    return path
+
+
+def test_workbook_loader(workbook, tmp_path):
+    loader = WorkbookLoader(workbook, cache_dir=str(tmp_path / "cache"))
+    sheets = loader.load_flows([MemberFlow, ShopFlow])
+
+    assert sorted(sheets.keys()) == ["member", "shop"]
+    assert MemberFlow(loader).data["name"].tolist() == ["taro", "hanako"]
+    assert ShopFlow(loader).data["shop"].tolist() == ["a", "b", "c"]
+    assert len(os.listdir(tmp_path / "cache" / loader.key())) == 3
+
+    with pytest.raises(SheetNotFoundError) as e:
+        loader.sheet("unknown")
+    assert e.value.sheet == "unknown"
+
+
+def test_workbook_loader_cache(workbook, tmp_path, monkeypatch):
+    WorkbookLoader(workbook, cache_dir=str(tmp_path / "cache")).load(["member", "shop"])
+
+    def read_excel(*args, **kwargs):
+        raise AssertionError("The workbook is parsed again.")
+
+    monkeypatch.setattr(pd, "read_excel", read_excel)
+    monkeypatch.setattr(pd, "ExcelFile", read_excel)
+    loader = WorkbookLoader(workbook, cache_dir=str(tmp_path / "cache"))
+
+    assert loader.sheet("shop")["shop"].tolist() == ["a", "b", "c"]
+
+
+def test_workbook_loader_read_cache(workbook, tmp_path):
+    loader = WorkbookLoader(workbook, cache_dir=str(tmp_path / "cache"))
+
+    # Looking up the cache doesn't create its directory.
+    assert loader.read_cache("member") is None
+    assert not (tmp_path / "cache").exists()
+
+
+def test_workbook_loader_with_workers(workbook):
+    loader = WorkbookLoader(workbook, max_workers=2)
+
+    assert loader.load(["shop", "member"])["member"]["name"].tolist() == ["taro", "hanako"]